@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import CLINIC_CLAIM, ROLE_CLAIM, VERSION_CLAIM, current_token_version
+
+
+class ClinicPrincipal(TokenUser):
+    """Authenticated user rebuilt from token claims.
+
+    Exposes the attributes views rely on (``id``, ``role``, ``clinic_id``)
+    without touching the database; ``clinic`` and ``instance`` are loaded
+    lazily for the few code paths that need real model objects.
+    """
+
+    @cached_property
+    def role(self) -> str:
+        return self.token.get(ROLE_CLAIM)
+
+    @cached_property
+    def clinic_id(self):
+        return self.token.get(CLINIC_CLAIM)
+
+    @cached_property
+    def clinic(self):
+        from clinics.models import Clinic
+
+        if not self.clinic_id:
+            return None
+        return Clinic.objects.filter(pk=self.clinic_id).first()
+
+    @cached_property
+    def instance(self):
+        return get_user_model().objects.get(pk=self.id)
+
+
+def get_user_instance(user):
+    """Return a saveable ``User`` for either a principal or a model instance."""
+    if isinstance(user, ClinicPrincipal):
+        return user.instance
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            # Tokens issued before claims were embedded still work, at the
+            # cost of the user lookup.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if validated_token[VERSION_CLAIM] != current_token_version(user_id):
+            raise InvalidToken("Token claims are out of date")
+        return ClinicPrincipal(validated_token)
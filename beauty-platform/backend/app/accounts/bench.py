@@ -0,0 +1,210 @@
+"""In-process load harness for the OTP login funnel.
+
+Each virtual user walks request-otp -> deliver -> verify-otp -> refresh ->
+logout through Django's WSGI test client, with SMS delivery going to a
+``FakeSMSProvider``. Latency and SQL query counts are recorded per step.
+Intended for development and staging databases: it creates throwaway users
+and removes them afterwards.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .dispatch import claim, deliver
+from .models import OTPRequest
+from .sms import FakeSMSProvider
+
+STEPS = ("request_otp", "deliver", "verify_otp", "refresh", "logout")
+BENCH_PHONE_PREFIX = "+98999"
+BENCH_USERNAME_PREFIX = "bench-otp-"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; ``0.0`` for no samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class StepStats:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self) -> dict:
+        count = len(self.latencies)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "avg_queries": round(sum(self.queries) / count, 2) if count else 0.0,
+            "max_queries": max(self.queries, default=0),
+        }
+
+
+class LoginFunnelBench:
+    def __init__(
+        self,
+        users: int = 100,
+        concurrency: int = 8,
+        provider: FakeSMSProvider | None = None,
+    ) -> None:
+        self.users = users
+        self.concurrency = max(1, concurrency)
+        self.provider = provider or FakeSMSProvider()
+        # A fresh phone range per run keeps earlier runs' rate-limit windows
+        # (which live in Redis when configured) out of the numbers.
+        self.offset = random.randrange(0, 10_000_000 - users)
+        self.stats = {step: StepStats() for step in STEPS}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.elapsed = 0.0
+
+    def phone_for(self, index: int) -> str:
+        return f"{BENCH_PHONE_PREFIX}{self.offset + index:07d}"
+
+    def seed_users(self) -> None:
+        User = get_user_model()
+        self.cleanup()
+        password = make_password(None)
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{BENCH_USERNAME_PREFIX}{index}",
+                    email=f"{BENCH_USERNAME_PREFIX}{index}@bench.invalid",
+                    phone_number=self.phone_for(index),
+                    password=password,
+                )
+                for index in range(self.users)
+            ],
+            batch_size=1000,
+        )
+
+    def cleanup(self) -> None:
+        User = get_user_model()
+        OTPRequest.objects.filter(phone_number__startswith=BENCH_PHONE_PREFIX).delete()
+        User.objects.filter(username__startswith=BENCH_USERNAME_PREFIX).delete()
+
+    def _record(self, step: str, started: float, queries: int, ok: bool) -> None:
+        with self._lock:
+            stats = self.stats[step]
+            stats.latencies.append(time.perf_counter() - started)
+            stats.queries.append(queries)
+            if not ok:
+                stats.errors += 1
+
+    def _timed(self, step: str, func):
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            ok, value = func()
+        self._record(step, started, len(captured), ok)
+        return ok, value
+
+    def _deliver_latest(self, phone: str):
+        otp = OTPRequest.objects.filter(phone_number=phone).order_by("-created_at").first()
+        if otp is None:
+            return False, None
+        max_attempts = getattr(settings, "SMS_MAX_ATTEMPTS", 5)
+        status = deliver(otp, self.provider) if claim(otp) else otp.delivery_status
+        # Retry right away instead of honouring the backoff; the step then
+        # measures the total cost of getting a code out.
+        while status == OTPRequest.DeliveryStatus.QUEUED and otp.delivery_attempts < max_attempts:
+            status = deliver(otp, self.provider) if claim(otp) else None
+        return status == OTPRequest.DeliveryStatus.SENT, None
+
+    def run_user(self, index: int) -> bool:
+        phone = self.phone_for(index)
+        client = Client(
+            HTTP_HOST=_bench_host(),
+            REMOTE_ADDR=f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+        )
+        payload = {"phone_number": phone, "purpose": OTPRequest.Purpose.LOGIN}
+        try:
+            ok, _ = self._timed(
+                "request_otp",
+                lambda: _ok(client.post("/api/auth/request-otp", payload, "application/json")),
+            )
+            if not ok:
+                return False
+            ok, _ = self._timed("deliver", lambda: self._deliver_latest(phone))
+            if not ok:
+                return False
+            code = self.provider.last_code_for(phone)
+            ok, _ = self._timed(
+                "verify_otp",
+                lambda: _ok(
+                    client.post(
+                        "/api/auth/verify-otp", {**payload, "code": code}, "application/json"
+                    )
+                ),
+            )
+            if not ok:
+                return False
+            ok, response = self._timed(
+                "refresh", lambda: _ok(client.post("/api/auth/refresh", {}, "application/json"))
+            )
+            if not ok:
+                return False
+            access = response.cookies[settings.JWT_ACCESS_COOKIE_NAME].value
+            ok, _ = self._timed(
+                "logout",
+                lambda: _ok(
+                    client.post(
+                        "/api/auth/logout",
+                        {},
+                        "application/json",
+                        HTTP_AUTHORIZATION=f"Bearer {access}",
+                    )
+                ),
+            )
+            return ok
+        finally:
+            close_old_connections()
+
+    def run(self) -> dict:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(self.run_user, range(self.users)))
+        self.elapsed = time.perf_counter() - started
+        self.completed = sum(results)
+        return self.report()
+
+    def report(self) -> dict:
+        elapsed = self.elapsed or 1e-9
+        return {
+            "users": self.users,
+            "concurrency": self.concurrency,
+            "completed": self.completed,
+            "elapsed_s": round(self.elapsed, 3),
+            "logins_per_s": round(self.completed / elapsed, 2),
+            "steps": {step: self.stats[step].summary() for step in STEPS},
+        }
+
+
+def _ok(response):
+    return response.status_code < 400, response
+
+
+def _bench_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "localhost"
@@ -0,0 +1,52 @@
+"""Short-lived cache of phone number -> account used by the OTP login flow."""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+_MISSING = "__none__"
+
+
+@dataclass(frozen=True)
+class PhoneAccount:
+    user_id: int
+    role: str
+    clinic_id: Optional[int]
+
+
+def _cache_key(phone_number: str) -> str:
+    return f"phone-account:{phone_number}"
+
+
+def lookup_phone(phone_number: str) -> Optional[PhoneAccount]:
+    """Resolve a canonical phone number, caching hits and misses alike."""
+    key = _cache_key(phone_number)
+    cached = cache.get(key)
+    if cached == _MISSING:
+        return None
+    if cached is not None:
+        return PhoneAccount(*cached)
+
+    row = (
+        get_user_model()
+        .objects.filter(phone_number=phone_number)
+        .values_list("id", "role", "clinic_id")
+        .first()
+    )
+    ttl = getattr(settings, "PHONE_LOOKUP_CACHE_SECONDS", 60)
+    cache.set(key, row if row else _MISSING, ttl)
+    return PhoneAccount(*row) if row else None
+
+
+def invalidate_phones(phone_numbers: Iterable[str]) -> None:
+    keys = [_cache_key(phone) for phone in set(phone_numbers) if phone]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # A concurrent lookup may re-cache the old row before this transaction
+    # commits, so drop the keys again once the change is visible.
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,214 @@
+"""Outbound OTP delivery queue.
+
+``OTPRequest`` rows double as job records: the request path stores them as
+``QUEUED`` and returns, and ``dispatch_sms`` workers claim due rows with
+``SELECT ... FOR UPDATE SKIP LOCKED``, hand them to the configured provider
+and record the outcome on the row. Each claim leases its rows under a fresh
+``lease_token``. Just before sending, the worker checks it still holds the
+token and renews the lease, and the outcome is only written while the token
+matches. A batch that waits past the lease for provider slots is therefore
+never sent twice.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OTPRequest
+from .sms import SMSDeliveryError, SMSProvider, get_sms_provider, unseal_code
+
+logger = logging.getLogger(__name__)
+
+# Rows stuck in SENDING longer than this (crashed worker) become claimable again.
+CLAIM_LEASE = timedelta(minutes=1)
+
+_slots: dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+def provider_slots(provider: SMSProvider) -> threading.BoundedSemaphore:
+    # One semaphore per process: it caps concurrent sends across the threads
+    # of one worker only. N worker processes can send up to
+    # N * max_concurrency messages at once; size the deployment for that.
+    with _slots_lock:
+        if provider.name not in _slots:
+            _slots[provider.name] = threading.BoundedSemaphore(provider.max_concurrency)
+        return _slots[provider.name]
+
+
+def retry_delay(attempt: int) -> timedelta:
+    base = getattr(settings, "SMS_RETRY_BACKOFF_SECONDS", 2)
+    return timedelta(seconds=min(base * 2 ** (attempt - 1), 300))
+
+
+def claim_batch(limit: int) -> list[OTPRequest]:
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OTPRequest.objects.select_for_update(skip_locked=True)
+            .filter(
+                delivery_status__in=[
+                    OTPRequest.DeliveryStatus.QUEUED,
+                    OTPRequest.DeliveryStatus.SENDING,
+                ],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:limit]
+        )
+        if batch:
+            token = uuid.uuid4()
+            OTPRequest.objects.filter(pk__in=[otp.pk for otp in batch]).update(
+                delivery_status=OTPRequest.DeliveryStatus.SENDING,
+                next_attempt_at=now + CLAIM_LEASE,
+                lease_token=token,
+            )
+            for otp in batch:
+                otp.delivery_status, otp.lease_token = OTPRequest.DeliveryStatus.SENDING, token
+    return batch
+
+
+def claim(otp: OTPRequest) -> bool:
+    """Lease ``otp`` itself, out of turn, if it is still waiting to be sent."""
+    token = uuid.uuid4()
+    claimed = OTPRequest.objects.filter(
+        pk=otp.pk,
+        delivery_status__in=[OTPRequest.DeliveryStatus.QUEUED, OTPRequest.DeliveryStatus.SENDING],
+    ).update(
+        delivery_status=OTPRequest.DeliveryStatus.SENDING,
+        next_attempt_at=timezone.now() + CLAIM_LEASE,
+        lease_token=token,
+    )
+    if claimed:
+        otp.delivery_status, otp.lease_token = OTPRequest.DeliveryStatus.SENDING, token
+    return bool(claimed)
+
+
+def _leased(otp: OTPRequest):
+    """The row of ``otp`` if this worker's lease on it still holds."""
+    return OTPRequest.objects.filter(
+        pk=otp.pk, delivery_status=OTPRequest.DeliveryStatus.SENDING, lease_token=otp.lease_token
+    )
+
+
+def deliver(otp: OTPRequest, provider: SMSProvider | None = None) -> str | None:
+    """Send ``otp`` and record the outcome; ``None`` if its lease was lost first."""
+    provider = provider or get_sms_provider()
+    attempts = otp.delivery_attempts + 1
+    values = {"delivery_attempts": attempts, "delivery_error": "", "sealed_code": ""}
+
+    if otp.expires_at <= timezone.now() or not otp.sealed_code:
+        values.update(delivery_status=OTPRequest.DeliveryStatus.FAILED, delivery_error="expired")
+        _leased(otp).update(**values)
+        for name, value in values.items():
+            setattr(otp, name, value)
+        return otp.delivery_status
+
+    try:
+        with provider_slots(provider):
+            # Waiting for a slot can outlast the lease. Re-check ownership and
+            # renew the lease, so no other worker claims the row mid-send.
+            renewed = _leased(otp).update(next_attempt_at=timezone.now() + CLAIM_LEASE)
+            if not renewed:
+                logger.info("OTP lease lost before sending otp_id=%s", otp.pk)
+                return None
+            provider.send_otp(otp.phone_number, unseal_code(otp.sealed_code), otp.purpose)
+    except SMSDeliveryError as exc:
+        values["delivery_error"] = str(exc)[:255]
+        max_attempts = getattr(settings, "SMS_MAX_ATTEMPTS", 5)
+        retry_at = timezone.now() + retry_delay(attempts)
+        if exc.retryable and attempts < max_attempts and retry_at < otp.expires_at:
+            del values["sealed_code"]
+            values.update(
+                delivery_status=OTPRequest.DeliveryStatus.QUEUED, next_attempt_at=retry_at
+            )
+        else:
+            values["delivery_status"] = OTPRequest.DeliveryStatus.FAILED
+        logger.warning(
+            "OTP delivery failed otp_id=%s provider=%s attempt=%s status=%s error=%s",
+            otp.pk,
+            provider.name,
+            attempts,
+            values["delivery_status"],
+            values["delivery_error"],
+        )
+    else:
+        values.update(delivery_status=OTPRequest.DeliveryStatus.SENT, delivered_at=timezone.now())
+
+    _leased(otp).update(**values)
+    for name, value in values.items():
+        setattr(otp, name, value)
+    return otp.delivery_status
+
+
+def record_failure(otp: OTPRequest, error: str) -> None:
+    """Record a failed attempt after ``deliver`` raised something unexpected.
+
+    The row is retried with backoff like a retryable provider error. Only a row
+    still leased to this worker is touched, so an outcome ``deliver`` already
+    saved wins.
+    """
+    now = timezone.now()
+    attempts = (
+        OTPRequest.objects.filter(pk=otp.pk).values_list("delivery_attempts", flat=True).first()
+        or 0
+    ) + 1
+    values = {"delivery_attempts": attempts, "delivery_error": error[:255]}
+    retry_at = now + retry_delay(attempts)
+    if attempts < getattr(settings, "SMS_MAX_ATTEMPTS", 5) and retry_at < otp.expires_at:
+        values.update(delivery_status=OTPRequest.DeliveryStatus.QUEUED, next_attempt_at=retry_at)
+    else:
+        values.update(delivery_status=OTPRequest.DeliveryStatus.FAILED, sealed_code="")
+    _leased(otp).update(**values)
+
+
+class Dispatcher:
+    """Claims batches with ``claim`` and hands each row to ``deliver`` on a thread pool.
+
+    An unexpected exception from ``deliver`` is logged and passed to ``fail``,
+    which records the attempt; it never stops the worker loop.
+    """
+
+    claim = staticmethod(claim_batch)
+    deliver = staticmethod(deliver)
+    fail = staticmethod(record_failure)
+    thread_name_prefix = "sms-dispatch"
+
+    def __init__(self, workers: int = 4, provider: SMSProvider | None = None) -> None:
+        self.provider = provider or get_sms_provider()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix=self.thread_name_prefix
+        )
+
+    def _deliver_in_worker(self, item):
+        try:
+            return self.deliver(item, self.provider)
+        except Exception as exc:
+            logger.exception(
+                "Delivery raised %s item_id=%s provider=%s",
+                type(exc).__name__,
+                item.pk,
+                self.provider.name,
+            )
+            try:
+                self.fail(item, f"{type(exc).__name__}: {exc}")
+            except Exception:
+                # The lease runs out and the row is claimed again.
+                logger.exception("Could not record failed delivery item_id=%s", item.pk)
+            return None
+        finally:
+            close_old_connections()
+
+    def run_once(self, batch_size: int = 50) -> int:
+        batch = self.claim(batch_size)
+        if batch:
+            list(self.executor.map(self._deliver_in_worker, batch))
+        return len(batch)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
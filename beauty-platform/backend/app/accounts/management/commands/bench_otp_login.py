@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from accounts.bench import STEPS, LoginFunnelBench
+from accounts.sms import FakeSMSProvider
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark request-otp -> verify-otp -> refresh -> logout in-process "
+        "against a fake SMS gateway. Creates and removes throwaway users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--latency", type=float, default=0.05, help="Fake gateway latency in seconds."
+        )
+        parser.add_argument(
+            "--failure-rate", type=float, default=0.0, help="Fraction of sends that fail."
+        )
+        parser.add_argument("--provider-concurrency", type=int, default=None)
+        parser.add_argument("--keep-users", action="store_true")
+        parser.add_argument("--json", action="store_true", help="Print the raw report.")
+
+    def handle(self, *args, **options):
+        provider = FakeSMSProvider(
+            max_concurrency=options["provider_concurrency"],
+            latency=options["latency"],
+            failure_rate=options["failure_rate"],
+        )
+        bench = LoginFunnelBench(
+            users=max(1, options["users"]),
+            concurrency=options["concurrency"],
+            provider=provider,
+        )
+        bench.seed_users()
+        try:
+            report = bench.run()
+        finally:
+            if not options["keep_users"]:
+                bench.cleanup()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['completed']}/{report['users']} logins in {report['elapsed_s']}s "
+            f"({report['logins_per_s']}/s, concurrency={report['concurrency']})"
+        )
+        self.stdout.write(
+            f"{'step':<12}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'avg q':>8}{'max q':>7}"
+        )
+        for step in STEPS:
+            row = report["steps"][step]
+            self.stdout.write(
+                f"{step:<12}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10}"
+                f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['avg_queries']:>8}"
+                f"{row['max_queries']:>7}"
+            )
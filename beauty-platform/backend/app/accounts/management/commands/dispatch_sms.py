@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.dispatch import Dispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver queued OTP messages through the configured SMS provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--poll-interval", type=float, default=0.5)
+        parser.add_argument(
+            "--once", action="store_true", help="Drain one batch and exit."
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(workers=options["workers"])
+        self.stdout.write(
+            f"Dispatching SMS via {dispatcher.provider.name} "
+            f"(workers={options['workers']}, cap={dispatcher.provider.max_concurrency})"
+        )
+        try:
+            while True:
+                handled = dispatcher.run_once(options["batch_size"])
+                if options["once"]:
+                    self.stdout.write(f"Processed {handled} message(s).")
+                    return
+                if not handled:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.shutdown()
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError
+
+from accounts import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly partitions of the OTP request table on PostgreSQL: "
+        "create upcoming months and detach months past OTP_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Move the existing table onto monthly partitions (run once).",
+        )
+        parser.add_argument("--months-ahead", type=int, default=2)
+        parser.add_argument("--days", type=int, help="Override OTP_RETENTION_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--keep-detached",
+            action="store_true",
+            help="Detach expired partitions without dropping them.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["convert"]:
+                copied = partitioning.convert(
+                    batch_size=max(1, options["batch_size"]),
+                    days=options["days"],
+                    months_ahead=options["months_ahead"],
+                )
+                self.stdout.write(
+                    f"Copied {copied} row(s); the old table is {partitioning.LEGACY}."
+                )
+            created, detached = partitioning.maintain(
+                months_ahead=options["months_ahead"],
+                days=options["days"],
+                drop=not options["keep_detached"],
+            )
+        except NotSupportedError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            f"Created {len(created)} partition(s), detached {len(detached)}: "
+            f"{', '.join(detached) or '-'}"
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.revocation import prune_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        blacklisted, outstanding = prune_expired(
+            batch_size=max(1, options["batch_size"]), pause=options["pause"]
+        )
+        self.stdout.write(
+            f"Deleted {blacklisted} blacklisted and {outstanding} outstanding token(s)."
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from accounts.retention import purge_otps
+
+
+class Command(BaseCommand):
+    help = "Delete OTP requests older than OTP_RETENTION_DAYS in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override OTP_RETENTION_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--archive",
+            metavar="PATH",
+            help="Append purged rows (without code material) to this NDJSON file.",
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {
+            "days": options["days"],
+            "batch_size": max(1, options["batch_size"]),
+            "pause": options["pause"],
+        }
+        if options["archive"]:
+            with open(options["archive"], "a", encoding="utf-8") as archive:
+                deleted = purge_otps(archive=archive, **kwargs)
+        else:
+            deleted = purge_otps(**kwargs)
+        self.stdout.write(f"Deleted {deleted} OTP request(s).")
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+def mark_existing_sent(apps, schema_editor):
+    OTPRequest = apps.get_model("accounts", "OTPRequest")
+    OTPRequest.objects.update(delivery_status="SENT")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_remove_otprequest_code_otprequest_attempt_count_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="otprequest",
+            name="delivered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="otprequest",
+            name="delivery_attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="otprequest",
+            name="delivery_error",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="otprequest",
+            name="delivery_status",
+            field=models.CharField(
+                choices=[
+                    ("QUEUED", "Queued"),
+                    ("SENDING", "Sending"),
+                    ("SENT", "Sent"),
+                    ("FAILED", "Failed"),
+                ],
+                default="QUEUED",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="otprequest",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="otprequest",
+            name="sealed_code",
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name="otprequest",
+            index=models.Index(
+                fields=["delivery_status", "next_attempt_at"],
+                name="accounts_ot_deliver_0f51fc_idx",
+            ),
+        ),
+        migrations.RunPython(mark_existing_sent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:54
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of accounts.phone.normalize_phone_number as of this migration;
+# later edits to the live normalizer must not change what it does.
+_DIGIT_MAP = str.maketrans(
+    "۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩",
+    "01234567890123456789",
+)
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _normalize(value: str) -> str | None:
+    raw = (value or "").translate(_DIGIT_MAP).strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = "98" + digits[1:]
+    elif len(digits) == 10 and digits.startswith("9"):
+        digits = "98" + digits
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    """Rewrite phone numbers to E.164, or abort if two users would share one."""
+    User = apps.get_model("accounts", "User")
+    owners, changed = {}, []
+    users = (
+        User.objects.exclude(phone_number="").order_by("id").only("id", "phone_number")
+    )
+    for user in users.iterator(chunk_size=2000):
+        normalized = _normalize(user.phone_number) or user.phone_number.strip()
+        owners.setdefault(normalized, []).append(user.id)
+        if normalized != user.phone_number:
+            changed.append((user.id, normalized))
+
+    conflicts = [ids for ids in owners.values() if len(ids) > 1]
+    if conflicts:
+        report = "; ".join(", ".join(str(pk) for pk in ids) for ids in conflicts)
+        raise RuntimeError(
+            "Users share a phone number once normalized; give each group distinct "
+            f"numbers and run the migration again. User ids: {report}"
+        )
+    for pk, normalized in changed:
+        User.objects.filter(pk=pk).update(phone_number=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_otprequest_delivery"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("clinics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("phone_number", ""), _negated=True),
+                fields=("phone_number",),
+                name="accounts_user_phone_unique",
+            ),
+        ),
+    ]
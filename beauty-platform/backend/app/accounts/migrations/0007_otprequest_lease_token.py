@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_user_token_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="otprequest",
+            name="lease_token",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
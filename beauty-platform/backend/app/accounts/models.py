@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
+
+from .phone import InvalidPhoneNumber, normalize_phone_number
 
 
 class User(AbstractUser):
@@ -26,13 +29,55 @@ class User(AbstractUser):
         blank=True,
     )
 
+    token_version = models.PositiveIntegerField(default=0)
+
     REQUIRED_FIELDS = ["email"]
+    # Changing any of these invalidates issued tokens (see accounts.tokens).
+    TOKEN_CLAIM_FIELDS = ("role", "clinic_id", "is_active")
 
     class Meta:
         indexes = [
             models.Index(fields=["role", "clinic"]),
             models.Index(fields=["username", "email"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["phone_number"],
+                condition=~Q(phone_number=""),
+                name="accounts_user_phone_unique",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.phone_number:
+            try:
+                self.phone_number = normalize_phone_number(self.phone_number)
+            except InvalidPhoneNumber:
+                self.phone_number = self.phone_number.strip()
+
+        loaded = getattr(self, "_loaded_values", {})
+        if any(
+            field in loaded and loaded[field] != getattr(self, field)
+            for field in self.TOKEN_CLAIM_FIELDS
+        ):
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            **loaded,
+            **{
+                field: getattr(self, field)
+                for field in ("phone_number", *self.TOKEN_CLAIM_FIELDS)
+            },
+        }
 
 
 class OTPRequest(models.Model):
@@ -40,6 +85,12 @@ class OTPRequest(models.Model):
         LOGIN = "LOGIN", "Login"
         RECOVERY = "RECOVERY", "Recovery"
 
+    class DeliveryStatus(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        SENDING = "SENDING", "Sending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -56,12 +107,25 @@ class OTPRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_verified = models.BooleanField(default=False)
+    delivery_status = models.CharField(
+        max_length=16,
+        choices=DeliveryStatus.choices,
+        default=DeliveryStatus.QUEUED,
+    )
+    delivery_attempts = models.PositiveIntegerField(default=0)
+    delivery_error = models.CharField(max_length=255, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Set by each claim; only the worker holding it may send or record the outcome.
+    lease_token = models.UUIDField(null=True, blank=True, editable=False)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    sealed_code = models.CharField(max_length=32, blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["phone_number", "created_at"]),
             models.Index(fields=["phone_number", "purpose", "created_at"]),
             models.Index(fields=["user", "is_verified"]),
+            models.Index(fields=["delivery_status", "next_attempt_at"]),
         ]
         ordering = ["-created_at"]
 
@@ -0,0 +1,256 @@
+"""Hot-path storage for pending OTP codes.
+
+Each pending code lives under ``otp:<purpose>:<phone>`` with its hash, expiry,
+attempt counter and owning user. Verification increments and compares in a
+single atomic step. The first terminal outcome (verified, locked or expired)
+is written back to ``OTPRequest``, and so is the attempt count of every wrong
+guess: an evicted or restarted store is primed from the row and must not hand
+out a fresh set of guesses. Hashes are compared in constant time.
+"""
+
+from __future__ import annotations
+
+import hmac
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import redis
+
+from beauty_platform.redis_client import get_redis
+
+KEY_PREFIX = "otp"
+# Keep finished entries around for a while so replays of a consumed code are
+# answered from the store instead of falling back to the database.
+GRACE_SECONDS = 600
+
+MISS = "MISS"
+INVALID = "INVALID"
+VERIFIED = "VERIFIED"
+LOCKED = "LOCKED"
+EXPIRED = "EXPIRED"
+CONSUMED = "CONSUMED"
+
+
+@dataclass(frozen=True)
+class OTPCheck:
+    outcome: str
+    otp_id: Optional[int] = None
+    user_id: Optional[int] = None
+    attempts: int = 0
+    # True only for the call that moved the entry into a terminal state.
+    first_terminal: bool = False
+
+
+def otp_key(phone_number: str, purpose: str) -> str:
+    return f"{KEY_PREFIX}:{purpose}:{phone_number}"
+
+
+def _epoch_ms(value) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _entry_for(otp) -> dict:
+    return {
+        "id": otp.pk,
+        "user": otp.user_id or 0,
+        "hash": otp.code_hash,
+        "exp": _epoch_ms(otp.expires_at),
+        "attempts": otp.attempt_count,
+    }
+
+
+def _ttl_ms(entry: dict, now_ms: int) -> int:
+    return max(entry["exp"] - now_ms, 0) + GRACE_SECONDS * 1000
+
+
+def _check_entry(entry: dict, candidate: str, max_attempts: int, now_ms: int) -> OTPCheck:
+    ids = {"otp_id": int(entry["id"]), "user_id": int(entry["user"]) or None}
+    final = entry.get("final")
+    if final == VERIFIED:
+        return OTPCheck(CONSUMED, attempts=int(entry["attempts"]), **ids)
+
+    entry["attempts"] = int(entry["attempts"]) + 1
+    attempts = entry["attempts"]
+    if attempts > max_attempts:
+        outcome = LOCKED
+    elif int(entry["exp"]) <= now_ms:
+        outcome = EXPIRED
+    elif hmac.compare_digest(entry["hash"], candidate) and not final:
+        outcome = VERIFIED
+    else:
+        return OTPCheck(final or INVALID, attempts=attempts, **ids)
+
+    first = not final
+    if first:
+        entry["final"] = outcome
+    return OTPCheck(final or outcome, attempts=attempts, first_terminal=first, **ids)
+
+
+class MemoryOTPStore:
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[dict, int]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now_ms: int) -> Optional[dict]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if expires_at <= now_ms:
+            del self._entries[key]
+            return None
+        return entry
+
+    def put(self, otp, now_ms: int, replace: bool = True) -> bool:
+        key = otp_key(otp.phone_number, otp.purpose)
+        entry = _entry_for(otp)
+        with self._lock:
+            if not replace and self._live(key, now_ms) is not None:
+                return False
+            self._entries[key] = (entry, now_ms + _ttl_ms(entry, now_ms))
+            return True
+
+    def check(self, phone_number, purpose, candidate, max_attempts, now_ms) -> OTPCheck:
+        with self._lock:
+            entry = self._live(otp_key(phone_number, purpose), now_ms)
+            if entry is None:
+                return OTPCheck(MISS)
+            return _check_entry(entry, candidate, max_attempts, now_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisOTPStore:
+    PUT_SCRIPT = """
+if ARGV[7] == '0' and redis.call('EXISTS', KEYS[1]) == 1 then
+  return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'id', ARGV[1], 'user', ARGV[2], 'hash', ARGV[3],
+  'exp', ARGV[4], 'attempts', ARGV[5])
+redis.call('PEXPIRE', KEYS[1], ARGV[6])
+return 1
+"""
+
+    # ``same`` compares every byte, so the time taken does not depend on how
+    # much of the hash matches.
+    CHECK_SCRIPT = """
+local function same(a, b)
+  if #a ~= #b then
+    return false
+  end
+  local diff = 0
+  for i = 1, #a do
+    if string.byte(a, i) ~= string.byte(b, i) then
+      diff = diff + 1
+    end
+  end
+  return diff == 0
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return {'MISS', 0, 0, 0, 0}
+end
+local now = tonumber(ARGV[1])
+local candidate = ARGV[2]
+local max_attempts = tonumber(ARGV[3])
+local entry = redis.call('HMGET', KEYS[1], 'id', 'user', 'hash', 'exp', 'attempts', 'final')
+local final = entry[6]
+if final == 'VERIFIED' then
+  return {'CONSUMED', entry[1], entry[2], entry[5], 0}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+local outcome
+if attempts > max_attempts then
+  outcome = 'LOCKED'
+elseif tonumber(entry[4]) <= now then
+  outcome = 'EXPIRED'
+elseif same(entry[3], candidate) and not final then
+  outcome = 'VERIFIED'
+else
+  return {final or 'INVALID', entry[1], entry[2], attempts, 0}
+end
+if final then
+  return {final, entry[1], entry[2], attempts, 0}
+end
+redis.call('HSET', KEYS[1], 'final', outcome)
+return {outcome, entry[1], entry[2], attempts, 1}
+"""
+
+    def __init__(self, client: redis.Redis) -> None:
+        self._client = client
+        self._put = client.register_script(self.PUT_SCRIPT)
+        self._check = client.register_script(self.CHECK_SCRIPT)
+
+    def put(self, otp, now_ms: int, replace: bool = True) -> bool:
+        entry = _entry_for(otp)
+        args = [
+            entry["id"],
+            entry["user"],
+            entry["hash"],
+            entry["exp"],
+            entry["attempts"],
+            _ttl_ms(entry, now_ms),
+            1 if replace else 0,
+        ]
+        return bool(self._put(keys=[otp_key(otp.phone_number, otp.purpose)], args=args))
+
+    def check(self, phone_number, purpose, candidate, max_attempts, now_ms) -> OTPCheck:
+        reply = self._check(
+            keys=[otp_key(phone_number, purpose)], args=[now_ms, candidate, max_attempts]
+        )
+        outcome = reply[0].decode() if isinstance(reply[0], bytes) else reply[0]
+        if outcome == MISS:
+            return OTPCheck(MISS)
+        return OTPCheck(
+            outcome,
+            otp_id=int(reply[1]),
+            user_id=int(reply[2]) or None,
+            attempts=int(reply[3]),
+            first_terminal=bool(int(reply[4])),
+        )
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter(match=f"{KEY_PREFIX}:*"):
+            self._client.delete(key)
+
+
+_memory_store = MemoryOTPStore()
+
+
+@lru_cache(maxsize=None)
+def _redis_store(client: redis.Redis) -> RedisOTPStore:
+    return RedisOTPStore(client)
+
+
+def get_store():
+    client = get_redis()
+    if client is None:
+        return _memory_store
+    return _redis_store(client)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def put(otp) -> None:
+    """Make ``otp`` the pending code for its phone number and purpose."""
+    get_store().put(otp, _now_ms())
+
+
+def prime(otp) -> None:
+    """Load a database row into the store unless a fresher entry already exists."""
+    get_store().put(otp, _now_ms(), replace=False)
+
+
+def check(phone_number: str, purpose: str, candidate_hash: str, max_attempts: int) -> OTPCheck:
+    return get_store().check(phone_number, purpose, candidate_hash, max_attempts, _now_ms())
+
+
+def reset() -> None:
+    get_store().reset()
@@ -0,0 +1,345 @@
+"""Optional monthly range partitioning of ``OTPRequest`` on Postgres.
+
+``convert()`` builds a partitioned copy of the table (primary key
+``(id, created_at)``, same indexes and foreign keys), backfills the rows still
+inside the retention window in small batches, then swaps the names under a
+short exclusive lock. A trigger records the ids of rows updated or deleted
+while the backfill runs, and those rows are copied again under the lock, so
+no write made during the backfill is lost. The old table is left as
+``<table>_legacy`` for the operator to drop.
+
+``maintain()`` keeps partitions created a few months ahead and detaches
+partitions that fall entirely outside the retention window, which removes a
+month of rows without a bulk ``DELETE`` and keeps hot indexes small. A DEFAULT
+partition catches rows beyond the last monthly partition, so OTP inserts keep
+working if maintenance lapses. The next ``maintain()`` moves those rows into
+their month's partition.
+"""
+
+import logging
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+
+from .models import OTPRequest
+from .retention import retention_cutoff
+
+logger = logging.getLogger(__name__)
+
+TABLE = OTPRequest._meta.db_table
+STAGING = f"{TABLE}_p"
+LEGACY = f"{TABLE}_legacy"
+SEQUENCE = f"{TABLE}_id_seq"
+DEFAULT_PARTITION = f"{TABLE}_default"
+# Ids of rows updated or deleted during the backfill, filled by CHANGE_TRIGGER.
+CHANGES = f"{TABLE}_p_changes"
+CHANGE_TRIGGER = f"{TABLE}_p_track"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+_INDEX_DEF = re.compile(r"^CREATE (UNIQUE )?INDEX (\S+) ON (?:ONLY )?\S+ ")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month:%Y}m{month:%m}"
+
+
+def partition_month(name: str):
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def months_between(first: date, last: date) -> list[date]:
+    months, current = [], month_start(first)
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def _bound(month: date) -> str:
+    return f"'{datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()}'"
+
+
+def _require_postgres() -> None:
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("OTP partitioning requires PostgreSQL.")
+
+
+def _qn(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _temp_name(name: str, suffix: str) -> str:
+    return f"{name[: 63 - len(suffix)]}{suffix}"
+
+
+def is_partitioned(table: str = TABLE) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table: str = TABLE) -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid) "
+            "ORDER BY child.relname",
+            [table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _create_partition(cursor, table: str, month: date) -> None:
+    name, lower, upper = partition_name(month), _bound(month), _bound(add_months(month, 1))
+    bounds = f"FOR VALUES FROM ({lower}) TO ({upper})"
+    in_range = f"created_at >= {lower} AND created_at < {upper}"
+    # Blocks inserts that would land in the default partition meanwhile.
+    cursor.execute(f"LOCK TABLE {_qn(DEFAULT_PARTITION)} IN EXCLUSIVE MODE")
+    cursor.execute(f"SELECT count(*) FROM {_qn(DEFAULT_PARTITION)} WHERE {in_range}")
+    stray = cursor.fetchone()[0]
+    if not stray:
+        cursor.execute(f"CREATE TABLE {_qn(name)} PARTITION OF {_qn(table)} {bounds}")
+        return
+    # Maintenance lapsed: the month's rows went to the default partition and
+    # must move out before the month can have a partition of its own.
+    logger.warning("Moving %s OTP row(s) from %s into %s", stray, DEFAULT_PARTITION, name)
+    cursor.execute(
+        f"CREATE TABLE {_qn(name)} (LIKE {_qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {_qn(DEFAULT_PARTITION)} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {_qn(name)} SELECT * FROM moved"
+    )
+    cursor.execute(f"ALTER TABLE {_qn(table)} ATTACH PARTITION {_qn(name)} {bounds}")
+
+
+def ensure_partitions(months: list[date], table: str = TABLE) -> list[str]:
+    created = []
+    existing = set(list_partitions(table))
+    with connection.cursor() as cursor:
+        if DEFAULT_PARTITION not in existing:
+            cursor.execute(
+                f"CREATE TABLE {_qn(DEFAULT_PARTITION)} PARTITION OF {_qn(table)} DEFAULT"
+            )
+            created.append(DEFAULT_PARTITION)
+        for month in months:
+            if partition_name(month) in existing:
+                continue
+            with transaction.atomic():
+                _create_partition(cursor, table, month)
+            created.append(partition_name(month))
+    return created
+
+
+def detach_expired(cutoff: datetime, drop: bool = True) -> list[str]:
+    """Detach (and drop) partitions whose whole month is older than ``cutoff``."""
+    detached = []
+    with connection.cursor() as cursor:
+        for name in list_partitions():
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff.date():
+                continue
+            cursor.execute(f"ALTER TABLE {_qn(TABLE)} DETACH PARTITION {_qn(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {_qn(name)}")
+            detached.append(name)
+    return detached
+
+
+def maintain(months_ahead: int = 2, days=None, drop: bool = True) -> tuple[list, list]:
+    _require_postgres()
+    if not is_partitioned():
+        raise NotSupportedError(f"{TABLE} is not partitioned; run the conversion first.")
+    today = month_start(timezone.now())
+    created = ensure_partitions(months_between(today, add_months(today, months_ahead)))
+    detached = detach_expired(retention_cutoff(days), drop=drop)
+    return created, detached
+
+
+def _copy_schema(cursor) -> list[tuple[str, str, str]]:
+    """Create ``STAGING`` with the live table's columns, indexes and FKs.
+
+    Returns ``(kind, live_name, staging_name)`` renames to apply at swap time.
+    """
+    renames = []
+    cursor.execute(
+        f"CREATE TABLE {_qn(STAGING)} (LIKE {_qn(TABLE)} INCLUDING DEFAULTS "
+        f"INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (created_at)"
+    )
+    cursor.execute(f"CREATE SEQUENCE {_qn(_temp_name(SEQUENCE, '_p'))}")
+    cursor.execute(
+        f"ALTER TABLE {_qn(STAGING)} ALTER COLUMN id "
+        f"SET DEFAULT nextval('{_temp_name(SEQUENCE, '_p')}')"
+    )
+    cursor.execute(
+        f"ALTER SEQUENCE {_qn(_temp_name(SEQUENCE, '_p'))} OWNED BY {_qn(STAGING)}.id"
+    )
+    renames.append(("sequence", SEQUENCE, _temp_name(SEQUENCE, "_p")))
+
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+        [TABLE],
+    )
+    primary_key = cursor.fetchone()[0]
+    staging_pk = _temp_name(primary_key, "_p")
+    cursor.execute(
+        f"ALTER TABLE {_qn(STAGING)} ADD CONSTRAINT {_qn(staging_pk)} "
+        f"PRIMARY KEY (id, created_at)"
+    )
+    renames.append(("constraint", primary_key, staging_pk))
+
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index ix "
+        "JOIN pg_class i ON i.oid = ix.indexrelid "
+        "WHERE ix.indrelid = %s::regclass AND NOT ix.indisprimary",
+        [TABLE],
+    )
+    for name, definition in cursor.fetchall():
+        match = _INDEX_DEF.match(definition)
+        if match is None or match.group(1):
+            raise NotSupportedError(f"Cannot partition {TABLE} with index {name}.")
+        staging_name = _temp_name(name, "_p")
+        cursor.execute(
+            _INDEX_DEF.sub(f"CREATE INDEX {_qn(staging_name)} ON {_qn(STAGING)} ", definition)
+        )
+        renames.append(("index", name, staging_name))
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE],
+    )
+    for name, definition in cursor.fetchall():
+        staging_name = _temp_name(name, "_p")
+        cursor.execute(
+            f"ALTER TABLE {_qn(STAGING)} ADD CONSTRAINT {_qn(staging_name)} {definition}"
+        )
+        renames.append(("constraint", name, staging_name))
+    return renames
+
+
+def _track_changes(cursor) -> None:
+    """Record the id of every row of ``TABLE`` updated or deleted from now on."""
+    cursor.execute(f"CREATE TABLE {_qn(CHANGES)} (id bigint NOT NULL)")
+    cursor.execute(
+        f"CREATE FUNCTION {_qn(CHANGE_TRIGGER)}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        f"BEGIN INSERT INTO {_qn(CHANGES)} (id) VALUES (OLD.id); RETURN NULL; END $$"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {_qn(CHANGE_TRIGGER)} AFTER UPDATE OR DELETE ON {_qn(TABLE)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {_qn(CHANGE_TRIGGER)}()"
+    )
+
+
+def _stop_tracking(cursor) -> None:
+    cursor.execute(f"DROP TRIGGER {_qn(CHANGE_TRIGGER)} ON {_qn(TABLE)}")
+    cursor.execute(f"DROP FUNCTION {_qn(CHANGE_TRIGGER)}()")
+    cursor.execute(f"DROP TABLE {_qn(CHANGES)}")
+
+
+def _rename(cursor, kind: str, table: str, old: str, new: str) -> None:
+    if kind == "constraint":
+        cursor.execute(f"ALTER TABLE {_qn(table)} RENAME CONSTRAINT {_qn(old)} TO {_qn(new)}")
+    elif kind == "index":
+        cursor.execute(f"ALTER INDEX {_qn(old)} RENAME TO {_qn(new)}")
+    else:
+        cursor.execute(f"ALTER SEQUENCE {_qn(old)} RENAME TO {_qn(new)}")
+
+
+def convert(batch_size: int = 5000, days=None, months_ahead: int = 2) -> int:
+    """Swap ``OTPRequest`` onto a monthly partitioned table. Returns rows copied."""
+    _require_postgres()
+    if is_partitioned():
+        return 0
+    if connection.in_atomic_block:
+        raise NotSupportedError("Run the conversion outside a transaction.")
+    with connection.cursor() as cursor:
+        for leftover in (STAGING, CHANGES):
+            cursor.execute("SELECT to_regclass(%s)", [leftover])
+            if cursor.fetchone()[0] is not None:
+                raise NotSupportedError(
+                    f"{leftover} exists from an earlier attempt; drop it first "
+                    f"(and the {CHANGE_TRIGGER} trigger and function on {TABLE})."
+                )
+
+    cutoff = retention_cutoff(days)
+    columns = ", ".join(_qn(field.column) for field in OTPRequest._meta.concrete_fields)
+    with transaction.atomic(), connection.cursor() as cursor:
+        renames = _copy_schema(cursor)
+        today = month_start(timezone.now())
+        ensure_partitions(
+            months_between(month_start(cutoff), add_months(today, months_ahead)), table=STAGING
+        )
+        # Before the high-water mark is read, so every change to a row the
+        # backfill copies is recorded.
+        _track_changes(cursor)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {_qn(TABLE)}")
+        high_water = cursor.fetchone()[0]
+
+    copied, low = 0, 0
+    while low < high_water:
+        high = low + batch_size
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {_qn(STAGING)} ({columns}) SELECT {columns} FROM {_qn(TABLE)} "
+                f"WHERE id > %s AND id <= %s AND created_at >= %s",
+                [low, high, cutoff],
+            )
+            copied += cursor.rowcount
+        low = high
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {_qn(TABLE)} IN ACCESS EXCLUSIVE MODE")
+        # Rows the backfill copied that were updated or deleted afterwards.
+        changed = f"SELECT id FROM {_qn(CHANGES)}"
+        cursor.execute(f"DELETE FROM {_qn(STAGING)} WHERE id IN ({changed})")
+        cursor.execute(
+            f"INSERT INTO {_qn(STAGING)} ({columns}) SELECT {columns} FROM {_qn(TABLE)} "
+            f"WHERE id IN ({changed}) AND id <= %s AND created_at >= %s",
+            [high_water, cutoff],
+        )
+        _stop_tracking(cursor)
+        cursor.execute(
+            f"INSERT INTO {_qn(STAGING)} ({columns}) SELECT {columns} FROM {_qn(TABLE)} "
+            f"WHERE id > %s",
+            [high_water],
+        )
+        copied += cursor.rowcount
+        cursor.execute(
+            f"SELECT setval('{_temp_name(SEQUENCE, '_p')}', "
+            f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {_qn(TABLE)}), false)"
+        )
+
+        cursor.execute(f"ALTER TABLE {_qn(TABLE)} RENAME TO {_qn(LEGACY)}")
+        for kind, live_name, _staging_name in renames:
+            if kind == "sequence":
+                # Identity sequences follow their table; a serial one may not exist.
+                cursor.execute("SELECT to_regclass(%s)", [live_name])
+                if cursor.fetchone()[0] is None:
+                    continue
+            _rename(cursor, kind, LEGACY, live_name, _temp_name(live_name, "_legacy"))
+        cursor.execute(f"ALTER TABLE {_qn(STAGING)} RENAME TO {_qn(TABLE)}")
+        for kind, live_name, staging_name in renames:
+            _rename(cursor, kind, TABLE, staging_name, live_name)
+    return copied
@@ -0,0 +1,42 @@
+import re
+
+from django.conf import settings
+
+# Persian (U+06F0..) and Arabic-Indic (U+0660..) digits typed on local keyboards.
+_DIGIT_MAP = str.maketrans(
+    "۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩",
+    "01234567890123456789",
+)
+_NON_DIGITS = re.compile(r"\D")
+
+
+class InvalidPhoneNumber(ValueError):
+    pass
+
+
+def normalize_phone_number(value: str, country_code: str | None = None) -> str:
+    """Return ``value`` in E.164 form, e.g. ``0912 345 6789`` -> ``+989123456789``.
+
+    Only numbers in national format get ``PHONE_DEFAULT_COUNTRY_CODE``: those
+    with a trunk ``0`` and ten-digit mobile numbers starting with ``9``. Any
+    other number without ``+`` or ``00`` is taken to start with its own
+    country code.
+    """
+    country_code = country_code or getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", "98")
+    raw = (value or "").translate(_DIGIT_MAP).strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        raise InvalidPhoneNumber("Phone number is required.")
+
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = country_code + digits[1:]
+    elif len(digits) == 10 and digits.startswith("9"):
+        digits = country_code + digits
+
+    if not 8 <= len(digits) <= 15:
+        raise InvalidPhoneNumber("Enter a valid phone number.")
+    return f"+{digits}"
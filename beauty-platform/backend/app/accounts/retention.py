@@ -0,0 +1,65 @@
+"""Retention for ``OTPRequest`` rows.
+
+Rows are only needed while a code can still be verified or delivered, plus a
+window for abuse investigations (``OTP_RETENTION_DAYS``). Older rows are
+deleted in small committed batches, optionally appended to an NDJSON archive
+first. Postgres deployments that partition the table by month (see
+``accounts.partitioning``) can drop whole partitions instead.
+"""
+
+import json
+from datetime import timedelta
+from typing import Optional, TextIO
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from beauty_platform.batching import delete_in_batches
+
+from .models import OTPRequest
+
+# Secrets never leave the table, even into archives.
+ARCHIVE_FIELDS = (
+    "id",
+    "user_id",
+    "phone_number",
+    "purpose",
+    "ip_address",
+    "sent_count",
+    "attempt_count",
+    "created_at",
+    "expires_at",
+    "is_verified",
+    "delivery_status",
+    "delivery_attempts",
+    "delivery_error",
+    "delivered_at",
+)
+
+
+def retention_cutoff(days: Optional[int] = None):
+    if days is None:
+        days = getattr(settings, "OTP_RETENTION_DAYS", 30)
+    return timezone.now() - timedelta(days=days)
+
+
+def purge_otps(
+    days: Optional[int] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    archive: Optional[TextIO] = None,
+) -> int:
+    cutoff = retention_cutoff(days)
+    queryset = OTPRequest.objects.filter(created_at__lt=cutoff, expires_at__lt=cutoff)
+
+    def _archive(ids: list) -> None:
+        for row in OTPRequest.objects.filter(pk__in=ids).values(*ARCHIVE_FIELDS):
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+    return delete_in_batches(
+        queryset,
+        batch_size=batch_size,
+        pause=pause,
+        before_delete=_archive if archive is not None else None,
+    )
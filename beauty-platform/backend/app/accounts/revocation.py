@@ -0,0 +1,217 @@
+"""Revoked refresh token lookups that stay off the database.
+
+``BlacklistedToken`` rows remain the durable record, but membership checks go
+to a shared store: each revoked ``jti`` is kept under its own key until the
+token would have expired anyway, behind a Bloom filter bucketed by expiry
+hour. Almost every checked token is not revoked, and those are answered from
+the filter bits without touching the exact keys. An empty store (first boot,
+Redis flush) is reloaded from the database before it answers. Only the request
+that takes the reload lock does the reload; concurrent requests check
+``BlacklistedToken`` directly until it finishes. Without ``REDIS_URL`` the
+checks fall back to ``BlacklistedToken`` lookups.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import redis
+from django.utils import timezone
+
+from beauty_platform.batching import delete_in_batches
+from beauty_platform.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "revoked"
+LOADED_KEY = f"{KEY_PREFIX}:loaded"
+RELOAD_LOCK_KEY = f"{KEY_PREFIX}:reloading"
+# Outlives any reasonable reload; a crashed reloader only blocks others this long.
+RELOAD_LOCK_SECONDS = 300
+BUCKET_SECONDS = 3600
+# The store is rebuilt from the database at least this often, which bounds how
+# long a revocation whose Redis write failed can go unnoticed.
+RELOAD_SECONDS = 3600
+BLOOM_BITS = 1 << 17
+BLOOM_HASHES = 7
+
+
+def _positions(jti: str) -> list[int]:
+    digest = hashlib.blake2b(jti.encode("utf-8"), digest_size=BLOOM_HASHES * 4).digest()
+    return [
+        int.from_bytes(digest[i * 4 : (i + 1) * 4], "big") % BLOOM_BITS
+        for i in range(BLOOM_HASHES)
+    ]
+
+
+def _bucket(exp: int) -> int:
+    return exp // BUCKET_SECONDS
+
+
+def _bloom_key(exp: int) -> str:
+    return f"{KEY_PREFIX}:bloom:{_bucket(exp)}"
+
+
+def _jti_key(jti: str) -> str:
+    return f"{KEY_PREFIX}:jti:{jti}"
+
+
+class RedisRevocationStore:
+    REVOKE_SCRIPT = """
+for i = 3, #ARGV do
+  redis.call('SETBIT', KEYS[1], tonumber(ARGV[i]), 1)
+end
+redis.call('EXPIREAT', KEYS[1], tonumber(ARGV[1]))
+redis.call('SET', KEYS[2], '1', 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+    CHECK_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+  return -1
+end
+for i = 1, #ARGV do
+  if redis.call('GETBIT', KEYS[1], tonumber(ARGV[i])) == 0 then
+    return 0
+  end
+end
+return redis.call('EXISTS', KEYS[2])
+"""
+
+    def __init__(self, client: redis.Redis) -> None:
+        self._client = client
+        self._revoke = client.register_script(self.REVOKE_SCRIPT)
+        self._check = client.register_script(self.CHECK_SCRIPT)
+
+    def revoke(self, jti: str, exp: int, now: int) -> None:
+        if exp <= now:
+            return
+        bucket_end = (_bucket(exp) + 1) * BUCKET_SECONDS
+        self._revoke(
+            keys=[_bloom_key(exp), _jti_key(jti)],
+            args=[bucket_end, exp - now, *_positions(jti)],
+        )
+
+    def is_revoked(self, jti: str, exp: int, now: int) -> bool | None:
+        reply = int(
+            self._check(keys=[_bloom_key(exp), _jti_key(jti), LOADED_KEY], args=_positions(jti))
+        )
+        return None if reply < 0 else bool(reply)
+
+    def mark_loaded(self) -> None:
+        self._client.set(LOADED_KEY, "1", ex=RELOAD_SECONDS)
+
+    def mark_stale(self) -> None:
+        self._client.delete(LOADED_KEY)
+
+    def acquire_reload(self) -> bool:
+        return bool(self._client.set(RELOAD_LOCK_KEY, "1", nx=True, ex=RELOAD_LOCK_SECONDS))
+
+    def release_reload(self) -> None:
+        self._client.delete(RELOAD_LOCK_KEY)
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter(match=f"{KEY_PREFIX}:*"):
+            self._client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def _redis_store(client: redis.Redis) -> RedisRevocationStore:
+    return RedisRevocationStore(client)
+
+
+def get_store() -> RedisRevocationStore | None:
+    # A per-process store could not see revocations made by other workers, so
+    # without Redis every check goes to the database as before.
+    client = get_redis()
+    if client is None:
+        return None
+    return _redis_store(client)
+
+
+def _load_from_database(store) -> None:
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    now = int(time.time())
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=2000)
+    )
+    for jti, expires_at in rows:
+        store.revoke(jti, int(expires_at.timestamp()), now)
+    store.mark_loaded()
+
+
+def _in_database(jti: str) -> bool:
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def revoke(jti: str, expires_at: datetime) -> None:
+    store = get_store()
+    if store is None:
+        return
+    try:
+        store.revoke(jti, int(expires_at.timestamp()), int(time.time()))
+    except redis.RedisError:
+        # The database row written by the caller is still authoritative and
+        # will be picked up by the next reload.
+        logger.exception("Could not record revoked token jti=%s", jti)
+        try:
+            store.mark_stale()
+        except redis.RedisError:
+            pass
+
+
+def is_revoked(jti: str, expires_at: datetime) -> bool:
+    store = get_store()
+    if store is None:
+        return _in_database(jti)
+    exp = int(expires_at.timestamp())
+    try:
+        revoked = store.is_revoked(jti, exp, int(time.time()))
+        if revoked is None:
+            if not store.acquire_reload():
+                return _in_database(jti)
+            try:
+                _load_from_database(store)
+            finally:
+                store.release_reload()
+            revoked = store.is_revoked(jti, exp, int(time.time()))
+    except redis.RedisError:
+        logger.exception("Revocation store unavailable, checking the database")
+        return _in_database(jti)
+    return bool(revoked)
+
+
+def prune_expired(batch_size: int = 1000, pause: float = 0.0) -> tuple[int, int]:
+    """Delete expired blacklist rows a chunk at a time.
+
+    Each chunk commits on its own, so neither table is locked for the duration
+    of a full sweep. Returns ``(blacklisted, outstanding)`` counts.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import (
+        BlacklistedToken,
+        OutstandingToken,
+    )
+
+    now = timezone.now()
+    blacklisted = delete_in_batches(
+        BlacklistedToken.objects.filter(token__expires_at__lte=now), batch_size, pause
+    )
+    outstanding = delete_in_batches(
+        OutstandingToken.objects.filter(expires_at__lte=now), batch_size, pause
+    )
+    return blacklisted, outstanding
+
+
+def reset() -> None:
+    store = get_store()
+    if store is not None:
+        store.reset()
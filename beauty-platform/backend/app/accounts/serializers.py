@@ -1,7 +1,13 @@
+from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import OTPRequest
+from .phone import InvalidPhoneNumber, normalize_phone_number
+from .tokens import ClinicRefreshToken, apply_claims
 
 
 class RequestOTPSerializer(serializers.Serializer):
@@ -9,10 +15,10 @@ class RequestOTPSerializer(serializers.Serializer):
     purpose = serializers.ChoiceField(choices=OTPRequest.Purpose.choices)
 
     def validate_phone_number(self, value: str) -> str:
-        normalized = value.strip()
-        if not normalized:
-            raise serializers.ValidationError("Phone number is required.")
-        return normalized
+        try:
+            return normalize_phone_number(value)
+        except InvalidPhoneNumber as exc:
+            raise serializers.ValidationError(str(exc)) from exc
 
 
 class VerifyOTPSerializer(serializers.Serializer):
@@ -21,11 +27,42 @@ class VerifyOTPSerializer(serializers.Serializer):
     purpose = serializers.ChoiceField(choices=OTPRequest.Purpose.choices)
 
     def validate(self, attrs):
-        attrs["phone_number"] = attrs.get("phone_number", "").strip()
-        if not attrs["phone_number"]:
-            raise serializers.ValidationError({"phone_number": "Phone number is required."})
+        try:
+            attrs["phone_number"] = normalize_phone_number(attrs.get("phone_number", ""))
+        except InvalidPhoneNumber as exc:
+            raise serializers.ValidationError({"phone_number": str(exc)}) from exc
         return attrs
 
     @staticmethod
     def is_expired(otp: OTPRequest) -> bool:
         return otp.expires_at <= timezone.now()
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that re-reads the user so new tokens carry current claims."""
+
+    token_class = ClinicRefreshToken
+
+    def validate(self, attrs):
+        try:
+            refresh = self.token_class(attrs["refresh"])
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0]) from exc
+        user = (
+            get_user_model()
+            .objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True)
+            .first()
+        )
+        if user is None:
+            raise InvalidToken("User not found or inactive.")
+        apply_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .directory import invalidate_phones
+from .models import User
+from .tokens import publish_token_version
+
+
+@receiver(post_save, sender=User)
+def _refresh_user_caches(sender, instance: User, **kwargs):
+    previous = getattr(instance, "_loaded_values", {}).get("phone_number")
+    invalidate_phones([instance.phone_number, previous])
+    publish_token_version(instance.pk, instance.token_version if instance.is_active else None)
+
+
+@receiver(post_delete, sender=User)
+def _forget_user_caches(sender, instance: User, **kwargs):
+    invalidate_phones([instance.phone_number])
+    publish_token_version(instance.pk, None)
@@ -0,0 +1,176 @@
+import hashlib
+import hmac
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from kavenegar import APIException, HTTPException, KavenegarAPI
+
+CODE_MODULUS = 1_000_000
+
+
+class SMSDeliveryError(Exception):
+    """Raised by providers when a message could not be handed off."""
+
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SMSProvider:
+    """Interface for outbound SMS gateways used by the dispatch workers."""
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int | None = None) -> None:
+        self.max_concurrency = max_concurrency or getattr(
+            settings, "SMS_PROVIDER_MAX_CONCURRENCY", 4
+        )
+
+    def send_otp(self, phone_number: str, code: str, purpose: str) -> None:
+        raise NotImplementedError
+
+    def send_reminder(self, phone_number: str, name: str, local_time: datetime) -> None:
+        """Remind ``name`` of an appointment at ``local_time`` (clinic time)."""
+        raise NotImplementedError
+
+
+class KavenegarProvider(SMSProvider):
+    name = "kavenegar"
+
+    def __init__(self, max_concurrency: int | None = None) -> None:
+        super().__init__(max_concurrency)
+        self._api: KavenegarAPI | None = None
+
+    def _get_api(self) -> KavenegarAPI:
+        api_key = getattr(settings, "KAVENEGAR_API_KEY", None)
+        if not api_key:
+            raise SMSDeliveryError("Kavenegar API key is not configured", retryable=False)
+        if self._api is None:
+            self._api = KavenegarAPI(api_key)
+        return self._api
+
+    def _template_for(self, purpose: str) -> str:
+        from .models import OTPRequest
+
+        template_map = {
+            OTPRequest.Purpose.LOGIN: getattr(settings, "KAVENEGAR_LOGIN_TEMPLATE", None),
+            OTPRequest.Purpose.RECOVERY: getattr(settings, "KAVENEGAR_RECOVERY_TEMPLATE", None),
+        }
+        template = template_map.get(purpose)
+        if not template:
+            raise SMSDeliveryError(
+                "Kavenegar template is not configured for the requested purpose",
+                retryable=False,
+            )
+        return template
+
+    def send_otp(self, phone_number: str, code: str, purpose: str) -> None:
+        template = self._template_for(purpose)
+        try:
+            self._get_api().verify_lookup(
+                {"receptor": phone_number, "token": code, "template": template}
+            )
+        except (APIException, HTTPException) as exc:  # pragma: no cover - network dependent
+            raise SMSDeliveryError(f"Failed to send OTP via Kavenegar: {exc}") from exc
+
+    def send_reminder(self, phone_number: str, name: str, local_time: datetime) -> None:
+        template = getattr(settings, "KAVENEGAR_REMINDER_TEMPLATE", None)
+        if not template:
+            raise SMSDeliveryError(
+                "Kavenegar template is not configured for reminders", retryable=False
+            )
+        try:
+            self._get_api().verify_lookup(
+                {
+                    "receptor": phone_number,
+                    "token": local_time.strftime("%Y-%m-%d"),
+                    "token2": local_time.strftime("%H:%M"),
+                    # token10 is the only short token allowed to contain spaces.
+                    "token10": name,
+                    "template": template,
+                }
+            )
+        except (APIException, HTTPException) as exc:  # pragma: no cover - network dependent
+            raise SMSDeliveryError(f"Failed to send reminder via Kavenegar: {exc}") from exc
+
+
+class FakeSMSProvider(SMSProvider):
+    """In-memory gateway with optional latency and failure injection."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+    ) -> None:
+        super().__init__(max_concurrency)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.outbox: list[dict] = []
+        self.reminders: list[dict] = []
+        self._lock = threading.Lock()
+
+    def send_otp(self, phone_number: str, code: str, purpose: str) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise SMSDeliveryError("Injected fake provider failure")
+        with self._lock:
+            self.outbox.append({"receptor": phone_number, "token": code, "purpose": purpose})
+
+    def send_reminder(self, phone_number: str, name: str, local_time: datetime) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise SMSDeliveryError("Injected fake provider failure")
+        with self._lock:
+            self.reminders.append(
+                {"receptor": phone_number, "name": name, "local_time": local_time}
+            )
+
+    def last_code_for(self, phone_number: str) -> str | None:
+        with self._lock:
+            for message in reversed(self.outbox):
+                if message["receptor"] == phone_number:
+                    return message["token"]
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self.outbox.clear()
+            self.reminders.clear()
+
+
+@lru_cache(maxsize=None)
+def _load_provider(path: str) -> SMSProvider:
+    return import_string(path)()
+
+
+def get_sms_provider() -> SMSProvider:
+    return _load_provider(getattr(settings, "SMS_PROVIDER", "accounts.sms.KavenegarProvider"))
+
+
+def _code_pad(nonce: str) -> int:
+    secret = settings.SECRET_KEY.encode("utf-8")
+    digest = hmac.new(secret, f"otp-seal|{nonce}".encode("utf-8"), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], "big") % CODE_MODULUS
+
+
+def seal_code(code: str) -> str:
+    """Mask a numeric OTP so the queued row never stores it in clear text."""
+    nonce = secrets.token_hex(8)
+    masked = (int(code) + _code_pad(nonce)) % CODE_MODULUS
+    return f"{nonce}:{masked:06d}"
+
+
+def unseal_code(sealed: str) -> str:
+    nonce, masked = sealed.split(":", 1)
+    return f"{(int(masked) - _code_pad(nonce)) % CODE_MODULUS:06d}"
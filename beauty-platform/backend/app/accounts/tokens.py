@@ -0,0 +1,104 @@
+"""JWT issuance with the claims needed to authorize requests statelessly.
+
+Access and refresh tokens carry ``role``, ``clinic_id`` and ``ver``. ``ver``
+mirrors ``User.token_version``, which is bumped whenever the role, clinic or
+active flag changes; authentication compares it against a cached copy so
+stale claims are rejected without loading the user row.
+
+Refresh tokens are not recorded when issued; only revoked ones are written to
+the blacklist tables, and membership is checked through ``accounts.revocation``.
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import revocation
+
+ROLE_CLAIM = "role"
+CLINIC_CLAIM = "clinic_id"
+VERSION_CLAIM = "ver"
+
+_INACTIVE = -1
+
+
+def _version_key(user_id) -> str:
+    return f"token-version:{user_id}"
+
+
+def _version_ttl() -> int:
+    return int(settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()) * 4
+
+
+def apply_claims(token, user) -> None:
+    token[ROLE_CLAIM] = user.role
+    token[CLINIC_CLAIM] = user.clinic_id
+    token[VERSION_CLAIM] = user.token_version
+
+
+class ClinicRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user: an OutstandingToken row per login is
+        # what made the blacklist tables grow without bound.
+        token = super(BlacklistMixin, cls).for_user(user)
+        apply_claims(token, user)
+        return token
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if revocation.is_revoked(jti, datetime_from_epoch(self.payload["exp"])):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        user_id = (
+            get_user_model()
+            .objects.filter(pk=self.payload.get(api_settings.USER_ID_CLAIM))
+            .values_list("pk", flat=True)
+            .first()
+        )
+        outstanding, _created = OutstandingToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                "user_id": user_id,
+                "token": str(self),
+                "expires_at": expires_at,
+            },
+        )
+        blacklisted = BlacklistedToken.objects.get_or_create(token=outstanding)
+        revocation.revoke(jti, expires_at)
+        return blacklisted
+
+
+def current_token_version(user_id) -> Optional[int]:
+    """Return the live token version, or ``None`` for missing/inactive users."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            get_user_model()
+            .objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        version = _INACTIVE if version is None else version
+        cache.set(key, version, _version_ttl())
+    return None if version == _INACTIVE else version
+
+
+def publish_token_version(user_id, version: Optional[int]) -> None:
+    key = _version_key(user_id)
+    value = _INACTIVE if version is None else version
+    cache.set(key, value, _version_ttl())
+    transaction.on_commit(lambda: cache.set(key, value, _version_ttl()))
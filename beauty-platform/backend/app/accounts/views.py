@@ -7,18 +7,25 @@ from typing import Optional
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.utils import timezone
-from kavenegar import APIException, HTTPException, KavenegarAPI
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from beauty_platform import ratelimit
+from beauty_platform.ratelimit import Rate, rate_key
+
+from . import otp_store
+from .directory import lookup_phone
 from .models import OTPRequest
-from .serializers import RequestOTPSerializer, VerifyOTPSerializer
+from .serializers import (
+    ClaimsTokenRefreshSerializer,
+    RequestOTPSerializer,
+    VerifyOTPSerializer,
+)
+from .sms import seal_code
+from .tokens import ClinicRefreshToken
 
 User = get_user_model()
 
@@ -50,26 +57,12 @@ def _mask_phone(phone_number: str) -> str:
     return f"***{phone_number[-4:]}"
 
 
-def _send_kavenegar_otp(phone_number: str, code: str, purpose: str) -> None:
-    api_key = getattr(settings, "KAVENEGAR_API_KEY", None)
-    if not api_key:
-        raise ValueError("Kavenegar API key is not configured")
-
-    template_map = {
-        OTPRequest.Purpose.LOGIN: getattr(settings, "KAVENEGAR_LOGIN_TEMPLATE", None),
-        OTPRequest.Purpose.RECOVERY: getattr(settings, "KAVENEGAR_RECOVERY_TEMPLATE", None),
-    }
-    template = template_map.get(purpose)
-    if not template:
-        raise ValueError("Kavenegar template is not configured for the requested purpose")
-
-    api = KavenegarAPI(api_key)
-    try:
-        api.verify_lookup(
-            {"receptor": phone_number, "token": code, "template": template}
-        )
-    except (APIException, HTTPException) as exc:  # pragma: no cover - network dependent
-        raise ValueError(f"Failed to send OTP via Kavenegar: {exc}") from exc
+def _otp_request_rates(phone_number: str, client_ip: Optional[str]) -> list[Rate]:
+    window = OTP_RATE_WINDOW_MINUTES * 60
+    rates = [Rate(rate_key("otp-request", "phone", phone_number), OTP_RATE_LIMIT, window)]
+    if client_ip:
+        rates.append(Rate(rate_key("otp-request", "ip", client_ip), OTP_RATE_LIMIT, window))
+    return rates
 
 
 class RequestOTPView(APIView):
@@ -83,18 +76,9 @@ class RequestOTPView(APIView):
         purpose = serializer.validated_data["purpose"]
         client_ip = _get_client_ip(request)
         now = timezone.now()
-        window_start = now - timedelta(minutes=OTP_RATE_WINDOW_MINUTES)
-
-        phone_count = OTPRequest.objects.filter(
-            phone_number=phone_number, created_at__gte=window_start
-        ).count()
-        ip_count = (
-            OTPRequest.objects.filter(ip_address=client_ip, created_at__gte=window_start).count()
-            if client_ip
-            else 0
-        )
 
-        if phone_count >= OTP_RATE_LIMIT or ip_count >= OTP_RATE_LIMIT:
+        limit = ratelimit.hit(*_otp_request_rates(phone_number, client_ip))
+        if not limit.allowed:
             logger.warning(
                 "OTP request rate limit hit for phone=%s ip=%s purpose=%s",
                 _mask_phone(phone_number),
@@ -104,40 +88,32 @@ class RequestOTPView(APIView):
             return Response(
                 {"detail": "Rate limit exceeded for OTP requests."},
                 status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(limit.retry_after)},
             )
 
-        try:
-            user = User.objects.get(phone_number=phone_number)
-        except User.DoesNotExist:
+        account = lookup_phone(phone_number)
+        if account is None:
             return Response(
                 {"detail": "No user is registered with this phone number."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        except User.MultipleObjectsReturned:
-            return Response(
-                {"detail": "Multiple users share this phone number. Please contact support."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
 
         code = f"{secrets.randbelow(1_000_000):06d}"
         otp = OTPRequest.objects.create(
-            user=user,
+            user_id=account.user_id,
             phone_number=phone_number,
             purpose=purpose,
             code_hash=_hash_code(code, phone_number),
             expires_at=now + timedelta(seconds=OTP_TTL_SECONDS),
             ip_address=client_ip,
-            sent_count=phone_count + 1,
+            sent_count=limit.counts[0],
+            sealed_code=seal_code(code),
+            next_attempt_at=now,
         )
-
-        try:
-            _send_kavenegar_otp(phone_number, code, purpose)
-        except ValueError as exc:
-            otp.delete()
-            return Response({"detail": str(exc)}, status=status.HTTP_502_BAD_GATEWAY)
+        otp_store.put(otp)
 
         logger.info(
-            "OTP sent for phone=%s ip=%s purpose=%s attempt=%s",
+            "OTP queued for phone=%s ip=%s purpose=%s attempt=%s",
             _mask_phone(phone_number),
             client_ip,
             purpose,
@@ -149,6 +125,7 @@ class RequestOTPView(APIView):
                 "sent_count": otp.sent_count,
                 "expires_in": OTP_TTL_SECONDS,
                 "purpose": purpose,
+                "delivery_status": otp.delivery_status,
             },
             status=status.HTTP_200_OK,
         )
@@ -167,111 +144,119 @@ class VerifyOTPView(APIView):
         client_ip = _get_client_ip(request)
 
         if client_ip:
-            cache_key = f"otp-verify:{client_ip}:{purpose}"
-            attempts_from_ip = cache.get(cache_key, 0) + 1
-            cache.set(
-                cache_key,
-                attempts_from_ip,
-                OTP_RATE_WINDOW_MINUTES * 60,
+            limit = ratelimit.hit(
+                Rate(
+                    rate_key("otp-verify", "ip", client_ip, purpose),
+                    OTP_IP_VERIFY_LIMIT,
+                    OTP_RATE_WINDOW_MINUTES * 60,
+                )
             )
-            if attempts_from_ip > OTP_IP_VERIFY_LIMIT:
+            if not limit.allowed:
                 logger.warning(
-                    "OTP verify blocked due to IP limit phone=%s ip=%s purpose=%s attempts=%s",
+                    "OTP verify blocked due to IP limit phone=%s ip=%s purpose=%s",
                     _mask_phone(phone_number),
                     client_ip,
                     purpose,
-                    attempts_from_ip,
                 )
                 return Response(
                     {"detail": "Too many verification attempts from this IP."},
                     status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(limit.retry_after)},
                 )
 
-        otp = (
-            OTPRequest.objects.filter(
-                phone_number=phone_number,
-                purpose=purpose,
-                is_verified=False,
+        candidate_hash = _hash_code(code, phone_number)
+        result = otp_store.check(phone_number, purpose, candidate_hash, OTP_MAX_ATTEMPTS)
+        if result.outcome == otp_store.MISS:
+            # Cold store (restart, eviction): seed it from the latest pending row.
+            pending = (
+                OTPRequest.objects.filter(
+                    phone_number=phone_number,
+                    purpose=purpose,
+                    is_verified=False,
+                )
+                .order_by("-created_at")
+                .first()
             )
-            .order_by("-created_at")
-            .first()
-        )
+            if pending:
+                otp_store.prime(pending)
+                result = otp_store.check(
+                    phone_number, purpose, candidate_hash, OTP_MAX_ATTEMPTS
+                )
 
-        if not otp:
+        if result.outcome in {otp_store.MISS, otp_store.CONSUMED}:
             return Response(
                 {"detail": "No pending OTP found for this phone number."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        otp.attempt_count += 1
-        otp.save(update_fields=["attempt_count"])
+        if result.first_terminal:
+            OTPRequest.objects.filter(pk=result.otp_id).update(
+                attempt_count=result.attempts,
+                is_verified=result.outcome == otp_store.VERIFIED,
+            )
+        elif result.outcome == otp_store.INVALID:
+            # Keep the lockout counter when the store loses the entry; never
+            # move it backwards.
+            OTPRequest.objects.filter(
+                pk=result.otp_id, attempt_count__lt=result.attempts
+            ).update(attempt_count=result.attempts)
 
-        if otp.attempt_count > OTP_MAX_ATTEMPTS:
+        if result.outcome == otp_store.LOCKED:
             logger.warning(
                 "OTP verify locked due to attempts phone=%s ip=%s purpose=%s attempts=%s",
                 _mask_phone(phone_number),
                 client_ip,
                 purpose,
-                otp.attempt_count,
+                result.attempts,
             )
             return Response(
-                {"detail": "Too many verification attempts.", "attempts": otp.attempt_count},
+                {"detail": "Too many verification attempts.", "attempts": result.attempts},
                 status=status.HTTP_429_TOO_MANY_REQUESTS,
             )
 
-        if VerifyOTPSerializer.is_expired(otp):
+        if result.outcome == otp_store.EXPIRED:
             return Response(
-                {"detail": "OTP code has expired.", "attempts": otp.attempt_count},
+                {"detail": "OTP code has expired.", "attempts": result.attempts},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not hmac.compare_digest(otp.code_hash, _hash_code(code, phone_number)):
+        if result.outcome != otp_store.VERIFIED:
             logger.info(
                 "OTP verification failed phone=%s ip=%s purpose=%s attempts=%s",
                 _mask_phone(phone_number),
                 client_ip,
                 purpose,
-                otp.attempt_count,
+                result.attempts,
             )
             return Response(
-                {"detail": "Invalid OTP code.", "attempts": otp.attempt_count},
+                {"detail": "Invalid OTP code.", "attempts": result.attempts},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        otp.is_verified = True
-        otp.save(update_fields=["is_verified"])
-
         logger.info(
             "OTP verified phone=%s ip=%s purpose=%s attempts=%s",
             _mask_phone(phone_number),
             client_ip,
             purpose,
-            otp.attempt_count,
+            result.attempts,
         )
 
-        user = otp.user
-        if not user:
-            try:
-                user = User.objects.get(phone_number=phone_number)
-            except User.MultipleObjectsReturned:
-                return Response(
-                    {
-                        "detail": "Multiple users share this phone number. Please contact support.",
-                        "attempts": otp.attempt_count,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            except User.DoesNotExist:
-                return Response(
-                    {"detail": "No user is registered with this phone number."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
+        user_id = result.user_id
+        if not user_id:
+            account = lookup_phone(phone_number)
+            user_id = account.user_id if account else None
+        user = User.objects.filter(pk=user_id).first() if user_id else None
+        if user is None:
+            return Response(
+                {"detail": "No user is registered with this phone number."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClinicRefreshToken.for_user(user)
         access_token = refresh.access_token
 
         response_data = {
-            "attempts": otp.attempt_count,
+            "attempts": result.attempts,
             "user_id": user.id,
             "role": user.role,
             "requires_setup": user.clinic_id is None,
@@ -325,7 +310,7 @@ class LogoutView(APIView):
             )
 
         try:
-            token = RefreshToken(refresh_token)
+            token = ClinicRefreshToken(refresh_token)
             token.blacklist()
         except TokenError:
             return Response(
@@ -358,7 +343,7 @@ class RefreshTokenView(APIView):
                 {"detail": "Refresh token is required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        serializer = TokenRefreshSerializer(data={"refresh": refresh_token})
+        serializer = ClaimsTokenRefreshSerializer(data={"refresh": refresh_token})
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         body = {k: v for k, v in data.items() if k not in {"access", "refresh"}}
@@ -0,0 +1,169 @@
+"""Free-slot search over provider schedules.
+
+A search reads three row sets: the providers' weekly working hours, their
+time off, and one range query on ``(provider, scheduled_time)`` for the
+appointments that overlap the window. The rest happens in memory on sorted
+interval lists:
+
+* each day's shifts are laid out in the clinic's time zone (so DST changes
+  move them correctly), converted to UTC and merged;
+* appointments and time off are merged into one sorted busy list per
+  provider, and each shift is cut against it with ``bisect``;
+* the gaps are turned into slot start times on a ``step_minutes`` grid
+  anchored at the shift start, keeping those where ``duration_minutes`` fits.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.utils import timezone
+
+from billing.entitlements import get_entitlement
+
+from .models import Appointment, ProviderTimeOff, ProviderWorkingHours
+
+Interval = tuple[datetime, datetime]
+
+MAX_DAYS = 31
+DEFAULT_STEP_MINUTES = 15
+# No appointment runs longer than this; bounds the look-back for ones that
+# start before the window but still overlap it.
+MAX_APPOINTMENT_DURATION = timedelta(hours=24)
+
+
+def merge(intervals: Iterable[Interval]) -> list[Interval]:
+    """Sort ``intervals`` and join the ones that overlap or touch."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract(window: Interval, busy: list[Interval], busy_ends: list[datetime]) -> list[Interval]:
+    """Parts of ``window`` not covered by ``busy`` (merged, with ``busy_ends`` its end times)."""
+    start, end = window
+    gaps = []
+    cursor = start
+    index = bisect_right(busy_ends, start)
+    while index < len(busy) and busy[index][0] < end:
+        busy_start, busy_end = busy[index]
+        if busy_start > cursor:
+            gaps.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+        index += 1
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def slot_starts(
+    shifts: list[Interval],
+    busy: list[Interval],
+    duration: timedelta,
+    step: timedelta,
+    not_before: Optional[datetime] = None,
+) -> list[datetime]:
+    """Start times, on a ``step`` grid from each shift start, where ``duration`` is free."""
+    busy_ends = [end for _, end in busy]
+    slots = []
+    for shift in shifts:
+        anchor = shift[0]
+        for gap_start, gap_end in subtract(shift, busy, busy_ends):
+            if not_before and gap_start < not_before:
+                gap_start = not_before
+            offset = math.ceil((gap_start - anchor) / step) if gap_start > anchor else 0
+            slot = anchor + offset * step
+            while slot + duration <= gap_end:
+                slots.append(slot)
+                slot += step
+    return slots
+
+
+def _shifts(hours, days: list[date], zone) -> list[Interval]:
+    shifts = []
+    for day in days:
+        for start_time, end_time in hours.get(day.weekday(), ()):
+            shifts.append(
+                (
+                    datetime.combine(day, start_time, tzinfo=zone).astimezone(dt_timezone.utc),
+                    datetime.combine(day, end_time, tzinfo=zone).astimezone(dt_timezone.utc),
+                )
+            )
+    return merge(shifts)
+
+
+def find_free_slots(
+    clinic_id,
+    start: date,
+    end: date,
+    duration_minutes: int,
+    provider_ids: Optional[Iterable[int]] = None,
+    step_minutes: int = DEFAULT_STEP_MINUTES,
+    now: Optional[datetime] = None,
+) -> dict[int, list[datetime]]:
+    """Free slot starts per provider for local dates ``start``..``end`` inclusive.
+
+    Providers are the ones with working hours in the clinic (optionally limited
+    to ``provider_ids``); slots before ``now`` are never offered.
+    """
+    zone = get_entitlement(clinic_id).zone
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    window_start = datetime.combine(start, time.min, tzinfo=zone)
+    window_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+
+    hours = ProviderWorkingHours.objects.filter(clinic_id=clinic_id)
+    if provider_ids is not None:
+        hours = hours.filter(provider_id__in=list(provider_ids))
+    weekly: dict[int, dict[int, list]] = defaultdict(lambda: defaultdict(list))
+    for provider_id, weekday, start_time, end_time in hours.values_list(
+        "provider_id", "weekday", "start_time", "end_time"
+    ):
+        weekly[provider_id][weekday].append((start_time, end_time))
+    if not weekly:
+        return {}
+
+    busy: dict[int, list[Interval]] = defaultdict(list)
+    appointments = (
+        Appointment.objects.filter(
+            clinic_id=clinic_id,
+            provider_id__in=list(weekly),
+            scheduled_time__gt=window_start - MAX_APPOINTMENT_DURATION,
+            scheduled_time__lt=window_end,
+            ends_at__gt=window_start,
+        )
+        .exclude(status=Appointment.Status.CANCELLED)
+        .values_list("provider_id", "scheduled_time", "ends_at")
+    )
+    for provider_id, scheduled_time, ends_at in appointments:
+        busy[provider_id].append((scheduled_time, ends_at))
+    time_off = ProviderTimeOff.objects.filter(
+        clinic_id=clinic_id,
+        provider_id__in=list(weekly),
+        starts_at__lt=window_end,
+        ends_at__gt=window_start,
+    ).values_list("provider_id", "starts_at", "ends_at")
+    for provider_id, starts_at, ends_at in time_off:
+        busy[provider_id].append((starts_at, ends_at))
+
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=step_minutes)
+    not_before = now or timezone.now()
+    return {
+        provider_id: slot_starts(
+            _shifts(weekly[provider_id], days, zone),
+            merge(busy[provider_id]),
+            duration,
+            step,
+            not_before,
+        )
+        for provider_id in sorted(weekly)
+    }
@@ -0,0 +1,139 @@
+"""Timing harness for ``appointments.availability.find_free_slots``.
+
+Seeds a throwaway clinic with providers, weekly hours and a busy week of
+appointments inside a transaction that is rolled back afterwards, then times
+repeated searches and records how many SQL queries each one issued.
+"""
+
+from __future__ import annotations
+
+import time as clock
+import uuid
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.bench import percentile
+from clinics.models import Clinic
+from patients.models import Patient
+
+from .availability import find_free_slots
+from .models import Appointment, ProviderWorkingHours
+
+BENCH_PREFIX = "bench-availability-"
+
+
+class AvailabilityBench:
+    def __init__(
+        self,
+        providers: int = 20,
+        days: int = 7,
+        appointments_per_day: int = 10,
+        repeat: int = 50,
+        timezone: str = "Asia/Tehran",
+    ) -> None:
+        self.providers = max(1, providers)
+        self.days = max(1, days)
+        self.appointments_per_day = max(0, appointments_per_day)
+        self.repeat = max(1, repeat)
+        self.timezone = timezone
+        self.clinic = None
+        self.start = date.today() + timedelta(days=7 - date.today().weekday())
+        self.latencies: list[float] = []
+        self.queries: list[int] = []
+        self.slots = 0
+
+    def seed(self) -> None:
+        User = get_user_model()
+        tag = uuid.uuid4().hex[:8]
+        self.clinic = Clinic.objects.create(
+            name="Availability bench", code=f"{BENCH_PREFIX}{tag}", timezone=self.timezone
+        )
+        password = make_password(None)
+        providers = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{BENCH_PREFIX}{tag}-{index}",
+                    email=f"{BENCH_PREFIX}{tag}-{index}@bench.invalid",
+                    password=password,
+                    role=User.Role.PRACTITIONER,
+                    clinic=self.clinic,
+                )
+                for index in range(self.providers)
+            ]
+        )
+        patient = Patient.objects.create(
+            clinic=self.clinic, first_name="Bench", last_name="Patient", phone_number=tag
+        )
+        zone = self.clinic_zone()
+        ProviderWorkingHours.objects.bulk_create(
+            ProviderWorkingHours(
+                clinic=self.clinic,
+                provider=provider,
+                weekday=weekday,
+                start_time=time(9),
+                end_time=time(18),
+            )
+            for provider in providers
+            for weekday in range(7)
+        )
+        appointments = []
+        for provider in providers:
+            for offset in range(self.days):
+                day = datetime.combine(self.start + timedelta(days=offset), time(9), tzinfo=zone)
+                for index in range(self.appointments_per_day):
+                    appointment = Appointment(
+                        clinic=self.clinic,
+                        patient=patient,
+                        provider=provider,
+                        scheduled_time=day + timedelta(minutes=45 * index),
+                        duration_minutes=30,
+                    )
+                    appointment.refresh_ends_at()
+                    appointments.append(appointment)
+        Appointment.objects.bulk_create(appointments, batch_size=1000)
+
+    def clinic_zone(self) -> ZoneInfo:
+        return ZoneInfo(self.timezone)
+
+    def search(self) -> None:
+        started = clock.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            result = find_free_slots(
+                self.clinic.id,
+                self.start,
+                self.start + timedelta(days=self.days - 1),
+                duration_minutes=60,
+                now=datetime.combine(self.start, time.min, tzinfo=self.clinic_zone()),
+            )
+        self.latencies.append(clock.perf_counter() - started)
+        self.queries.append(len(captured))
+        self.slots = sum(len(starts) for starts in result.values())
+
+    def run(self) -> dict:
+        """Seed, search ``repeat`` times and roll everything back."""
+        with transaction.atomic():
+            self.seed()
+            self.search()  # warm the entitlement cache
+            self.latencies.clear()
+            self.queries.clear()
+            for _ in range(self.repeat):
+                self.search()
+            transaction.set_rollback(True)
+        return self.report()
+
+    def report(self) -> dict:
+        return {
+            "providers": self.providers,
+            "days": self.days,
+            "appointments": self.providers * self.days * self.appointments_per_day,
+            "searches": len(self.latencies),
+            "slots": self.slots,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "max_queries": max(self.queries, default=0),
+        }
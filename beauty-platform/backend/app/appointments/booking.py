@@ -0,0 +1,134 @@
+"""Double-booking checks.
+
+On PostgreSQL two ``EXCLUDE USING gist`` constraints (migration 0006) reject
+a non-cancelled appointment whose ``[scheduled_time, ends_at)`` overlaps
+another one for the same provider or the same patient. Two receptionists
+booking the same slot at once therefore cannot both succeed, and no lock is
+taken. ``find_conflicts`` runs the same test as a query. The serializer calls
+it to report conflicts before writing, and it is the only check on other
+backends. ``conflict_guard`` turns a constraint violation from a lost race
+into the same 409 response.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.exceptions import APIException, ErrorDetail
+
+from .availability import MAX_APPOINTMENT_DURATION
+from .models import Appointment
+
+OVERLAP_CONSTRAINTS = {
+    "appointment_provider_no_overlap": "provider",
+    "appointment_patient_no_overlap": "patient",
+}
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "BOOKING_CONFLICT"
+    default_code = "booking_conflict"
+
+    def __init__(self, conflicts: Iterable[dict] = ()):
+        super().__init__()
+        # Set directly so ids and datetimes keep their types in the response.
+        self.detail = {
+            "detail": ErrorDetail(self.default_detail, self.default_code),
+            "conflicts": list(conflicts),
+        }
+
+
+def overlapping(clinic_id, start: datetime, end: datetime):
+    """Non-cancelled appointments of the clinic overlapping ``[start, end)``."""
+    return Appointment.objects.filter(
+        clinic_id=clinic_id,
+        # The lower bound keeps the scan on the (provider|patient, scheduled_time)
+        # indexes to a bounded range.
+        scheduled_time__gt=start - MAX_APPOINTMENT_DURATION,
+        scheduled_time__lt=end,
+        ends_at__gt=start,
+    ).exclude(status=Appointment.Status.CANCELLED)
+
+
+def find_conflicts(
+    clinic_id,
+    intervals: list[tuple[datetime, datetime]],
+    provider_id=None,
+    patient_id=None,
+    exclude_ids: Iterable[int] = (),
+) -> list[dict]:
+    """Describe the bookings that any of ``intervals`` would collide with.
+
+    All intervals are checked against one range query spanning them.
+    """
+    if not intervals:
+        return []
+    intervals = sorted(intervals)
+    match = Q(pk__in=[])
+    if provider_id:
+        match |= Q(provider_id=provider_id)
+    if patient_id:
+        match |= Q(patient_id=patient_id)
+    rows = list(
+        overlapping(clinic_id, intervals[0][0], max(end for _, end in intervals))
+        .filter(match)
+        .exclude(pk__in=list(exclude_ids))
+        .order_by("scheduled_time", "id")
+        .values("id", "provider_id", "patient_id", "scheduled_time", "ends_at")
+    )
+    starts = [row["scheduled_time"] for row in rows]
+    conflicts = {}
+    for start, end in intervals:
+        first = bisect_left(starts, start - MAX_APPOINTMENT_DURATION)
+        for row in rows[first : bisect_left(starts, end)]:
+            if row["ends_at"] > start:
+                conflicts[row["id"]] = row
+    return [
+        {
+            "appointment": row["id"],
+            "field": "provider" if provider_id and row["provider_id"] == provider_id else "patient",
+            "scheduled_time": row["scheduled_time"],
+            "ends_at": row["ends_at"],
+        }
+        for row in conflicts.values()
+    ]
+
+
+def check_conflicts(
+    clinic_id,
+    intervals: list[tuple[datetime, datetime]],
+    provider_id=None,
+    patient_id=None,
+    exclude_ids: Iterable[int] = (),
+) -> None:
+    conflicts = find_conflicts(clinic_id, intervals, provider_id, patient_id, exclude_ids)
+    if conflicts:
+        raise BookingConflict(conflicts)
+
+
+def _violated_constraint(exc: IntegrityError) -> Optional[str]:
+    diag = getattr(exc.__cause__, "diag", None)
+    name = getattr(diag, "constraint_name", None)
+    if name:
+        return name
+    return next((name for name in OVERLAP_CONSTRAINTS if name in str(exc)), None)
+
+
+@contextmanager
+def conflict_guard():
+    """Report an overlap rejected by the database as ``BookingConflict``."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        constraint = _violated_constraint(exc)
+        if constraint not in OVERLAP_CONSTRAINTS:
+            raise
+        raise BookingConflict([{"field": OVERLAP_CONSTRAINTS[constraint]}]) from exc
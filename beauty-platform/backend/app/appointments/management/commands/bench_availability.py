@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from appointments.bench import AvailabilityBench
+
+
+class Command(BaseCommand):
+    help = (
+        "Time free-slot searches against a seeded clinic. The seed data is "
+        "created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--providers", type=int, default=20)
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--appointments-per-day", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--timezone", default="Asia/Tehran")
+        parser.add_argument("--json", action="store_true", help="Print the raw report.")
+
+    def handle(self, *args, **options):
+        report = AvailabilityBench(
+            providers=options["providers"],
+            days=options["days"],
+            appointments_per_day=options["appointments_per_day"],
+            repeat=options["repeat"],
+            timezone=options["timezone"],
+        ).run()
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{report['searches']} searches over {report['providers']} providers x "
+            f"{report['days']} days ({report['appointments']} appointments, "
+            f"{report['slots']} free slots): p50 {report['p50_ms']} ms, "
+            f"p95 {report['p95_ms']} ms, {report['max_queries']} queries"
+        )
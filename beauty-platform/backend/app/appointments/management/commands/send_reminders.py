@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from appointments.reminders import ReminderDispatcher
+
+
+class Command(BaseCommand):
+    help = "Send due appointment reminders through the configured SMS provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument("--once", action="store_true", help="Send one batch and exit.")
+
+    def handle(self, *args, **options):
+        dispatcher = ReminderDispatcher(workers=options["workers"])
+        self.stdout.write(
+            f"Sending reminders via {dispatcher.provider.name} "
+            f"(workers={options['workers']}, cap={dispatcher.provider.max_concurrency})"
+        )
+        try:
+            while True:
+                handled = dispatcher.run_once(options["batch_size"])
+                if options["once"]:
+                    self.stdout.write(f"Processed {handled} reminder(s).")
+                    return
+                if not handled:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.shutdown()
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0001_initial"),
+        ("clinics", "0001_initial"),
+        ("patients", "0003_patient_search_trigram_indexes"),
+        ("services", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="appointment_clinic__9b9fe4_idx",
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["clinic", "-scheduled_time", "id"],
+                name="appointment_clinic_sched_id",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0002_keyset_indexes"),
+        ("clinics", "0001_initial"),
+        ("patients", "0006_patient_updated_index"),
+        ("services", "0002_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["patient", "-scheduled_time", "id"],
+                name="appointment_patient_sched_id",
+            ),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0003_patient_timeline_index"),
+        ("clinics", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderWorkingHours",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                            (5, "Saturday"),
+                            (6, "Sunday"),
+                        ]
+                    ),
+                ),
+                ("start_time", models.TimeField()),
+                ("end_time", models.TimeField()),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="working_hours",
+                        to="clinics.clinic",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="working_hours",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["provider", "weekday", "start_time"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProviderTimeOff",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("starts_at", models.DateTimeField()),
+                ("ends_at", models.DateTimeField()),
+                ("reason", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="provider_time_off",
+                        to="clinics.clinic",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_off",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["starts_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["clinic", "starts_at"],
+                        name="appointment_clinic__fc0310_idx",
+                    ),
+                    models.Index(
+                        fields=["provider", "starts_at"],
+                        name="appointment_provide_9f9023_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="providertimeoff",
+            constraint=models.CheckConstraint(
+                check=models.Q(("ends_at__gt", models.F("starts_at"))),
+                name="time_off_ends_after_start",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="providerworkinghours",
+            index=models.Index(
+                fields=["clinic", "provider", "weekday"],
+                name="appointment_clinic__ce19d5_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="providerworkinghours",
+            constraint=models.CheckConstraint(
+                check=models.Q(("end_time__gt", models.F("start_time"))),
+                name="working_hours_end_after_start",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_ends_at(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    appointments = Appointment.objects.only("id", "scheduled_time", "duration_minutes")
+    batch = []
+    for appointment in appointments.iterator(chunk_size=2000):
+        appointment.ends_at = appointment.scheduled_time + timedelta(
+            minutes=appointment.duration_minutes
+        )
+        batch.append(appointment)
+        if len(batch) >= 2000:
+            Appointment.objects.bulk_update(batch, ["ends_at"])
+            batch = []
+    if batch:
+        Appointment.objects.bulk_update(batch, ["ends_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0004_provider_schedules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="ends_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_ends_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="appointment",
+            name="ends_at",
+            field=models.DateTimeField(editable=False),
+        ),
+    ]
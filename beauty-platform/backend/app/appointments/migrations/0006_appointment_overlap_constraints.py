@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Mirrors appointments.booking.OVERLAP_CONSTRAINTS.
+CONSTRAINTS = {
+    "appointment_provider_no_overlap": "provider_id",
+    "appointment_patient_no_overlap": "patient_id",
+}
+
+
+def create_overlap_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    for name, column in CONSTRAINTS.items():
+        schema_editor.execute(
+            f"ALTER TABLE appointments_appointment ADD CONSTRAINT {name} "
+            f"EXCLUDE USING gist ({column} WITH =, "
+            f"tstzrange(scheduled_time, ends_at, '[)') WITH &&) "
+            f"WHERE (status <> 'CANCELLED' AND {column} IS NOT NULL)"
+        )
+
+
+def drop_overlap_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in CONSTRAINTS:
+        schema_editor.execute(
+            f"ALTER TABLE appointments_appointment DROP CONSTRAINT IF EXISTS {name}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0005_appointment_ends_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_overlap_constraints, drop_overlap_constraints),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0007_appointment_series"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("24H", "24 hours before"), ("2H", "2 hours before")],
+                        max_length=8,
+                    ),
+                ),
+                ("due_at", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("SENDING", "Sending"),
+                            ("SENT", "Sent"),
+                            ("FAILED", "Failed"),
+                            ("SUPPRESSED", "Suppressed"),
+                        ],
+                        default="PENDING",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("error", models.CharField(blank=True, max_length=255)),
+                ("next_attempt_at", models.DateTimeField()),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "appointment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reminders",
+                        to="appointments.appointment",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["due_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="appointment_status_8ec9a2_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="appointmentreminder",
+            constraint=models.UniqueConstraint(
+                fields=("appointment", "kind"), name="reminder_one_per_kind"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    Procedure = apps.get_model("appointments", "Procedure")
+    Procedure.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0008_appointment_reminders"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="procedure",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["clinic", "updated_at", "id"], name="appointment_clinic_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="procedure",
+            index=models.Index(fields=["updated_at", "id"], name="procedure_updated"),
+        ),
+    ]
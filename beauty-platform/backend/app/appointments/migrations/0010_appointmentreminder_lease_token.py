@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0009_sync_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointmentreminder",
+            name="lease_token",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
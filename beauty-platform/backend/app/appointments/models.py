@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.db import models
 
 
@@ -10,6 +12,9 @@ class Appointment(models.Model):
         CANCELLED = "CANCELLED", "Cancelled"
         NO_SHOW = "NO_SHOW", "No show"
 
+    # Still ahead of the patient: can be moved, reminded of or cancelled.
+    OPEN_STATUSES = (Status.SCHEDULED, Status.CONFIRMED)
+
     clinic = models.ForeignKey(
         "clinics.Clinic",
         on_delete=models.CASCADE,
@@ -36,6 +41,9 @@ class Appointment(models.Model):
     )
     scheduled_time = models.DateTimeField()
     duration_minutes = models.PositiveIntegerField(default=30)
+    # scheduled_time + duration_minutes, kept by save() for range queries and
+    # the overlap constraints (see appointments.booking).
+    ends_at = models.DateTimeField(editable=False)
     status = models.CharField(
         max_length=32,
         choices=Status.choices,
@@ -44,13 +52,27 @@ class Appointment(models.Model):
     )
     notes = models.TextField(blank=True)
     reference_id = models.CharField(max_length=64, blank=True)
+    series = models.ForeignKey(
+        "appointments.AppointmentSeries",
+        on_delete=models.SET_NULL,
+        related_name="occurrences",
+        null=True,
+        blank=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=["clinic", "scheduled_time"]),
+            models.Index(
+                fields=["clinic", "-scheduled_time", "id"], name="appointment_clinic_sched_id"
+            ),
+            models.Index(fields=["clinic", "updated_at", "id"], name="appointment_clinic_updated"),
+            models.Index(fields=["series", "scheduled_time"]),
             models.Index(fields=["patient", "status"]),
+            models.Index(
+                fields=["patient", "-scheduled_time", "id"], name="appointment_patient_sched_id"
+            ),
             models.Index(fields=["provider", "scheduled_time"]),
         ]
         ordering = ["-scheduled_time"]
@@ -58,6 +80,30 @@ class Appointment(models.Model):
     def __str__(self) -> str:
         return f"Appointment #{self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_ends_at(self) -> None:
+        self.ends_at = self.scheduled_time + timedelta(minutes=self.duration_minutes)
+
+    def save(self, *args, **kwargs):
+        self.refresh_ends_at()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"scheduled_time", "duration_minutes"} & set(
+            update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "ends_at"}
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            **getattr(self, "_loaded_values", {}),
+            "status": self.status,
+            "patient_id": self.patient_id,
+            "scheduled_time": self.scheduled_time,
+        }
+
 
 class Procedure(models.Model):
     appointment = models.ForeignKey(
@@ -82,13 +128,210 @@ class Procedure(models.Model):
         blank=True,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["appointment", "created_at"]),
             models.Index(fields=["service", "performed_by"]),
+            # Delta sync reads procedures by (updated_at, id) and joins to the clinic.
+            models.Index(fields=["updated_at", "id"], name="procedure_updated"),
         ]
         ordering = ["created_at"]
 
     def __str__(self) -> str:
         return f"Procedure for appointment {self.appointment_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            **getattr(self, "_loaded_values", {}),
+            "price": self.price,
+            "appointment_id": self.appointment_id,
+        }
+
+
+class ProviderWorkingHours(models.Model):
+    """A weekly shift, in the clinic's local time."""
+
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0, "Monday"
+        TUESDAY = 1, "Tuesday"
+        WEDNESDAY = 2, "Wednesday"
+        THURSDAY = 3, "Thursday"
+        FRIDAY = 4, "Friday"
+        SATURDAY = 5, "Saturday"
+        SUNDAY = 6, "Sunday"
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="working_hours",
+    )
+    provider = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        related_name="working_hours",
+    )
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_time__gt=models.F("start_time")),
+                name="working_hours_end_after_start",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["clinic", "provider", "weekday"]),
+        ]
+        ordering = ["provider", "weekday", "start_time"]
+
+    def __str__(self) -> str:
+        return f"{self.provider_id} {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+class ProviderTimeOff(models.Model):
+    """An exception to the weekly hours during which the provider cannot be booked."""
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="provider_time_off",
+    )
+    provider = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        related_name="time_off",
+    )
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(ends_at__gt=models.F("starts_at")),
+                name="time_off_ends_after_start",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["clinic", "starts_at"]),
+            models.Index(fields=["provider", "starts_at"]),
+        ]
+        ordering = ["starts_at"]
+
+    def __str__(self) -> str:
+        return f"Time off for {self.provider_id} from {self.starts_at}"
+
+
+class AppointmentSeries(models.Model):
+    """A recurring booking, e.g. every 4 weeks x 6; see appointments.series."""
+
+    class Frequency(models.TextChoices):
+        DAILY = "DAILY", "Daily"
+        WEEKLY = "WEEKLY", "Weekly"
+        MONTHLY = "MONTHLY", "Monthly"
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="appointment_series",
+    )
+    patient = models.ForeignKey(
+        "patients.Patient",
+        on_delete=models.CASCADE,
+        related_name="appointment_series",
+    )
+    service = models.ForeignKey(
+        "services.Service",
+        on_delete=models.SET_NULL,
+        related_name="appointment_series",
+        null=True,
+        blank=True,
+    )
+    provider = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.SET_NULL,
+        related_name="appointment_series",
+        null=True,
+        blank=True,
+    )
+    # First occurrence; later ones keep its local wall-clock time.
+    starts_at = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField(default=30)
+    frequency = models.CharField(max_length=16, choices=Frequency.choices)
+    interval = models.PositiveSmallIntegerField(default=1)
+    count = models.PositiveSmallIntegerField()
+    notes = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.SET_NULL,
+        related_name="created_appointment_series",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["clinic", "-created_at"]),
+        ]
+        ordering = ["-created_at"]
+        verbose_name_plural = "appointment series"
+
+    def __str__(self) -> str:
+        return f"Series #{self.pk}: {self.count} x {self.get_frequency_display().lower()}"
+
+
+class AppointmentReminder(models.Model):
+    """An SMS sent ahead of an appointment; see appointments.reminders."""
+
+    class Kind(models.TextChoices):
+        DAY_BEFORE = "24H", "24 hours before"
+        TWO_HOURS = "2H", "2 hours before"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENDING = "SENDING", "Sending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+        SUPPRESSED = "SUPPRESSED", "Suppressed"
+
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.CASCADE,
+        related_name="reminders",
+    )
+    kind = models.CharField(max_length=8, choices=Kind.choices)
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    # due_at at first, then the retry time or the end of a worker's lease.
+    next_attempt_at = models.DateTimeField()
+    # Set by each claim; only the worker holding it may send or record the outcome.
+    lease_token = models.UUIDField(null=True, blank=True, editable=False)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["appointment", "kind"], name="reminder_one_per_kind"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+        ordering = ["due_at"]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} reminder for appointment {self.appointment_id}"
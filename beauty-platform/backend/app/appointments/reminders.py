@@ -0,0 +1,216 @@
+"""SMS reminders ahead of appointments.
+
+Every open appointment gets one ``AppointmentReminder`` row per entry in
+``OFFSETS``, due that long before ``scheduled_time``. ``sync`` writes them when
+an appointment is booked, moved or closed, so workers never scan the
+appointment table. ``send_reminders`` workers read only due rows, using the
+``(status, next_attempt_at)`` index. They claim a batch with ``SELECT ... FOR
+UPDATE SKIP LOCKED`` and lease it by marking it SENDING under a fresh
+``lease_token``. A lease that runs out (crashed or slow worker) lets another
+worker claim the row with a new token. Just before each send, the worker checks
+that it still holds the token and renews the lease, and the outcome is only
+recorded while the token matches. So a reminder is never sent twice, even when a
+batch waits longer than the lease for provider slots. Messages go out through
+the configured ``accounts.sms`` provider, and each outcome is recorded on its row.
+
+A reminder for an appointment that is no longer open (for example cancelled
+by a set-based update that skipped ``sync``) is marked SUPPRESSED when it is
+claimed, not sent.
+"""
+
+import logging
+import uuid
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.dispatch import Dispatcher, provider_slots, retry_delay
+from accounts.sms import SMSDeliveryError, SMSProvider, get_sms_provider
+from billing.entitlements import get_entitlement
+
+from .models import Appointment, AppointmentReminder
+
+logger = logging.getLogger(__name__)
+
+OFFSETS = {
+    AppointmentReminder.Kind.DAY_BEFORE: timedelta(hours=24),
+    AppointmentReminder.Kind.TWO_HOURS: timedelta(hours=2),
+}
+# Rows stuck in SENDING longer than this (crashed worker) become claimable
+# again; renewed right before each send.
+CLAIM_LEASE = timedelta(minutes=1)
+
+Status = AppointmentReminder.Status
+
+
+def sync(appointments: Iterable[Appointment], created: bool = False) -> None:
+    """Bring the reminders of ``appointments`` in line with their time and status.
+
+    Reminders whose due time has already passed are not created; pending
+    reminders of closed appointments are suppressed, and ones for a new time
+    replace the old rows. ``created`` skips the lookup of existing reminders
+    for appointments that were just inserted.
+    """
+    now = timezone.now()
+    ids, due = [], {}
+    for appointment in appointments:
+        ids.append(appointment.pk)
+        if appointment.status not in Appointment.OPEN_STATUSES:
+            continue
+        for kind, offset in OFFSETS.items():
+            at = appointment.scheduled_time - offset
+            if at > now:
+                due[(appointment.pk, kind)] = at
+    if not ids:
+        return
+
+    existing = {}
+    if not created:
+        existing = {
+            (appointment_id, kind): (pk, due_at, status)
+            for pk, appointment_id, kind, due_at, status in AppointmentReminder.objects.filter(
+                appointment_id__in=ids
+            ).values_list("id", "appointment_id", "kind", "due_at", "status")
+        }
+    suppress, replace = [], []
+    for key, (pk, due_at, status) in existing.items():
+        if key not in due:
+            if status == Status.PENDING:
+                suppress.append(pk)
+        elif due_at != due[key] or status == Status.SUPPRESSED:
+            replace.append(pk)
+    keep = {key for key, (pk, _, _) in existing.items() if key in due and pk not in replace}
+
+    pending = [
+        AppointmentReminder(appointment_id=pk, kind=kind, due_at=at, next_attempt_at=at)
+        for (pk, kind), at in due.items()
+        if (pk, kind) not in keep
+    ]
+    # A lone insert needs no savepoint of its own.
+    with transaction.atomic() if suppress or replace else nullcontext():
+        if suppress:
+            AppointmentReminder.objects.filter(pk__in=suppress, status=Status.PENDING).update(
+                status=Status.SUPPRESSED, error="appointment_closed"
+            )
+        if replace:
+            AppointmentReminder.objects.filter(pk__in=replace).delete()
+        if pending:
+            AppointmentReminder.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+def claim_batch(limit: int) -> list[AppointmentReminder]:
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            AppointmentReminder.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("appointment__patient")
+            .filter(status__in=[Status.PENDING, Status.SENDING], next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:limit]
+        )
+        claimed, skipped = [], {}
+        for reminder in batch:
+            appointment = reminder.appointment
+            if appointment.status not in Appointment.OPEN_STATUSES:
+                skipped.setdefault("appointment_closed", []).append(reminder.pk)
+            elif appointment.scheduled_time <= now:
+                skipped.setdefault("appointment_started", []).append(reminder.pk)
+            else:
+                claimed.append(reminder)
+        for reason, pks in skipped.items():
+            AppointmentReminder.objects.filter(pk__in=pks).update(
+                status=Status.SUPPRESSED, error=reason
+            )
+        if claimed:
+            token = uuid.uuid4()
+            AppointmentReminder.objects.filter(pk__in=[r.pk for r in claimed]).update(
+                status=Status.SENDING, next_attempt_at=now + CLAIM_LEASE, lease_token=token
+            )
+            for reminder in claimed:
+                reminder.status, reminder.lease_token = Status.SENDING, token
+    return claimed
+
+
+def _leased(reminder: AppointmentReminder):
+    """The row of ``reminder`` if this worker's lease on it still holds."""
+    return AppointmentReminder.objects.filter(
+        pk=reminder.pk, status=Status.SENDING, lease_token=reminder.lease_token
+    )
+
+
+def deliver(reminder: AppointmentReminder, provider: SMSProvider | None = None) -> str | None:
+    """Send ``reminder`` and record the outcome; ``None`` if its lease was lost first."""
+    provider = provider or get_sms_provider()
+    appointment = reminder.appointment
+    patient = appointment.patient
+    zone = get_entitlement(appointment.clinic_id).zone
+    attempts = reminder.attempts + 1
+    values = {"attempts": attempts}
+
+    try:
+        with provider_slots(provider):
+            # Waiting for a slot can outlast the lease. Re-check ownership and
+            # renew the lease, so no other worker claims the row mid-send.
+            renewed = _leased(reminder).update(next_attempt_at=timezone.now() + CLAIM_LEASE)
+            if not renewed:
+                logger.info("Reminder lease lost before sending reminder_id=%s", reminder.pk)
+                return None
+            provider.send_reminder(
+                patient.phone_number,
+                f"{patient.first_name} {patient.last_name}".strip(),
+                appointment.scheduled_time.astimezone(zone),
+            )
+    except SMSDeliveryError as exc:
+        values["error"] = str(exc)[:255]
+        max_attempts = getattr(settings, "SMS_MAX_ATTEMPTS", 5)
+        retry_at = timezone.now() + retry_delay(attempts)
+        if exc.retryable and attempts < max_attempts and retry_at < appointment.scheduled_time:
+            values.update(status=Status.PENDING, next_attempt_at=retry_at)
+        else:
+            values["status"] = Status.FAILED
+        logger.warning(
+            "Reminder delivery failed reminder_id=%s provider=%s attempt=%s status=%s error=%s",
+            reminder.pk,
+            provider.name,
+            attempts,
+            values["status"],
+            values["error"],
+        )
+    else:
+        values.update(status=Status.SENT, error="", sent_at=timezone.now())
+
+    # Only a row still leased to us: the appointment may have been moved
+    # meanwhile, replacing this reminder.
+    _leased(reminder).update(**values)
+    for name, value in values.items():
+        setattr(reminder, name, value)
+    return reminder.status
+
+
+def record_failure(reminder: AppointmentReminder, error: str) -> None:
+    """Record a failed attempt after ``deliver`` raised something unexpected."""
+    now = timezone.now()
+    attempts = (
+        AppointmentReminder.objects.filter(pk=reminder.pk)
+        .values_list("attempts", flat=True)
+        .first()
+        or 0
+    ) + 1
+    values = {"attempts": attempts, "error": error[:255]}
+    retry_at = now + retry_delay(attempts)
+    max_attempts = getattr(settings, "SMS_MAX_ATTEMPTS", 5)
+    if attempts < max_attempts and retry_at < reminder.appointment.scheduled_time:
+        values.update(status=Status.PENDING, next_attempt_at=retry_at)
+    else:
+        values["status"] = Status.FAILED
+    _leased(reminder).update(**values)
+
+
+class ReminderDispatcher(Dispatcher):
+    claim = staticmethod(claim_batch)
+    deliver = staticmethod(deliver)
+    fail = staticmethod(record_failure)
+    thread_name_prefix = "reminder-dispatch"
@@ -1,7 +1,20 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
-from appointments.models import Appointment, Procedure
+from appointments.availability import DEFAULT_STEP_MINUTES, MAX_DAYS
+from appointments.booking import check_conflicts
+from appointments.calendar import VIEW_DAYS
+from appointments.models import (
+    Appointment,
+    AppointmentSeries,
+    Procedure,
+    ProviderTimeOff,
+    ProviderWorkingHours,
+)
+from appointments.series import MAX_OCCURRENCES, create_series
 from patients.models import Patient
 from services.models import Service
 
@@ -26,6 +39,9 @@ class AppointmentSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "clinic", "created_at", "updated_at"]
+        # The overlap, availability and calendar range queries only look back
+        # MAX_APPOINTMENT_DURATION (24h) for bookings that started earlier.
+        extra_kwargs = {"duration_minutes": {"min_value": 5, "max_value": 24 * 60}}
 
     def validate_patient(self, value: Patient) -> Patient:
         clinic_id = self.context.get("request").user.clinic_id
@@ -33,6 +49,35 @@ class AppointmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Patient must belong to the clinic.")
         return value
 
+    def validate(self, attrs):
+        """Reject bookings overlapping the provider's or patient's other appointments."""
+        instance = self.instance
+        cancelled = Appointment.Status.CANCELLED
+        status = attrs.get("status", instance.status if instance else Appointment.Status.SCHEDULED)
+        if status == cancelled:
+            return attrs
+        if instance is not None and instance.status != cancelled and not (
+            attrs.keys() & {"scheduled_time", "duration_minutes", "provider", "patient"}
+        ):
+            return attrs
+
+        def current(name, default=None):
+            return attrs[name] if name in attrs else getattr(instance, name, default)
+
+        start = current("scheduled_time")
+        duration = current(
+            "duration_minutes", Appointment._meta.get_field("duration_minutes").default
+        )
+        provider, patient = current("provider"), current("patient")
+        check_conflicts(
+            self.context.get("request").user.clinic_id,
+            [(start, start + timedelta(minutes=duration))],
+            provider_id=provider.pk if provider else None,
+            patient_id=patient.pk if patient else None,
+            exclude_ids=[instance.pk] if instance else (),
+        )
+        return attrs
+
     def validate_provider(self, value: User | None) -> User | None:
         if value is None:
             return value
@@ -90,3 +135,183 @@ class ProcedureSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("User must belong to the clinic.")
         return value
 
+
+class SeriesOccurrenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Appointment
+        fields = ["id", "scheduled_time", "ends_at", "status", "provider"]
+        read_only_fields = fields
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    interval = serializers.IntegerField(min_value=1, max_value=52, default=1)
+    count = serializers.IntegerField(min_value=1, max_value=MAX_OCCURRENCES)
+    duration_minutes = serializers.IntegerField(min_value=5, max_value=24 * 60, required=False)
+    occurrences = SeriesOccurrenceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            "id",
+            "clinic",
+            "patient",
+            "service",
+            "provider",
+            "starts_at",
+            "duration_minutes",
+            "frequency",
+            "interval",
+            "count",
+            "notes",
+            "created_by",
+            "created_at",
+            "occurrences",
+        ]
+        read_only_fields = ["id", "clinic", "created_by", "created_at"]
+
+    validate_patient = AppointmentSerializer.validate_patient
+    validate_provider = AppointmentSerializer.validate_provider
+    validate_service = AppointmentSerializer.validate_service
+
+    def validate(self, attrs):
+        if "duration_minutes" not in attrs:
+            service = attrs.get("service")
+            attrs["duration_minutes"] = (
+                service.duration_minutes
+                if service
+                else AppointmentSeries._meta.get_field("duration_minutes").default
+            )
+        return attrs
+
+    def create(self, validated_data):
+        series = AppointmentSeries(**validated_data)
+        create_series(series)
+        prefetch_related_objects(
+            [series],
+            Prefetch("occurrences", queryset=Appointment.objects.order_by("scheduled_time")),
+        )
+        return series
+
+
+class SeriesFollowingSerializer(serializers.Serializer):
+    """Body of ``POST /api/appointment-series/{id}/following/``."""
+
+    CHANGES = ("shift_minutes", "duration_minutes", "provider", "service", "notes")
+
+    from_appointment = serializers.PrimaryKeyRelatedField(queryset=Appointment.objects.all())
+    shift_minutes = serializers.IntegerField(
+        required=False, min_value=-366 * 24 * 60, max_value=366 * 24 * 60
+    )
+    duration_minutes = serializers.IntegerField(required=False, min_value=5, max_value=24 * 60)
+    provider = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), required=False, allow_null=True
+    )
+    service = serializers.PrimaryKeyRelatedField(
+        queryset=Service.objects.all(), required=False, allow_null=True
+    )
+    notes = serializers.CharField(required=False, allow_blank=True)
+    cancel = serializers.BooleanField(default=False)
+
+    validate_provider = AppointmentSerializer.validate_provider
+    validate_service = AppointmentSerializer.validate_service
+
+    def validate_from_appointment(self, value: Appointment) -> Appointment:
+        if value.series_id != self.context["series"].pk:
+            raise serializers.ValidationError("Appointment must belong to this series.")
+        return value
+
+    def validate(self, attrs):
+        changes = [name for name in self.CHANGES if name in attrs]
+        if attrs["cancel"] and changes:
+            raise serializers.ValidationError("cancel cannot be combined with other changes.")
+        if not attrs["cancel"] and not changes:
+            raise serializers.ValidationError("Nothing to change.")
+        return attrs
+
+
+class ProviderWorkingHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProviderWorkingHours
+        fields = ["id", "clinic", "provider", "weekday", "start_time", "end_time"]
+        read_only_fields = ["id", "clinic"]
+
+    def validate_provider(self, value: User) -> User:
+        if value.clinic_id != self.context.get("request").user.clinic_id:
+            raise serializers.ValidationError("Provider must belong to the clinic.")
+        return value
+
+    def validate(self, attrs):
+        start = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end = attrs.get("end_time", getattr(self.instance, "end_time", None))
+        if start and end and end <= start:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        return attrs
+
+
+class ProviderTimeOffSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProviderTimeOff
+        fields = ["id", "clinic", "provider", "starts_at", "ends_at", "reason", "created_at"]
+        read_only_fields = ["id", "clinic", "created_at"]
+
+    def validate_provider(self, value: User) -> User:
+        if value.clinic_id != self.context.get("request").user.clinic_id:
+            raise serializers.ValidationError("Provider must belong to the clinic.")
+        return value
+
+    def validate(self, attrs):
+        start = attrs.get("starts_at", getattr(self.instance, "starts_at", None))
+        end = attrs.get("ends_at", getattr(self.instance, "ends_at", None))
+        if start and end and end <= start:
+            raise serializers.ValidationError("ends_at must be after starts_at.")
+        return attrs
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters of ``GET /api/appointments/availability/``."""
+
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all(), required=False)
+    duration_minutes = serializers.IntegerField(required=False, min_value=5, max_value=24 * 60)
+    provider = serializers.ListField(child=serializers.IntegerField(), required=False)
+    step_minutes = serializers.IntegerField(
+        required=False, min_value=5, max_value=240, default=DEFAULT_STEP_MINUTES
+    )
+
+    def validate_service(self, value: Service) -> Service:
+        if value.clinic_id != self.context.get("request").user.clinic_id:
+            raise serializers.ValidationError("Service must belong to the clinic.")
+        return value
+
+    def validate(self, attrs):
+        attrs.setdefault("end", attrs["start"])
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("end must not be before start.")
+        if (attrs["end"] - attrs["start"]).days >= MAX_DAYS:
+            raise serializers.ValidationError(f"Search at most {MAX_DAYS} days at a time.")
+        if "duration_minutes" not in attrs:
+            if "service" not in attrs:
+                raise serializers.ValidationError("Pass a service or duration_minutes.")
+            attrs["duration_minutes"] = attrs["service"].duration_minutes
+        return attrs
+
+
+class CalendarQuerySerializer(serializers.Serializer):
+    """Query parameters of ``GET /api/appointments/calendar/``."""
+
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+    view = serializers.ChoiceField(choices=list(VIEW_DAYS), default="day")
+    include_cancelled = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        days = VIEW_DAYS[attrs["view"]]
+        if "end" in attrs:
+            days = (attrs["end"] - attrs["start"]).days + 1
+            if days < 1:
+                raise serializers.ValidationError("end must not be before start.")
+            if days > MAX_DAYS:
+                raise serializers.ValidationError(f"Show at most {MAX_DAYS} days at a time.")
+        attrs["days"] = days
+        return attrs
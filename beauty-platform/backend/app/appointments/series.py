@@ -0,0 +1,178 @@
+"""Recurring appointment series.
+
+A series is expanded in memory into its occurrence times, laid out in the
+clinic's time zone so every visit keeps the first one's wall-clock time
+across DST changes. Conflicts with existing bookings are found with one range
+query over the whole span (``booking.find_conflicts``), the plan quota is
+reserved once for all occurrences, and they are inserted with a single
+``bulk_create``.
+
+Edits to "this and following" occurrences are set-based: one ``UPDATE`` over
+the open occurrences from the chosen one onwards. ``bulk_create`` and
+``update`` skip model signals, so the plan counters and reminders are
+adjusted here.
+"""
+
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from billing.entitlements import get_entitlement
+from billing.limits import PlanAction, is_current_period, release, reserve
+
+from . import reminders
+from .booking import check_conflicts, conflict_guard
+from .models import Appointment, AppointmentSeries
+
+MAX_OCCURRENCES = 52
+
+
+def _add_months(day: date, months: int) -> date:
+    """``day`` moved by ``months``, clamped to the end of shorter months."""
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def expand(starts_at: datetime, frequency: str, interval: int, count: int, zone) -> list[datetime]:
+    """Occurrence start times (UTC) at the local time of ``starts_at``."""
+    local = starts_at.astimezone(zone)
+    first, at = local.date(), local.time().replace(tzinfo=None)
+    starts = []
+    for index in range(count):
+        step = index * interval
+        if frequency == AppointmentSeries.Frequency.MONTHLY:
+            day = _add_months(first, step)
+        elif frequency == AppointmentSeries.Frequency.WEEKLY:
+            day = first + timedelta(weeks=step)
+        else:
+            day = first + timedelta(days=step)
+        starts.append(datetime.combine(day, at, tzinfo=zone).astimezone(dt_timezone.utc))
+    return starts
+
+
+def create_series(series: AppointmentSeries) -> list[Appointment]:
+    """Save ``series`` with all its occurrences, or raise before writing anything.
+
+    Raises ``BookingConflict`` when an occurrence overlaps an existing booking
+    of the provider or patient, and ``PlanLimitExceeded`` when the month's
+    quota cannot take all of them.
+    """
+    zone = get_entitlement(series.clinic_id).zone
+    duration = timedelta(minutes=series.duration_minutes)
+    starts = expand(series.starts_at, series.frequency, series.interval, series.count, zone)
+    check_conflicts(
+        series.clinic_id,
+        [(start, start + duration) for start in starts],
+        provider_id=series.provider_id,
+        patient_id=series.patient_id,
+    )
+    with conflict_guard():
+        reserve(series.clinic_id, PlanAction.CREATE_APPOINTMENT, quantity=len(starts))
+        series.save()
+        occurrences = []
+        for start in starts:
+            occurrence = Appointment(
+                clinic_id=series.clinic_id,
+                patient_id=series.patient_id,
+                service_id=series.service_id,
+                provider_id=series.provider_id,
+                scheduled_time=start,
+                duration_minutes=series.duration_minutes,
+                notes=series.notes,
+                series=series,
+            )
+            occurrence.refresh_ends_at()
+            occurrences.append(occurrence)
+        occurrences = Appointment.objects.bulk_create(occurrences)
+        reminders.sync(occurrences, created=True)
+    return occurrences
+
+
+def following(pivot: Appointment):
+    """Open occurrences of ``pivot``'s series from ``pivot`` onwards."""
+    return Appointment.objects.filter(
+        series_id=pivot.series_id,
+        scheduled_time__gte=pivot.scheduled_time,
+        status__in=Appointment.OPEN_STATUSES,
+    )
+
+
+def _cancel(pivot: Appointment) -> int:
+    action = PlanAction.CREATE_APPOINTMENT
+    with transaction.atomic():
+        rows = list(following(pivot).select_for_update().values_list("id", "created_at"))
+        updated = Appointment.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            status=Appointment.Status.CANCELLED, updated_at=timezone.now()
+        )
+        # Same rule as billing.signals: only the current month gets slots back.
+        current = sum(
+            1 for _, created_at in rows if is_current_period(pivot.clinic_id, action, created_at)
+        )
+        if current:
+            release(pivot.clinic_id, action, quantity=current)
+        reminders.sync(Appointment.objects.filter(pk__in=[pk for pk, _ in rows]))
+    return updated
+
+
+def update_following(pivot: Appointment, changes: dict) -> int:
+    """Apply ``changes`` to ``pivot`` and the open occurrences after it.
+
+    ``changes`` may hold ``cancel`` (on its own), ``shift_minutes``,
+    ``duration_minutes``, ``provider``, ``service`` and ``notes``. Returns the
+    number of appointments updated.
+    """
+    if changes.get("cancel"):
+        return _cancel(pivot)
+
+    rows = list(
+        following(pivot).values("id", "scheduled_time", "duration_minutes", "provider_id")
+    )
+    if not rows:
+        return 0
+    shift = timedelta(minutes=changes.get("shift_minutes", 0))
+    duration = changes.get("duration_minutes")
+    provider_id = changes["provider"].pk if changes.get("provider") else None
+
+    if shift or duration is not None or "provider" in changes:
+        intervals = defaultdict(list)
+        for row in rows:
+            start = row["scheduled_time"] + shift
+            minutes = duration if duration is not None else row["duration_minutes"]
+            owner = provider_id if "provider" in changes else row["provider_id"]
+            intervals[owner].append((start, start + timedelta(minutes=minutes)))
+        for owner, spans in intervals.items():
+            check_conflicts(
+                pivot.clinic_id,
+                spans,
+                provider_id=owner,
+                patient_id=pivot.patient_id,
+                exclude_ids=[row["id"] for row in rows],
+            )
+
+    values = {"updated_at": timezone.now()}
+    if shift:
+        values["scheduled_time"] = F("scheduled_time") + shift
+        values["ends_at"] = F("ends_at") + shift
+    if duration is not None:
+        values["duration_minutes"] = duration
+        values["ends_at"] = F("scheduled_time") + (shift + timedelta(minutes=duration))
+    if "provider" in changes:
+        values["provider_id"] = provider_id
+    if "service" in changes:
+        values["service"] = changes["service"]
+    if "notes" in changes:
+        values["notes"] = changes["notes"]
+    targets = Appointment.objects.filter(pk__in=[row["id"] for row in rows])
+    with conflict_guard():
+        updated = targets.update(**values)
+        if shift:
+            reminders.sync(targets.only("id", "scheduled_time", "status"))
+    return updated
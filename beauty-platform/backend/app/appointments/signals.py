@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import reminders
+from .models import Appointment
+
+_MISSING = object()
+
+
+@receiver(post_save, sender=Appointment)
+def _sync_reminders(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_loaded_values", {})
+    if created or any(
+        before.get(name, _MISSING) != getattr(instance, name)
+        for name in ("status", "scheduled_time")
+    ):
+        reminders.sync([instance], created=created)
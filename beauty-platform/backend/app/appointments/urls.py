@@ -1,10 +1,19 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from appointments.views import AppointmentViewSet, ProcedureViewSet
+from appointments.views import (
+    AppointmentSeriesViewSet,
+    AppointmentViewSet,
+    ProcedureViewSet,
+    ProviderTimeOffViewSet,
+    ProviderWorkingHoursViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"appointments", AppointmentViewSet, basename="appointments")
+router.register(r"appointment-series", AppointmentSeriesViewSet, basename="appointment-series")
 router.register(r"procedures", ProcedureViewSet, basename="procedures")
+router.register(r"working-hours", ProviderWorkingHoursViewSet, basename="working-hours")
+router.register(r"time-off", ProviderTimeOffViewSet, basename="time-off")
 
 urlpatterns = [path("", include(router.urls))]
@@ -1,26 +1,48 @@
+from contextlib import nullcontext
 from datetime import datetime, time
 
-from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
-from rest_framework import permissions, viewsets
-from rest_framework.exceptions import NotFound
-
-from appointments.models import Appointment, Procedure
-from appointments.serializers import AppointmentSerializer, ProcedureSerializer
-from billing.limits import PlanAction, check_plan_limits
-from clinics.models import Clinic
-
-
-class AppointmentViewSet(viewsets.ModelViewSet):
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from accounts.authentication import get_user_instance
+from appointments.availability import find_free_slots
+from appointments.booking import conflict_guard
+from appointments.calendar import build_calendar
+from appointments.models import (
+    Appointment,
+    AppointmentSeries,
+    Procedure,
+    ProviderTimeOff,
+    ProviderWorkingHours,
+)
+from appointments.serializers import (
+    AppointmentSerializer,
+    AppointmentSeriesSerializer,
+    AvailabilityQuerySerializer,
+    CalendarQuerySerializer,
+    ProcedureSerializer,
+    ProviderTimeOffSerializer,
+    ProviderWorkingHoursSerializer,
+    SeriesFollowingSerializer,
+)
+from appointments.series import update_following
+from billing.entitlements import get_entitlement
+from billing.limits import PlanAction, is_current_period, reservation
+from clinics.tenancy import TenantScopedMixin
+
+
+class AppointmentViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-scheduled_time", "id")
 
     def get_queryset(self):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        queryset = Appointment.objects.filter(clinic=clinic)
+        queryset = super().get_queryset()
 
         status_param = self.request.query_params.get("status")
         if status_param:
@@ -55,28 +77,135 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        clinic_id = self.request.user.clinic_id
-        if not clinic_id:
-            raise NotFound("setup_required")
-        with transaction.atomic():
-            clinic = Clinic.objects.select_for_update().get(pk=clinic_id)
-            check_plan_limits(clinic, PlanAction.CREATE_APPOINTMENT)
-            serializer.save(clinic=clinic)
-
+        clinic_id = self.get_tenant_id()
+        with reservation(clinic_id, PlanAction.CREATE_APPOINTMENT), conflict_guard():
+            serializer.save(clinic_id=clinic_id)
+
+    def perform_update(self, serializer):
+        appointment = serializer.instance
+        cancelled = Appointment.Status.CANCELLED
+        quota_action = PlanAction.CREATE_APPOINTMENT
+        # Restoring a cancelled booking takes its slot back, so it needs room
+        # in the quota like a new one; past months are history (billing.signals).
+        restores = (
+            appointment.status == cancelled
+            and serializer.validated_data.get("status", cancelled) != cancelled
+            and is_current_period(appointment.clinic_id, quota_action, appointment.created_at)
+        )
+        quota = reservation(appointment.clinic_id, quota_action) if restores else nullcontext()
+        with quota, conflict_guard():
+            serializer.save()
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def availability(self, request):
+        """Free slots per provider for ``?start=&end=`` and a service or duration."""
+        params = AvailabilityQuerySerializer(
+            data=request.query_params, context=self.get_serializer_context()
+        )
+        params.is_valid(raise_exception=True)
+        clinic_id = self.get_tenant_id()
+        zone = get_entitlement(clinic_id).zone
+        slots = find_free_slots(
+            clinic_id,
+            params.validated_data["start"],
+            params.validated_data["end"],
+            params.validated_data["duration_minutes"],
+            provider_ids=params.validated_data.get("provider"),
+            step_minutes=params.validated_data["step_minutes"],
+        )
+        return Response(
+            {
+                "timezone": zone.key,
+                "duration_minutes": params.validated_data["duration_minutes"],
+                "providers": [
+                    {
+                        "provider": provider_id,
+                        "slots": [slot.astimezone(zone).isoformat() for slot in starts],
+                    }
+                    for provider_id, starts in slots.items()
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def calendar(self, request):
+        """Columnar day/week grid with provider swimlanes (see appointments.calendar)."""
+        params = CalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(
+            build_calendar(
+                self.get_tenant_id(),
+                params.validated_data["start"],
+                params.validated_data["days"],
+                include_cancelled=params.validated_data["include_cancelled"],
+            )
+        )
+
+
+class AppointmentSeriesViewSet(
+    TenantScopedMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Recurring bookings; creating one books all its occurrences at once."""
+
+    queryset = AppointmentSeries.objects.prefetch_related(
+        Prefetch("occurrences", queryset=Appointment.objects.order_by("scheduled_time", "id"))
+    )
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-created_at", "-id")
 
-class ProcedureViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        serializer.save(
+            clinic_id=self.get_tenant_id(), created_by=get_user_instance(self.request.user)
+        )
+
+    @action(detail=True, methods=["post"])
+    def following(self, request, pk=None):
+        """Change or cancel ``from_appointment`` and the open occurrences after it."""
+        series = self.get_object()
+        params = SeriesFollowingSerializer(
+            data=request.data, context={**self.get_serializer_context(), "series": series}
+        )
+        params.is_valid(raise_exception=True)
+        changes = dict(params.validated_data)
+        pivot = changes.pop("from_appointment")
+        return Response({"updated": update_following(pivot, changes)})
+
+
+class ProcedureViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = Procedure.objects.all()
     serializer_class = ProcedureSerializer
     permission_classes = [permissions.IsAuthenticated]
-
-    def get_queryset(self):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        return Procedure.objects.filter(appointment__clinic=clinic)
+    tenant_field = "appointment__clinic"
+    keyset_ordering = ("created_at", "id")
 
     def perform_create(self, serializer):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        performed_by = serializer.validated_data.get("performed_by") or self.request.user
+        self.get_tenant_id()
+        performed_by = serializer.validated_data.get("performed_by") or get_user_instance(
+            self.request.user
+        )
         serializer.save(performed_by=performed_by)
+
+
+class ProviderWorkingHoursViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = ProviderWorkingHours.objects.all()
+    serializer_class = ProviderWorkingHoursSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("provider", "weekday", "start_time", "id")
+
+    def perform_create(self, serializer):
+        serializer.save(clinic_id=self.get_tenant_id())
+
+
+class ProviderTimeOffViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = ProviderTimeOff.objects.all()
+    serializer_class = ProviderTimeOffSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-starts_at", "id")
+
+    def perform_create(self, serializer):
+        serializer.save(clinic_id=self.get_tenant_id())
@@ -0,0 +1,31 @@
+import time
+from typing import Callable, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+
+def delete_in_batches(
+    queryset: QuerySet,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    before_delete: Optional[Callable[[list], None]] = None,
+) -> int:
+    """Delete ``queryset`` a primary-key chunk at a time, committing each chunk.
+
+    Short transactions keep row locks and WAL bursts small, so a large sweep
+    can run next to live traffic. ``before_delete`` receives each chunk of
+    primary keys first (e.g. to archive the rows).
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            if before_delete is not None:
+                before_delete(ids)
+            deleted += model.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,167 @@
+"""Keyset (seek) pagination for list endpoints.
+
+Pages are addressed by an opaque cursor holding the sort key of the row at
+the page boundary, so the next page is a ``WHERE (key) > (cursor)`` range read
+from a composite index instead of an ``OFFSET`` scan, and there is no
+``COUNT(*)``. Views declare ``keyset_ordering`` (or ``get_keyset_ordering()``
+when it depends on the request); it must consist of non-nullable concrete
+fields and end in a unique one (``id`` is appended otherwise) so every row has
+exactly one position.
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _json_default(value):
+    # Full-precision ISO strings: DjangoJSONEncoder drops microseconds, which
+    # would make a cursor skip or repeat rows that differ only below a ms.
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a cursor.")
+
+
+def _encode(values: list, reverse: bool) -> str:
+    payload = json.dumps({"k": values, "r": int(reverse)}, default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[list, bool]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return list(payload["k"]), bool(payload["r"])
+    except (binascii.Error, KeyError, TypeError, ValueError, UnicodeError):
+        raise NotFound("Invalid cursor.") from None
+
+
+def _split(field: str) -> tuple[str, bool]:
+    return (field[1:], True) if field.startswith("-") else (field, False)
+
+
+def _flip(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def seek(ordering, values) -> Q:
+    """Rows strictly after ``values`` in ``ordering``.
+
+    Expands ``(a, b, c) > (x, y, z)`` into ``a >= x AND (a > x OR (a = x AND
+    (b > y OR ...)))`` so mixed sort directions work and the leading bound
+    still narrows the index range.
+    """
+    condition = None
+    for field, value in reversed(list(zip(ordering, values))):
+        name, descending = _split(field)
+        beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        condition = beyond if condition is None else beyond | (Q(**{name: value}) & condition)
+    name, descending = _split(ordering[0])
+    return Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    default_ordering = ("-id",)
+
+    def get_ordering(self, view) -> list[str]:
+        if hasattr(view, "get_keyset_ordering"):
+            ordering = list(view.get_keyset_ordering())
+        else:
+            ordering = list(getattr(view, "keyset_ordering", self.default_ordering))
+        if _split(ordering[-1])[0] not in {"id", "pk"}:
+            ordering.append("id")
+        return ordering
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE or 50
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.next_cursor = self.previous_cursor = None
+
+        if queryset.query.is_sliced:
+            # Already a bounded top-N (e.g. a ranked search); one page.
+            return list(queryset)
+
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        values, reverse = _decode(cursor) if cursor else (None, False)
+        if values is not None and len(values) != len(ordering):
+            raise NotFound("Invalid cursor.")
+
+        effective = [_flip(field) for field in ordering] if reverse else ordering
+        queryset = queryset.order_by(*effective)
+        if values is not None:
+            queryset = queryset.filter(seek(effective, values))
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if rows:
+            keys = [_split(field)[0] for field in ordering]
+            if has_more or reverse:
+                self.next_cursor = _encode(self._position(rows[-1], keys), False)
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_cursor = _encode(self._position(rows[0], keys), True)
+        return rows
+
+    @staticmethod
+    def _position(row, keys) -> list:
+        return [row.pk if key == "pk" else getattr(row, key) for key in keys]
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
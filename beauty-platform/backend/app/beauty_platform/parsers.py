@@ -0,0 +1,25 @@
+import csv
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """Parse a ``text/csv`` body with a header row into a list of dicts."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            text = stream.read().decode(encoding).lstrip("\ufeff")
+        except UnicodeDecodeError as exc:
+            raise ParseError(f"CSV parse error - {exc}") from exc
+        reader = csv.DictReader(io.StringIO(text))
+        return [
+            {key.strip(): (value or "").strip() for key, value in row.items() if key}
+            for row in reader
+        ]
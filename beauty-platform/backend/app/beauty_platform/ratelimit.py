@@ -0,0 +1,164 @@
+"""Sliding-window rate limiting shared by all worker processes.
+
+Counters live in Redis when ``REDIS_URL`` is configured; otherwise an
+in-process backend is used (tests and local development). A single ``hit``
+call checks every supplied rate and only records the hit when all of them
+still have room, so a blocked request never consumes quota.
+"""
+
+from __future__ import annotations
+
+import logging
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import redis
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rl"
+
+
+@dataclass(frozen=True)
+class Rate:
+    key: str
+    limit: int
+    window_seconds: int
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    counts: tuple[int, ...] = ()
+    blocked_key: Optional[str] = None
+    retry_after: int = 0
+
+
+def rate_key(scope: str, *parts) -> str:
+    """Build a limiter key such as ``rl:otp-request:phone:+98912...``."""
+    cleaned = [str(part) for part in parts if part not in (None, "")]
+    return ":".join([KEY_PREFIX, scope, *cleaned])
+
+
+class MemoryRateLimitBackend:
+    def __init__(self) -> None:
+        self._hits: dict[str, deque[int]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def hit(self, rates: Sequence[Rate], now_ms: int) -> RateLimitResult:
+        with self._lock:
+            counts = []
+            for rate in rates:
+                window_ms = rate.window_seconds * 1000
+                entries = self._hits[rate.key]
+                while entries and entries[0] <= now_ms - window_ms:
+                    entries.popleft()
+                if len(entries) >= rate.limit:
+                    retry_ms = entries[0] + window_ms - now_ms
+                    return RateLimitResult(
+                        allowed=False,
+                        blocked_key=rate.key,
+                        retry_after=max(1, -(-retry_ms // 1000)),
+                    )
+                counts.append(len(entries))
+            for rate in rates:
+                self._hits[rate.key].append(now_ms)
+            return RateLimitResult(allowed=True, counts=tuple(c + 1 for c in counts))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hits.clear()
+
+
+class RedisRateLimitBackend:
+    # KEYS: one sorted set per rate. ARGV: now_ms, member, then (limit, window_ms)
+    # pairs. Old entries are trimmed, every key is checked, and the hit is only
+    # recorded when all keys are under their limit.
+    SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local counts = {}
+for i, key in ipairs(KEYS) do
+  local limit = tonumber(ARGV[1 + i * 2])
+  local window = tonumber(ARGV[2 + i * 2])
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+  local count = redis.call('ZCARD', key)
+  if count >= limit then
+    local retry = window
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+      retry = tonumber(oldest[2]) + window - now
+    end
+    return {0, i, retry}
+  end
+  counts[i] = count
+end
+local result = {1, 0, 0}
+for i, key in ipairs(KEYS) do
+  redis.call('ZADD', key, now, member)
+  redis.call('PEXPIRE', key, tonumber(ARGV[2 + i * 2]))
+  result[#result + 1] = counts[i] + 1
+end
+return result
+"""
+
+    def __init__(self, client: redis.Redis) -> None:
+        self._client = client
+        self._script = client.register_script(self.SCRIPT)
+
+    def hit(self, rates: Sequence[Rate], now_ms: int) -> RateLimitResult:
+        args: list = [now_ms, f"{now_ms}-{secrets.token_hex(4)}"]
+        for rate in rates:
+            args.extend([rate.limit, rate.window_seconds * 1000])
+        try:
+            reply = self._script(keys=[rate.key for rate in rates], args=args)
+        except redis.RedisError:
+            # Fail open: losing the limiter must not take logins down with it.
+            logger.exception("Rate limiter unavailable; allowing request")
+            return RateLimitResult(allowed=True)
+
+        allowed, blocked_index, retry_ms = (int(value) for value in reply[:3])
+        if not allowed:
+            return RateLimitResult(
+                allowed=False,
+                blocked_key=rates[blocked_index - 1].key,
+                retry_after=max(1, -(-retry_ms // 1000)),
+            )
+        return RateLimitResult(allowed=True, counts=tuple(int(c) for c in reply[3:]))
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter(match=f"{KEY_PREFIX}:*"):
+            self._client.delete(key)
+
+
+_memory_backend = MemoryRateLimitBackend()
+
+
+@lru_cache(maxsize=None)
+def _redis_backend(client: redis.Redis) -> RedisRateLimitBackend:
+    return RedisRateLimitBackend(client)
+
+
+def get_backend():
+    client = get_redis()
+    if client is None:
+        return _memory_backend
+    return _redis_backend(client)
+
+
+def hit(*rates: Rate) -> RateLimitResult:
+    """Record one hit against every rate, or none if any of them is exhausted."""
+    if not rates:
+        return RateLimitResult(allowed=True)
+    return get_backend().hit(rates, int(time.time() * 1000))
+
+
+def reset() -> None:
+    get_backend().reset()
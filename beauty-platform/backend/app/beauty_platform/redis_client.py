@@ -0,0 +1,18 @@
+from functools import lru_cache
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def _client_for(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return the shared Redis client, or ``None`` when ``REDIS_URL`` is unset."""
+    url = getattr(settings, "REDIS_URL", None)
+    if not url:
+        return None
+    return _client_for(url)
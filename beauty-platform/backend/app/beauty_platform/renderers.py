@@ -0,0 +1,76 @@
+import csv
+import json
+import re
+from typing import Iterable, Iterator, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+# Spreadsheet apps evaluate cells starting with these; "+"/"-" are only
+# treated as formulas when they are not followed by a plain number.
+_FORMULA = re.compile(r"^[=@\t\r]|^[+-](?![\d\s().]+$)")
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """Row formats sent with ``StreamingHttpResponse(renderer.stream(...))``.
+
+    Content negotiation picks the renderer; ``render`` is only used for
+    responses that are not streamed, such as errors, which are sent as JSON.
+    """
+
+    charset = "utf-8"
+    lines_per_chunk = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+    def lines(self, columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+        raise NotImplementedError
+
+    def stream(self, columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+        """Yield the document in chunks of ``lines_per_chunk`` rows."""
+        chunk = []
+        for line in self.lines(columns, rows):
+            chunk.append(line)
+            if len(chunk) >= self.lines_per_chunk:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, str) and _FORMULA.match(value):
+            return f"'{value}"
+        return value
+
+    def lines(self, columns, rows):
+        writer = csv.writer(_Echo())
+        # The BOM lets Excel detect UTF-8 (Persian names).
+        yield "\ufeff" + writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([self._cell(value) for value in row])
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def lines(self, columns, rows):
+        for row in rows:
+            record = dict(zip(columns, row))
+            yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     "services",
     "appointments",
     "billing",
+    "sync",
 ]
 
 MIDDLEWARE = [
@@ -112,6 +113,17 @@ DATABASES = {
 }
 
 
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -148,6 +160,9 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_URL = "media/"
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / "media"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -160,9 +175,11 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ],
     "EXCEPTION_HANDLER": "beauty_platform.exceptions.api_exception_handler",
+    "DEFAULT_PAGINATION_CLASS": "beauty_platform.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 SIMPLE_JWT = {
@@ -189,6 +206,7 @@ JWT_COOKIE_PATH = os.getenv("JWT_COOKIE_PATH", "/")
 KAVENEGAR_API_KEY = os.getenv("KAVENEGAR_API_KEY")
 KAVENEGAR_LOGIN_TEMPLATE = os.getenv("KAVENEGAR_LOGIN_TEMPLATE")
 KAVENEGAR_RECOVERY_TEMPLATE = os.getenv("KAVENEGAR_RECOVERY_TEMPLATE")
+KAVENEGAR_REMINDER_TEMPLATE = os.getenv("KAVENEGAR_REMINDER_TEMPLATE")
 
 def _int_env(name: str, default: int) -> int:
     raw = os.getenv(name)
@@ -200,9 +218,24 @@ def _int_env(name: str, default: int) -> int:
         return default
 
 
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "98")
+PHONE_LOOKUP_CACHE_SECONDS = _int_env("PHONE_LOOKUP_CACHE_SECONDS", 60)
+
+SMS_PROVIDER = os.getenv("SMS_PROVIDER", "accounts.sms.KavenegarProvider")
+SMS_PROVIDER_MAX_CONCURRENCY = _int_env("SMS_PROVIDER_MAX_CONCURRENCY", 4)
+SMS_MAX_ATTEMPTS = _int_env("SMS_MAX_ATTEMPTS", 5)
+SMS_RETRY_BACKOFF_SECONDS = _int_env("SMS_RETRY_BACKOFF_SECONDS", 2)
+OTP_RETENTION_DAYS = _int_env("OTP_RETENTION_DAYS", 30)
+
 FREE_MAX_STAFF = _int_env("FREE_MAX_STAFF", 5)
 FREE_MAX_PATIENTS = _int_env("FREE_MAX_PATIENTS", 500)
-FREE_MAX_APPOINTMENTS = _int_env("FREE_MAX_APPOINTMENTS", 1000)
+FREE_MAX_APPOINTMENTS_PER_MONTH = _int_env("FREE_MAX_APPOINTMENTS_PER_MONTH", 300)
+
+PATIENT_IMPORT_MAX_BYTES = _int_env("PATIENT_IMPORT_MAX_BYTES", 20 * 1024 * 1024)
+PATIENT_IMPORT_BATCH_SIZE = _int_env("PATIENT_IMPORT_BATCH_SIZE", 1000)
+
+SYNC_SETTLE_SECONDS = _int_env("SYNC_SETTLE_SECONDS", 2)
+SYNC_TOMBSTONE_RETENTION_DAYS = _int_env("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
 
 BITPAY_API_KEY = os.getenv("BITPAY_API_KEY")
 BITPAY_REDIRECT_URL = os.getenv("BITPAY_REDIRECT_URL")
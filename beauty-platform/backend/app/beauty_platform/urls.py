@@ -26,4 +26,5 @@ urlpatterns = [
     path("api/", include("services.urls")),
     path("api/", include("appointments.urls")),
     path("api/", include("billing.urls")),
+    path("api/", include("sync.urls")),
 ]
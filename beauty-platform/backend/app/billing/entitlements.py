@@ -0,0 +1,132 @@
+"""Cached per-clinic billing entitlements.
+
+Quota checks and the billing status endpoint need the clinic's plan, tier,
+subscription status, expiry, latest successful payment and time zone (which
+decides the monthly quota period). That snapshot is read once from the
+database and cached under a per-clinic generation token.
+``invalidate()`` replaces the token, both immediately and again when the
+surrounding transaction commits, so a snapshot built from rows that were
+about to change is written under a dead key and never served. The signals in
+``billing.signals`` invalidate on every ``Subscription``, ``Plan``,
+``Clinic`` and successful ``BillingPayment`` write.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+from clinics.models import Clinic
+
+from .models import BillingPayment, Plan, PlanAction, Subscription
+
+# Bump when the cached fields change so old snapshots are ignored on deploy.
+SNAPSHOT_VERSION = 2
+SNAPSHOT_TTL = 24 * 60 * 60
+
+FREE_LIMIT_SETTINGS = {
+    PlanAction.CREATE_STAFF: "FREE_MAX_STAFF",
+    PlanAction.CREATE_PATIENT: "FREE_MAX_PATIENTS",
+    PlanAction.CREATE_APPOINTMENT: "FREE_MAX_APPOINTMENTS_PER_MONTH",
+}
+
+_PAID_STATUSES = {Subscription.Status.ACTIVE, Subscription.Status.TRIAL}
+
+
+@dataclass(frozen=True)
+class Entitlement:
+    plan: str
+    tier: str
+    status: str
+    expires_at: Optional[date]
+    paid: bool
+    timezone: str = "UTC"
+    invoice_id: str = ""
+    reference_id: str = ""
+
+    @property
+    def zone(self) -> ZoneInfo:
+        try:
+            return ZoneInfo(self.timezone)
+        except (ValueError, ZoneInfoNotFoundError):
+            return ZoneInfo("UTC")
+
+    def limit(self, action: PlanAction | str) -> Optional[int]:
+        """Cap for ``action``, or ``None`` when unlimited."""
+        if self.paid:
+            return None
+        return getattr(settings, FREE_LIMIT_SETTINGS[PlanAction(action)], 0) or None
+
+
+def is_paid(subscription: Optional[Subscription]) -> bool:
+    if not subscription or subscription.status not in _PAID_STATUSES:
+        return False
+    plan = subscription.plan
+    return bool(plan) and plan.tier != Plan.Tier.BASIC and plan.monthly_price > 0
+
+
+def _generation_key(clinic_id) -> str:
+    return f"entitlement-gen:{clinic_id}"
+
+
+def _snapshot_key(clinic_id, generation: str) -> str:
+    return f"entitlement:v{SNAPSHOT_VERSION}:{clinic_id}:{generation}"
+
+
+def _generation(clinic_id) -> str:
+    key = _generation_key(clinic_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def load(clinic_id) -> Entitlement:
+    clinic = Clinic.objects.select_related("subscription__plan").filter(pk=clinic_id).first()
+    try:
+        subscription = clinic.subscription if clinic else None
+    except ObjectDoesNotExist:
+        subscription = None
+    payment = (
+        BillingPayment.objects.filter(clinic_id=clinic_id, status=BillingPayment.Status.SUCCESS)
+        .order_by("-paid_at", "-created_at")
+        .values("invoice_id", "reference_id")
+        .first()
+    ) or {}
+    return Entitlement(
+        plan=subscription.plan.name if subscription else "Free",
+        tier=subscription.plan.tier if subscription else Plan.Tier.BASIC,
+        status=subscription.status if subscription else Subscription.Status.EXPIRED,
+        expires_at=subscription.end_date if subscription else None,
+        paid=is_paid(subscription),
+        timezone=(clinic.timezone if clinic else "") or "UTC",
+        invoice_id=payment.get("invoice_id") or "",
+        reference_id=payment.get("reference_id") or "",
+    )
+
+
+def get_entitlement(clinic_id) -> Entitlement:
+    key = _snapshot_key(clinic_id, _generation(clinic_id))
+    cached = cache.get(key)
+    if cached is not None:
+        return Entitlement(**cached)
+    entitlement = load(clinic_id)
+    cache.set(key, asdict(entitlement), SNAPSHOT_TTL)
+    return entitlement
+
+
+def invalidate(clinic_id) -> None:
+    key = _generation_key(clinic_id)
+    cache.set(key, uuid.uuid4().hex, None)
+    # Readers that loaded the old rows before the commit cached them under the
+    # token set above; rotating again on commit makes those entries unreachable.
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
@@ -1,26 +1,44 @@
+"""Plan quotas backed by per-clinic usage counters.
+
+``ClinicUsage`` holds one counter per clinic and ``PlanAction``. Creating a
+limited object reserves capacity with a single conditional
+``UPDATE ... SET used = used + n WHERE used <= limit - n``, so concurrent
+creates in the same clinic no longer queue on the clinic row or pay for a
+``COUNT(*)``. Counters are created lazily from a one-off count, kept in sync
+by the signals in ``billing.signals`` (which also cover creates and deletes
+outside the API), and can be rebuilt with ``manage.py reconcile_usage``.
+
+Appointments are limited per calendar month in the clinic's own time zone:
+each month gets a fresh counter, and cancelling or deleting an appointment
+gives its slot back only while its month is still current.
+"""
+
 from __future__ import annotations
 
-from enum import Enum
-from typing import Iterable, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time
+from typing import Optional
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import F, Q
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.exceptions import APIException
 
 from appointments.models import Appointment
-from billing.models import Plan, Subscription
+from billing.entitlements import Entitlement, get_entitlement
+from billing.models import ClinicUsage, PlanAction
 from patients.models import Patient
 
 User = get_user_model()
 
+STAFF_ROLES = (User.Role.PRACTITIONER, User.Role.STAFF)
+MONTHLY_ACTIONS = frozenset({PlanAction.CREATE_APPOINTMENT})
 
-class PlanAction(str, Enum):
-    CREATE_STAFF = "CREATE_STAFF"
-    CREATE_PATIENT = "CREATE_PATIENT"
-    CREATE_APPOINTMENT = "CREATE_APPOINTMENT"
+# Creates already counted by ``reservation``: {(clinic_id, action): pending}.
+_reserved: ContextVar[Optional[dict]] = ContextVar("plan_quota_reserved", default=None)
 
 
 class PlanLimitExceeded(APIException):
@@ -29,45 +47,183 @@ class PlanLimitExceeded(APIException):
     default_code = "plan_limit"
 
 
-def _is_paid_plan(subscription: Optional[Subscription]) -> bool:
-    if not subscription:
-        return False
-    if subscription.status not in {Subscription.Status.ACTIVE, Subscription.Status.TRIAL}:
-        return False
-    plan = subscription.plan
-    return plan and plan.tier != Plan.Tier.BASIC and plan.monthly_price > 0
+def plan_limit(clinic_id, action: PlanAction) -> Optional[int]:
+    """Return the clinic's cap for ``action``, or ``None`` when unlimited."""
+    return get_entitlement(clinic_id).limit(action)
 
-def _count_staff(clinic) -> int:
-    staff_roles: Iterable[str] = [User.Role.PRACTITIONER, User.Role.STAFF]
-    queryset: QuerySet[User] = clinic.users.filter(role__in=staff_roles)
-    return queryset.count()
 
+def _next_month(period: date) -> date:
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1)
 
-def check_plan_limits(clinic, action: PlanAction | str) -> None:
-    with transaction.atomic():
-        clinic = type(clinic).objects.select_for_update().get(pk=clinic.pk)
 
+def _period(entitlement: Entitlement, action: PlanAction, at=None) -> Optional[date]:
+    if action not in MONTHLY_ACTIONS:
+        return None
+    return timezone.localtime(at or timezone.now(), entitlement.zone).date().replace(day=1)
+
+
+def period_for(clinic_id, action: PlanAction | str, at=None) -> Optional[date]:
+    """First day of the clinic-local month holding ``at`` (default now).
+
+    ``None`` for actions limited over the clinic's lifetime.
+    """
+    return _period(get_entitlement(clinic_id), PlanAction(action), at)
+
+
+def period_bounds(clinic_id, period: date) -> tuple[datetime, datetime]:
+    zone = get_entitlement(clinic_id).zone
+    return (
+        datetime.combine(period, time.min, tzinfo=zone),
+        datetime.combine(_next_month(period), time.min, tzinfo=zone),
+    )
+
+
+def is_current_period(clinic_id, action: PlanAction | str, at) -> bool:
+    action = PlanAction(action)
+    return action not in MONTHLY_ACTIONS or period_for(clinic_id, action, at) == period_for(
+        clinic_id, action
+    )
+
+
+def count_usage(clinic_id, action: PlanAction, period: Optional[date] = None) -> int:
+    if action == PlanAction.CREATE_STAFF:
+        return User.objects.filter(clinic_id=clinic_id, role__in=STAFF_ROLES).count()
+    if action == PlanAction.CREATE_PATIENT:
+        return Patient.objects.filter(clinic_id=clinic_id).count()
+    start, end = period_bounds(clinic_id, period or period_for(clinic_id, action))
+    return (
+        Appointment.objects.filter(clinic_id=clinic_id, created_at__gte=start, created_at__lt=end)
+        .exclude(status=Appointment.Status.CANCELLED)
+        .count()
+    )
+
+
+def _add(
+    clinic_id, action: PlanAction, period, quantity: int, limit: Optional[int] = None
+) -> bool:
+    counters = ClinicUsage.objects.filter(clinic_id=clinic_id, action=action, period=period)
+    if limit is not None:
+        counters = counters.filter(used__lte=limit - quantity)
+    return bool(counters.update(used=F("used") + quantity, updated_at=timezone.now()))
+
+
+def _ensure_counter(clinic_id, action: PlanAction, period) -> bool:
+    """Create the counter from a full count if missing. Returns True if created."""
+    _, created = ClinicUsage.objects.get_or_create(
+        clinic_id=clinic_id,
+        action=action,
+        period=period,
+        defaults={"used": lambda: count_usage(clinic_id, action, period)},
+    )
+    return created
+
+
+def reserve(clinic_id, action: PlanAction | str, quantity: int = 1) -> None:
+    """Count ``quantity`` new objects against the plan or raise ``PlanLimitExceeded``.
+
+    Must run in the same transaction as the insert so a failed create rolls
+    the reservation back with it.
+    """
+    action = PlanAction(action)
+    entitlement = get_entitlement(clinic_id)
+    limit = entitlement.limit(action)
+    period = _period(entitlement, action)
+    if _add(clinic_id, action, period, quantity, limit):
+        return
+    if _ensure_counter(clinic_id, action, period) and _add(
+        clinic_id, action, period, quantity, limit
+    ):
+        return
+    raise PlanLimitExceeded()
+
+
+def release(clinic_id, action: PlanAction | str, quantity: int = 1, at=None) -> None:
+    """Give back ``quantity`` slots in the period holding ``at`` (default now)."""
+    action = PlanAction(action)
+    ClinicUsage.objects.filter(
+        clinic_id=clinic_id,
+        action=action,
+        period=period_for(clinic_id, action, at),
+        used__gte=quantity,
+    ).update(used=F("used") - quantity, updated_at=timezone.now())
+
+
+@contextmanager
+def reservation(clinic_id, action: PlanAction | str, quantity: int = 1):
+    """Reserve capacity for creates made inside the block.
+
+    The ``post_save`` handlers skip the increment for objects covered by the
+    reservation, so they are not counted twice.
+    """
+    action = PlanAction(action)
+    with transaction.atomic():
+        reserve(clinic_id, action, quantity)
+        pending = dict(_reserved.get() or {})
+        key = (clinic_id, action.value)
+        pending[key] = pending.get(key, 0) + quantity
+        token = _reserved.set(pending)
         try:
-            subscription = clinic.subscription
-        except Subscription.DoesNotExist:
-            subscription = None
-
-        if _is_paid_plan(subscription):
-            return
-
-        action_value = action.value if isinstance(action, Enum) else str(action)
-
-        if action_value == PlanAction.CREATE_STAFF.value:
-            current_total = _count_staff(clinic)
-            plan_limit = getattr(settings, "FREE_MAX_STAFF", 0)
-        elif action_value == PlanAction.CREATE_PATIENT.value:
-            current_total = Patient.objects.filter(clinic=clinic).count()
-            plan_limit = getattr(settings, "FREE_MAX_PATIENTS", 0)
-        elif action_value == PlanAction.CREATE_APPOINTMENT.value:
-            current_total = Appointment.objects.filter(clinic=clinic).count()
-            plan_limit = getattr(settings, "FREE_MAX_APPOINTMENTS", 0)
-        else:
-            return
-
-        if plan_limit and current_total >= plan_limit:
-            raise PlanLimitExceeded()
+            yield
+        finally:
+            _reserved.reset(token)
+
+
+def record_created(clinic_id, action: PlanAction, at=None) -> None:
+    """Count an object created outside a reservation (admin, shell, imports)."""
+    pending = _reserved.get()
+    key = (clinic_id, PlanAction(action).value)
+    if pending and pending.get(key):
+        pending[key] -= 1
+        return
+    _add(clinic_id, action, period_for(clinic_id, action, at), 1)
+
+
+def current_usage(clinic_id) -> list[dict]:
+    """Usage against each limit for the clinic's current period."""
+    entitlement = get_entitlement(clinic_id)
+    periods = {action: _period(entitlement, action) for action in PlanAction}
+    current = Q(period__isnull=True) | Q(period__in={p for p in periods.values() if p})
+    counters = {
+        (usage.action, usage.period): usage.used
+        for usage in ClinicUsage.objects.filter(current, clinic_id=clinic_id)
+    }
+    usage = []
+    for action, period in periods.items():
+        used = counters.get((action.value, period))
+        usage.append(
+            {
+                "action": action.value,
+                "used": count_usage(clinic_id, action, period) if used is None else used,
+                "limit": entitlement.limit(action),
+                "period": period,
+                "resets_at": period_bounds(clinic_id, period)[1] if period else None,
+            }
+        )
+    return usage
+
+
+def reconcile(clinic_id) -> dict[str, tuple[int, int]]:
+    """Reset a clinic's current counters to the true counts.
+
+    Returns ``{action: (old, new)}`` for counters that drifted.
+    """
+    drift = {}
+    with transaction.atomic():
+        existing = {
+            (usage.action, usage.period): usage
+            for usage in ClinicUsage.objects.select_for_update().filter(clinic_id=clinic_id)
+        }
+        for action in PlanAction:
+            period = period_for(clinic_id, action)
+            actual = count_usage(clinic_id, action, period)
+            usage = existing.get((action.value, period))
+            if usage is None:
+                ClinicUsage.objects.create(
+                    clinic_id=clinic_id, action=action, period=period, used=actual
+                )
+                drift[action.value] = (None, actual)
+            elif usage.used != actual:
+                drift[action.value] = (usage.used, actual)
+                usage.used = actual
+                usage.save(update_fields=["used", "updated_at"])
+    return drift
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from billing.limits import reconcile
+from clinics.models import Clinic
+
+
+class Command(BaseCommand):
+    help = "Recount plan usage counters from the source tables and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clinic", type=int, action="append", dest="clinics")
+
+    def handle(self, *args, **options):
+        clinic_ids = options["clinics"] or Clinic.objects.values_list("pk", flat=True).iterator()
+        checked = fixed = 0
+        for clinic_id in clinic_ids:
+            checked += 1
+            drift = reconcile(clinic_id)
+            if drift:
+                fixed += 1
+                for action, (old, new) in sorted(drift.items()):
+                    self.stdout.write(f"clinic={clinic_id} {action}: {old} -> {new}")
+        self.stdout.write(f"Checked {checked} clinic(s), corrected {fixed}.")
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_billingpayment"),
+        ("clinics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClinicUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("CREATE_STAFF", "Create staff"),
+                            ("CREATE_PATIENT", "Create patient"),
+                            ("CREATE_APPOINTMENT", "Create appointment"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("used", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage_counters",
+                        to="clinics.clinic",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="clinicusage",
+            constraint=models.UniqueConstraint(
+                fields=("clinic", "action"),
+                name="billing_clinicusage_clinic_action_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+def drop_lifetime_appointment_counters(apps, schema_editor):
+    # Appointments are now counted per month; the new counters are built
+    # lazily on first use.
+    ClinicUsage = apps.get_model("billing", "ClinicUsage")
+    ClinicUsage.objects.filter(
+        action="CREATE_APPOINTMENT", period__isnull=True
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0004_clinic_usage"),
+        ("clinics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="clinicusage",
+            name="billing_clinicusage_clinic_action_unique",
+        ),
+        migrations.AddField(
+            model_name="clinicusage",
+            name="period",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            drop_lifetime_appointment_counters, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="clinicusage",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("period__isnull", True)),
+                fields=("clinic", "action"),
+                name="billing_clinicusage_clinic_action_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="clinicusage",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("period__isnull", False)),
+                fields=("clinic", "action", "period"),
+                name="billing_clinicusage_clinic_action_period_unique",
+            ),
+        ),
+    ]
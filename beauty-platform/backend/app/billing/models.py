@@ -165,3 +165,46 @@ class BillingPayment(models.Model):
                 "updated_at",
             ]
         )
+
+
+class PlanAction(models.TextChoices):
+    CREATE_STAFF = "CREATE_STAFF", "Create staff"
+    CREATE_PATIENT = "CREATE_PATIENT", "Create patient"
+    CREATE_APPOINTMENT = "CREATE_APPOINTMENT", "Create appointment"
+
+
+class ClinicUsage(models.Model):
+    """Running count of quota-limited objects per clinic and action.
+
+    Monthly actions keep one row per calendar month, ``period`` being the
+    first day of that month in the clinic's time zone; lifetime actions
+    have ``period=None``.
+    """
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="usage_counters",
+    )
+    action = models.CharField(max_length=32, choices=PlanAction.choices)
+    period = models.DateField(null=True, blank=True)
+    used = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["clinic", "action"],
+                condition=models.Q(period__isnull=True),
+                name="billing_clinicusage_clinic_action_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["clinic", "action", "period"],
+                condition=models.Q(period__isnull=False),
+                name="billing_clinicusage_clinic_action_period_unique",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        period = f" {self.period:%Y-%m}" if self.period else ""
+        return f"{self.clinic_id} {self.action}{period}: {self.used}"
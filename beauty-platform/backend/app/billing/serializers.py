@@ -101,25 +101,27 @@ class BillingStatusSerializer(serializers.Serializer):
     reference_id = serializers.CharField(allow_blank=True)
 
     @classmethod
-    def from_subscription(
-        cls, subscription: Subscription | None, payment: BillingPayment | None
-    ):
-        plan_name = subscription.plan.name if subscription else "Free"
-        plan_tier = subscription.plan.tier if subscription else Plan.Tier.BASIC
-        status = subscription.status if subscription else Subscription.Status.EXPIRED
-        expires_at = subscription.end_date if subscription else None
+    def from_entitlement(cls, entitlement):
         return cls(
             {
-                "plan": plan_name,
-                "tier": plan_tier,
-                "status": status,
-                "plan_expires_at": expires_at,
-                "invoice_id": payment.invoice_id if payment else "",
-                "reference_id": payment.reference_id if payment else "",
+                "plan": entitlement.plan,
+                "tier": entitlement.tier,
+                "status": entitlement.status,
+                "plan_expires_at": entitlement.expires_at,
+                "invoice_id": entitlement.invoice_id,
+                "reference_id": entitlement.reference_id,
             }
         )
 
 
+class PlanUsageSerializer(serializers.Serializer):
+    action = serializers.CharField()
+    used = serializers.IntegerField()
+    limit = serializers.IntegerField(allow_null=True)
+    period = serializers.DateField(allow_null=True)
+    resets_at = serializers.DateTimeField(allow_null=True)
+
+
 def activate_subscription(clinic, plan: Plan) -> Subscription:
     start_date = timezone.now().date()
     end_date = start_date + timedelta(days=30)
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from appointments.models import Appointment
+from clinics.models import Clinic
+from patients.models import Patient
+
+from . import entitlements
+from .limits import STAFF_ROLES, is_current_period, record_created, release
+from .models import BillingPayment, Plan, PlanAction, Subscription
+
+User = get_user_model()
+
+@receiver(post_save, sender=Patient)
+def _count_patient_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.clinic_id:
+        record_created(instance.clinic_id, PlanAction.CREATE_PATIENT)
+
+
+@receiver(post_delete, sender=Patient)
+def _count_patient_deleted(sender, instance, **kwargs):
+    if instance.clinic_id:
+        release(instance.clinic_id, PlanAction.CREATE_PATIENT)
+
+
+@receiver(post_save, sender=Appointment)
+def _count_appointment_changes(sender, instance, created, raw=False, **kwargs):
+    if raw or not instance.clinic_id:
+        return
+    action = PlanAction.CREATE_APPOINTMENT
+    if created:
+        record_created(instance.clinic_id, action, at=instance.created_at)
+        return
+    previous = getattr(instance, "_loaded_values", {}).get("status")
+    cancelled = Appointment.Status.CANCELLED
+    if previous is None or (previous == cancelled) == (instance.status == cancelled):
+        return
+    # Only the current month's allowance moves; closed months are history.
+    if not is_current_period(instance.clinic_id, action, instance.created_at):
+        return
+    if instance.status == cancelled:
+        release(instance.clinic_id, action, at=instance.created_at)
+    else:
+        record_created(instance.clinic_id, action, at=instance.created_at)
+
+
+@receiver(post_delete, sender=Appointment)
+def _count_appointment_deleted(sender, instance, **kwargs):
+    action = PlanAction.CREATE_APPOINTMENT
+    if (
+        instance.clinic_id
+        and instance.status != Appointment.Status.CANCELLED
+        and is_current_period(instance.clinic_id, action, instance.created_at)
+    ):
+        release(instance.clinic_id, action, at=instance.created_at)
+
+
+def _staff_clinic(role, clinic_id):
+    return clinic_id if role in STAFF_ROLES else None
+
+
+@receiver(post_save, sender=User)
+def _count_staff_changes(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = {} if created else getattr(instance, "_loaded_values", {})
+    if not created and not {"role", "clinic_id"} <= loaded.keys():
+        return  # previous state unknown (deferred load); left to reconcile_usage
+    before = _staff_clinic(loaded.get("role"), loaded.get("clinic_id"))
+    after = _staff_clinic(instance.role, instance.clinic_id)
+    if before == after:
+        return
+    if before:
+        release(before, PlanAction.CREATE_STAFF)
+    if after:
+        record_created(after, PlanAction.CREATE_STAFF)
+
+
+@receiver(post_delete, sender=User)
+def _count_staff_deleted(sender, instance, **kwargs):
+    clinic_id = _staff_clinic(instance.role, instance.clinic_id)
+    if clinic_id:
+        release(clinic_id, PlanAction.CREATE_STAFF)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def _subscription_changed(sender, instance, **kwargs):
+    entitlements.invalidate(instance.clinic_id)
+
+
+@receiver(post_save, sender=Clinic)
+def _clinic_changed(sender, instance, created, **kwargs):
+    if not created:
+        entitlements.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Plan)
+def _plan_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    clinic_ids = Subscription.objects.filter(plan=instance).values_list("clinic_id", flat=True)
+    for clinic_id in clinic_ids.iterator():
+        entitlements.invalidate(clinic_id)
+
+
+@receiver(post_save, sender=BillingPayment)
+def _payment_changed(sender, instance, **kwargs):
+    if instance.status == BillingPayment.Status.SUCCESS:
+        entitlements.invalidate(instance.clinic_id)
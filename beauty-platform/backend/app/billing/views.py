@@ -3,17 +3,20 @@ from typing import ClassVar
 
 import requests
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.permissions import IsClinicOwner
+from clinics.tenancy import TenantScopedMixin
+from .entitlements import get_entitlement
+from .limits import current_usage
 from .models import BillingPayment
 from .serializers import (
     BillingStatusSerializer,
     CreateCheckoutSerializer,
+    PlanUsageSerializer,
     activate_subscription,
 )
 
@@ -21,14 +24,11 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 
 
-class CreateCheckoutView(APIView):
+class CreateCheckoutView(TenantScopedMixin, APIView):
     permission_classes: ClassVar[tuple] = (permissions.IsAuthenticated, IsClinicOwner)
 
     def post(self, request):
-        try:
-            clinic = request.user.clinic
-        except ObjectDoesNotExist:
-            clinic = None
+        clinic = request.tenant
         if not clinic:
             return Response({"detail": "setup_required"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -154,25 +154,23 @@ class BitPayWebhookView(APIView):
         return self.post(request)
 
 
-class BillingStatusView(APIView):
+class BillingStatusView(TenantScopedMixin, APIView):
     permission_classes: ClassVar[tuple] = (permissions.IsAuthenticated, IsClinicOwner)
 
     def get(self, request):
-        try:
-            clinic = request.user.clinic
-        except ObjectDoesNotExist:
-            clinic = None
-        if not clinic:
+        if not request.tenant_id:
             return Response({"detail": "setup_required"}, status=status.HTTP_404_NOT_FOUND)
 
-        try:
-            subscription = clinic.subscription
-        except ObjectDoesNotExist:
-            subscription = None
-        latest_payment = (
-            clinic.billing_payments.filter(status=BillingPayment.Status.SUCCESS)
-            .order_by("-paid_at", "-created_at")
-            .first()
-        )
-        serializer = BillingStatusSerializer.from_subscription(subscription, latest_payment)
+        serializer = BillingStatusSerializer.from_entitlement(get_entitlement(request.tenant_id))
+        return Response(serializer.data)
+
+
+class BillingUsageView(TenantScopedMixin, APIView):
+    permission_classes: ClassVar[tuple] = (permissions.IsAuthenticated, IsClinicOwner)
+
+    def get(self, request):
+        if not request.tenant_id:
+            return Response({"detail": "setup_required"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = PlanUsageSerializer(current_usage(request.tenant_id), many=True)
         return Response(serializer.data)
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 
+from accounts.phone import InvalidPhoneNumber, normalize_phone_number
+
 from .models import Clinic
 
 User = get_user_model()
@@ -39,3 +42,86 @@ class StaffSerializer(serializers.ModelSerializer):
             "clinic",
         ]
         read_only_fields = ["id", "clinic", "role"]
+
+    def validate_phone_number(self, value: str) -> str:
+        if not value:
+            return value
+        try:
+            normalized = normalize_phone_number(value)
+        except InvalidPhoneNumber as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+        duplicates = User.objects.filter(phone_number=normalized)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("A user with this phone number already exists.")
+        return normalized
+
+
+class StaffBulkRowSerializer(serializers.Serializer):
+    """One row of a bulk staff upload.
+
+    Uniqueness is checked for the whole batch at once by
+    ``validate_staff_rows`` rather than per row.
+    """
+
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    email = serializers.EmailField()
+    phone_number = serializers.CharField(max_length=32, required=False, allow_blank=True)
+
+    def validate_phone_number(self, value: str) -> str:
+        if not value:
+            return value
+        try:
+            return normalize_phone_number(value)
+        except InvalidPhoneNumber as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+
+
+_UNIQUE_STAFF_FIELDS = {
+    "username": "A user with that username already exists.",
+    "email": "A user with this email already exists.",
+    "phone_number": "A user with this phone number already exists.",
+}
+
+
+def validate_staff_rows(rows) -> tuple[list[dict], list[dict]]:
+    """Validate a batch of staff rows with one query per unique field.
+
+    Returns ``(valid_rows, errors)`` where each error is
+    ``{"row": index, "errors": {field: [messages]}}``.
+    """
+    row_errors: dict[int, dict] = {}
+    cleaned: list[tuple[int, dict]] = []
+    for index, row in enumerate(rows):
+        serializer = StaffBulkRowSerializer(data=row)
+        if serializer.is_valid():
+            cleaned.append((index, serializer.validated_data))
+        else:
+            row_errors[index] = dict(serializer.errors)
+
+    for field, message in _UNIQUE_STAFF_FIELDS.items():
+        values = {data[field] for _, data in cleaned if data.get(field)}
+        if not values:
+            continue
+        taken = set(
+            User.objects.filter(**{f"{field}__in": values}).values_list(field, flat=True)
+        )
+        seen: set[str] = set()
+        for index, data in cleaned:
+            value = data.get(field)
+            if not value:
+                continue
+            if value in taken:
+                row_errors.setdefault(index, {}).setdefault(field, []).append(message)
+            elif value in seen:
+                row_errors.setdefault(index, {}).setdefault(field, []).append(
+                    f"Duplicate {field} in this upload."
+                )
+            seen.add(value)
+
+    valid = [data for index, data in cleaned if index not in row_errors]
+    errors = [{"row": index, "errors": row_errors[index]} for index in sorted(row_errors)]
+    return valid, errors
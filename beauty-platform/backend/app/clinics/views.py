@@ -1,15 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from rest_framework import permissions, status, viewsets
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.authentication import get_user_instance
+from accounts.directory import invalidate_phones
 from accounts.permissions import IsClinicOwner
-from billing.limits import PlanAction, check_plan_limits
+from beauty_platform.parsers import CSVParser
+from billing.limits import PlanAction, reservation, reserve
 
-from .models import Clinic
-from .serializers import ClinicSerializer, StaffSerializer
+from .serializers import ClinicSerializer, StaffSerializer, validate_staff_rows
+from .tenancy import TenantScopedMixin
+
+STAFF_BULK_MAX_ROWS = 500
 
 User = get_user_model()
 
@@ -18,7 +25,7 @@ class ClinicView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        if request.user.clinic:
+        if request.user.clinic_id:
             return Response(
                 {"detail": "Clinic already assigned."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -26,27 +33,28 @@ class ClinicView(APIView):
         serializer = ClinicSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        owner = get_user_instance(request.user)
         with transaction.atomic():
-            clinic = serializer.save(owner=request.user)
-            request.user.clinic = clinic
-            request.user.role = User.Role.CLINIC_OWNER
-            request.user.save(update_fields=["clinic", "role"])
+            clinic = serializer.save(owner=owner)
+            owner.clinic = clinic
+            owner.role = User.Role.CLINIC_OWNER
+            owner.save(update_fields=["clinic", "role"])
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class MyClinicView(APIView):
+class MyClinicView(TenantScopedMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        clinic = request.user.clinic
+        clinic = request.tenant
         if not clinic:
             return Response({"detail": "setup_required"}, status=status.HTTP_400_BAD_REQUEST)
         serializer = ClinicSerializer(clinic)
         return Response(serializer.data)
 
     def put(self, request):
-        clinic = request.user.clinic
+        clinic = request.tenant
         if not clinic:
             return Response({"detail": "setup_required"}, status=status.HTTP_404_NOT_FOUND)
         if clinic.owner_id != request.user.id:
@@ -57,29 +65,73 @@ class MyClinicView(APIView):
         return Response(serializer.data)
 
 
-class StaffViewSet(viewsets.ModelViewSet):
+class StaffViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = User.objects.filter(role__in=[User.Role.PRACTITIONER, User.Role.STAFF])
     serializer_class = StaffSerializer
     permission_classes = [permissions.IsAuthenticated, IsClinicOwner]
-
-    def get_queryset(self):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        return User.objects.filter(
-            clinic=clinic,
-            role__in=[User.Role.PRACTITIONER, User.Role.STAFF],
-        )
+    keyset_ordering = ("id",)
 
     def perform_create(self, serializer):
-        clinic_id = self.request.user.clinic_id
-        if not clinic_id:
-            raise NotFound("setup_required")
-        with transaction.atomic():
-            clinic = Clinic.objects.select_for_update().get(pk=clinic_id)
-            check_plan_limits(clinic, PlanAction.CREATE_STAFF)
-            serializer.save(clinic=clinic)
+        clinic_id = self.get_tenant_id()
+        with reservation(clinic_id, PlanAction.CREATE_STAFF):
+            serializer.save(clinic_id=clinic_id)
 
     def perform_update(self, serializer):
-        if not self.request.user.clinic:
-            raise NotFound("setup_required")
-        serializer.save(clinic=self.request.user.clinic)
+        serializer.save(clinic_id=self.get_tenant_id())
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[JSONParser, CSVParser, MultiPartParser],
+    )
+    def bulk(self, request):
+        """Create many staff members from a JSON array or CSV in one request.
+
+        Nothing is created unless every row is valid and the whole batch fits
+        the plan's staff quota.
+        """
+        clinic_id = self.get_tenant_id()
+        rows = self._bulk_rows(request)
+        if not rows:
+            raise ValidationError({"detail": "No staff rows provided."})
+        if len(rows) > STAFF_BULK_MAX_ROWS:
+            raise ValidationError(
+                {"detail": f"At most {STAFF_BULK_MAX_ROWS} staff can be added at once."}
+            )
+
+        valid, errors = validate_staff_rows(rows)
+        if errors:
+            return Response(
+                {"detail": "Some rows are invalid.", "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        users = []
+        for data in valid:
+            user = User(clinic_id=clinic_id, role=User.Role.STAFF, **data)
+            user.set_unusable_password()
+            users.append(user)
+
+        with transaction.atomic():
+            reserve(clinic_id, PlanAction.CREATE_STAFF, quantity=len(users))
+            created = User.objects.bulk_create(users)
+        # bulk_create skips post_save, so drop cached "no such phone" lookups here.
+        invalidate_phones(user.phone_number for user in created)
+
+        return Response(
+            {"count": len(created), "created": StaffSerializer(created, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @staticmethod
+    def _bulk_rows(request) -> list:
+        upload = request.FILES.get("file") if request.FILES else None
+        if upload is not None:
+            return CSVParser().parse(upload)
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get("staff", [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValidationError({"detail": "Expected a list of staff rows."})
+        return data
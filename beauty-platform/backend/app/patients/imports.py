@@ -0,0 +1,298 @@
+"""Background import of patient spreadsheets.
+
+An upload is stored as a ``PatientImport`` row and returns immediately;
+``run_patient_imports`` workers claim queued jobs with ``SELECT ... FOR UPDATE
+SKIP LOCKED``. The file is streamed (CSV through ``csv.reader``, XLSX through
+openpyxl's read-only mode) and handled in batches of
+``PATIENT_IMPORT_BATCH_SIZE`` rows. Each batch is validated in Python,
+deduplicated against the clinic's existing patients with one query, then
+reserves plan capacity once and is inserted with ``bulk_create`` in a single
+transaction. Progress counters are updated after every batch, and rejected or
+skipped rows are written to a CSV error report attached to the job.
+
+A job whose worker died is claimed again once its lease runs out and starts
+from the first row; patients created by the earlier attempt are then
+reported as existing duplicates.
+"""
+
+import csv
+import io
+import logging
+import tempfile
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from billing.limits import PlanAction, PlanLimitExceeded, reserve
+
+from .models import Patient, PatientImport
+from .search import phone_digits
+from .serializers import PatientImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+# Jobs still RUNNING this long after their last batch are treated as abandoned.
+CLAIM_LEASE = timedelta(minutes=5)
+REQUIRED_COLUMNS = ("first_name", "last_name", "phone_number")
+HEADER_ALIASES = {
+    "first_name": "first_name",
+    "firstname": "first_name",
+    "name": "first_name",
+    "نام": "first_name",
+    "last_name": "last_name",
+    "lastname": "last_name",
+    "surname": "last_name",
+    "family": "last_name",
+    "نام_خانوادگی": "last_name",
+    "phone_number": "phone_number",
+    "phone": "phone_number",
+    "mobile": "phone_number",
+    "تلفن": "phone_number",
+    "موبایل": "phone_number",
+    "email": "email",
+    "date_of_birth": "date_of_birth",
+    "birth_date": "date_of_birth",
+    "dob": "date_of_birth",
+    "gender": "gender",
+    "notes": "notes",
+}
+REPORT_HEADER = ("row", "phone_number", "result", "message")
+EXISTING_MESSAGE = "A patient with this phone number already exists."
+REPEATED_MESSAGE = "Duplicate phone number in this file."
+
+
+class ImportFailed(Exception):
+    """The upload as a whole cannot be processed."""
+
+
+def _column(value) -> str | None:
+    key = str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return HEADER_ALIASES.get(key)
+
+
+def _columns(header) -> list:
+    columns = [_column(value) for value in header or ()]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ImportFailed(f"Missing columns: {', '.join(missing)}.")
+    return columns
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _csv_rows(handle):
+    reader = csv.reader(io.TextIOWrapper(handle, encoding="utf-8-sig", newline=""))
+    columns = _columns(next(reader, None))
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, {
+                key: value.strip() for key, value in zip(columns, values) if key
+            }
+
+
+def _xlsx_rows(handle):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFailed("Excel imports need the openpyxl package.") from exc
+    workbook = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        columns = _columns(next(rows, None))
+        for number, values in enumerate(rows, start=2):
+            cells = [_cell(value) for value in values]
+            if any(cells):
+                yield number, {key: value for key, value in zip(columns, cells) if key}
+    finally:
+        workbook.close()
+
+
+def iter_rows(job: PatientImport):
+    """Yield ``(row_number, {column: text})`` from the job's upload."""
+    with job.source.open("rb") as handle:
+        if job.file_format == PatientImport.Format.XLSX:
+            yield from _xlsx_rows(handle)
+        else:
+            yield from _csv_rows(handle)
+
+
+def count_rows(job: PatientImport) -> int | None:
+    try:
+        return sum(1 for _ in iter_rows(job))
+    except ImportFailed:
+        return None
+
+
+def _message(errors) -> str:
+    parts = []
+    for field, messages in errors.items():
+        text = "; ".join(str(message) for message in messages)
+        parts.append(text if field == "non_field_errors" else f"{field}: {text}")
+    return " | ".join(parts)
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.created = self.duplicates = self.errors = 0
+        self.report: list[tuple] = []
+
+    def reject(self, number, phone, result, message) -> None:
+        if result == "duplicate":
+            self.duplicates += 1
+        else:
+            self.errors += 1
+        self.report.append((number, phone, result, message))
+
+
+def _insert(clinic_id, candidates, seen: set, batch: _Batch) -> None:
+    keys = {key for _, key, _ in candidates}
+    existing = set(
+        Patient.objects.filter(clinic_id=clinic_id, phone_digits__in=keys).values_list(
+            "phone_digits", flat=True
+        )
+    )
+    patients = []
+    for number, key, data in candidates:
+        if key in existing:
+            batch.reject(number, data["phone_number"], "duplicate", EXISTING_MESSAGE)
+        elif key in seen:
+            batch.reject(number, data["phone_number"], "duplicate", REPEATED_MESSAGE)
+        else:
+            seen.add(key)
+            patient = Patient(clinic_id=clinic_id, **data)
+            patient.refresh_search_fields()
+            patients.append(patient)
+    if patients:
+        with transaction.atomic():
+            reserve(clinic_id, PlanAction.CREATE_PATIENT, quantity=len(patients))
+            Patient.objects.bulk_create(patients)
+    batch.created = len(patients)
+
+
+def import_batch(clinic_id, rows, seen: set) -> _Batch:
+    """Validate, deduplicate and insert one batch of ``(row_number, data)``."""
+    batch = _Batch()
+    candidates = []
+    for number, data in rows:
+        serializer = PatientImportRowSerializer(data=data)
+        if not serializer.is_valid():
+            phone = data.get("phone_number", "")
+            batch.reject(number, phone, "error", _message(serializer.errors))
+            continue
+        validated = dict(serializer.validated_data)
+        candidates.append((number, phone_digits(validated["phone_number"]), validated))
+
+    try:
+        _insert(clinic_id, candidates, set(seen), batch)
+    except IntegrityError:
+        # A patient with one of these numbers was created concurrently; the
+        # transaction rolled back, so check against the table again.
+        batch.report = [line for line in batch.report if line[2] != "duplicate"]
+        batch.duplicates = 0
+        _insert(clinic_id, candidates, set(seen), batch)
+    seen.update(key for _, key, _ in candidates)
+    batch.report.sort(key=lambda line: line[0])
+    return batch
+
+
+def claim_next() -> PatientImport | None:
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            PatientImport.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=PatientImport.Status.QUEUED)
+                | Q(status=PatientImport.Status.RUNNING, lease_expires_at__lt=now)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = PatientImport.Status.RUNNING
+        job.started_at = now
+        job.lease_expires_at = now + CLAIM_LEASE
+        job.processed_rows = job.created_count = job.duplicate_count = job.error_count = 0
+        job.detail = ""
+        job.save()
+    return job
+
+
+def _progress(job: PatientImport, rows: int, batch: _Batch) -> None:
+    job.processed_rows += rows
+    job.created_count += batch.created
+    job.duplicate_count += batch.duplicates
+    job.error_count += batch.errors
+    job.lease_expires_at = timezone.now() + CLAIM_LEASE
+    job.save(
+        update_fields=[
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "error_count",
+            "lease_expires_at",
+            "updated_at",
+        ]
+    )
+
+
+def run_import(job: PatientImport, batch_size: int | None = None) -> PatientImport:
+    batch_size = batch_size or settings.PATIENT_IMPORT_BATCH_SIZE
+    seen: set[str] = set()
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as report:
+        writer = csv.writer(report)
+        report.write("\ufeff")  # lets Excel detect UTF-8
+        writer.writerow(REPORT_HEADER)
+        try:
+            job.total_rows = count_rows(job)
+            job.save(update_fields=["total_rows", "updated_at"])
+            rows = iter_rows(job)
+            while chunk := list(islice(rows, batch_size)):
+                try:
+                    batch = import_batch(job.clinic_id, chunk, seen)
+                except PlanLimitExceeded:
+                    for number, data in chunk:
+                        phone = data.get("phone_number", "")
+                        writer.writerow((number, phone, "error", "Plan limit reached."))
+                    job.error_count += len(chunk)
+                    raise ImportFailed(PlanLimitExceeded.default_detail)
+                writer.writerows(batch.report)
+                _progress(job, len(chunk), batch)
+            job.status = PatientImport.Status.COMPLETED
+        except ImportFailed as exc:
+            job.status = PatientImport.Status.FAILED
+            job.detail = str(exc)[:255]
+        except Exception:
+            logger.exception("Patient import failed import_id=%s", job.pk)
+            job.status = PatientImport.Status.FAILED
+            job.detail = "internal_error"
+        if job.duplicate_count or job.error_count:
+            report.seek(0)
+            job.error_report.save(f"import-{job.pk}-report.csv", File(report), save=False)
+    job.finished_at = timezone.now()
+    job.lease_expires_at = None
+    job.save()
+    logger.info(
+        "Patient import finished import_id=%s status=%s created=%s duplicates=%s errors=%s",
+        job.pk,
+        job.status,
+        job.created_count,
+        job.duplicate_count,
+        job.error_count,
+    )
+    return job
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from patients.models import Patient
+from patients.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized patient visit and spend figures from appointments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clinic", type=int, action="append", dest="clinics")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        patients = Patient.objects.order_by("pk")
+        if options["clinics"]:
+            patients = patients.filter(clinic_id__in=options["clinics"])
+        batch_size = max(1, options["batch_size"])
+        updated = 0
+        batch = []
+        for pk in patients.values_list("pk", flat=True).iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                updated += rebuild(Patient.objects.filter(pk__in=batch))
+                batch = []
+        if batch:
+            updated += rebuild(Patient.objects.filter(pk__in=batch))
+        self.stdout.write(f"Rebuilt stats for {updated} patient(s).")
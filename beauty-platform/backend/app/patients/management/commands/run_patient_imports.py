@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from patients.imports import claim_next, run_import
+
+
+class Command(BaseCommand):
+    help = "Process queued patient imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument(
+            "--once", action="store_true", help="Process the queued imports and exit."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                job = claim_next()
+                if job is not None:
+                    job = run_import(job, batch_size=options["batch_size"])
+                    self.stdout.write(
+                        f"Import {job.pk}: {job.status} "
+                        f"(created={job.created_count}, duplicates={job.duplicate_count}, "
+                        f"errors={job.error_count})"
+                    )
+                    continue
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,104 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:14
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copies of patients.search.build_search_text and phone_digits (with
+# the phone normalizer from accounts.phone) as of this migration; later edits
+# to the live helpers must not change what it does.
+_CHAR_MAP = str.maketrans(
+    {
+        "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+        "\u0649": "\u06cc",  # alef maksura
+        "\u0626": "\u06cc",  # yeh with hamza
+        "\u0643": "\u06a9",  # Arabic kaf -> Persian keheh
+        "\u0629": "\u0647",  # teh marbuta
+        "\u06c0": "\u0647",  # heh with yeh
+        "\u0623": "\u0627",  # alef with hamza above
+        "\u0625": "\u0627",  # alef with hamza below
+        "\u0622": "\u0627",  # alef with madda
+        "\u0671": "\u0627",  # alef wasla
+        "\u0640": None,  # tatweel
+        "\u200c": None,  # zero-width non-joiner
+        "\u200d": None,  # zero-width joiner
+        **{chr(0x06F0 + i): str(i) for i in range(10)},
+        **{chr(0x0660 + i): str(i) for i in range(10)},
+    }
+)
+_WHITESPACE = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_text(value):
+    value = unicodedata.normalize("NFKC", value or "").translate(_CHAR_MAP)
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(" ", value).strip().casefold()
+
+
+def normalize_phone_number(value):
+    raw = (value or "").translate(_CHAR_MAP).strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = "98" + digits[1:]
+    elif len(digits) == 10 and digits.startswith("9"):
+        digits = "98" + digits
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def phone_digits(value):
+    value = normalize_phone_number(value) or value
+    return _NON_DIGITS.sub("", normalize_text(value))
+
+
+def build_search_text(*parts):
+    return normalize_text(" ".join(part for part in parts if part))
+
+
+def fill_search_columns(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    patients = Patient.objects.only(
+        "id", "first_name", "last_name", "email", "phone_number"
+    )
+    batch = []
+    for patient in patients.iterator(chunk_size=2000):
+        patient.search_text = build_search_text(
+            patient.first_name, patient.last_name, patient.email
+        )
+        patient.phone_digits = phone_digits(patient.phone_number)
+        batch.append(patient)
+        if len(batch) >= 2000:
+            Patient.objects.bulk_update(batch, ["search_text", "phone_digits"])
+            batch = []
+    if batch:
+        Patient.objects.bulk_update(batch, ["search_text", "phone_digits"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="phone_digits",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
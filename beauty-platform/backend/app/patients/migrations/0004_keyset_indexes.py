@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+        ("patients", "0003_patient_search_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="patient",
+            name="patients_pa_last_na_1b32a7_idx",
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "last_name", "first_name", "id"],
+                name="patient_clinic_name_id",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+        ("patients", "0005_patient_import"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "updated_at"], name="patient_clinic_updated"
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:23
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_engagement_stats(apps, schema_editor):
+    """Compute the new columns from the historical appointment and procedure rows."""
+    Patient = apps.get_model("patients", "Patient")
+    Appointment = apps.get_model("appointments", "Appointment")
+    Procedure = apps.get_model("appointments", "Procedure")
+    completed = (
+        Appointment.objects.filter(patient=OuterRef("pk"), status="COMPLETED")
+        .order_by()
+        .values("patient")
+    )
+    spend = (
+        Procedure.objects.filter(appointment__patient=OuterRef("pk"))
+        .order_by()
+        .values("appointment__patient")
+        .annotate(total=Sum("price"))
+        .values("total")
+    )
+    expressions = {
+        "completed_visits": Coalesce(
+            Subquery(completed.annotate(visits=Count("pk")).values("visits")),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        "last_visit_at": Subquery(
+            completed.annotate(last=Max("scheduled_time")).values("last")
+        ),
+        "lifetime_value": Coalesce(
+            Subquery(spend),
+            Decimal("0.00"),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
+    ids = Patient.objects.order_by("pk").values_list("pk", flat=True)
+    batch = []
+    for pk in ids.iterator(chunk_size=2000):
+        batch.append(pk)
+        if len(batch) >= 2000:
+            Patient.objects.filter(pk__in=batch).update(**expressions)
+            batch = []
+    if batch:
+        Patient.objects.filter(pk__in=batch).update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0003_patient_timeline_index"),
+        ("clinics", "0001_initial"),
+        ("patients", "0006_patient_updated_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="completed_visits",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="last_visit_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="lifetime_value",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "last_visit_at", "id"],
+                name="patient_clinic_last_visit",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "completed_visits", "id"],
+                name="patient_clinic_visits",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "lifetime_value", "id"], name="patient_clinic_value"
+            ),
+        ),
+        migrations.RunPython(fill_engagement_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+        ("patients", "0007_patient_engagement_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="patient",
+            name="patient_clinic_updated",
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["clinic", "updated_at", "id"], name="patient_clinic_updated"
+            ),
+        ),
+    ]
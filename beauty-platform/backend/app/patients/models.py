@@ -1,5 +1,9 @@
 from django.db import models
 
+from .search import build_search_text, phone_digits
+
+SEARCH_SOURCE_FIELDS = ("first_name", "last_name", "email", "phone_number")
+
 
 class Patient(models.Model):
     class Gender(models.TextChoices):
@@ -30,16 +34,100 @@ class Patient(models.Model):
         default=Gender.OTHER,
     )
     notes = models.TextField(blank=True)
+    # Derived by refresh_search_fields(); see patients.search.
+    search_text = models.TextField(blank=True, default="", editable=False)
+    phone_digits = models.CharField(max_length=32, blank=True, default="", editable=False)
+    # Engagement figures maintained by patients.stats.
+    last_visit_at = models.DateTimeField(null=True, blank=True, editable=False)
+    completed_visits = models.PositiveIntegerField(default=0, editable=False)
+    lifetime_value = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["clinic", "phone_number"]),
-            models.Index(fields=["last_name", "first_name"]),
+            models.Index(
+                fields=["clinic", "last_name", "first_name", "id"], name="patient_clinic_name_id"
+            ),
+            models.Index(fields=["clinic", "updated_at", "id"], name="patient_clinic_updated"),
+            models.Index(
+                fields=["clinic", "last_visit_at", "id"], name="patient_clinic_last_visit"
+            ),
+            models.Index(fields=["clinic", "completed_visits", "id"], name="patient_clinic_visits"),
+            models.Index(fields=["clinic", "lifetime_value", "id"], name="patient_clinic_value"),
         ]
         unique_together = ("clinic", "phone_number")
         ordering = ["last_name", "first_name"]
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
+
+    def refresh_search_fields(self) -> None:
+        self.search_text = build_search_text(self.first_name, self.last_name, self.email)
+        self.phone_digits = phone_digits(self.phone_number)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(SEARCH_SOURCE_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "search_text", "phone_digits"}
+        super().save(*args, **kwargs)
+
+
+class PatientImport(models.Model):
+    """A spreadsheet upload processed in the background by ``run_patient_imports``."""
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        XLSX = "xlsx", "Excel"
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="patient_imports",
+    )
+    created_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.SET_NULL,
+        related_name="patient_imports",
+        null=True,
+        blank=True,
+    )
+    source = models.FileField(upload_to="patient-imports/%Y/%m/")
+    file_format = models.CharField(max_length=8, choices=Format.choices)
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    error_report = models.FileField(upload_to="patient-imports/%Y/%m/", blank=True)
+    detail = models.CharField(max_length=255, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "lease_expires_at"]),
+            models.Index(fields=["clinic", "-created_at"]),
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Patient import #{self.pk} ({self.status})"
@@ -0,0 +1,155 @@
+"""Ranked, index-backed patient search for reception typeahead.
+
+Each patient keeps two derived columns maintained by ``Patient.save``:
+``search_text`` (names and email, case-folded, with Arabic letter forms
+folded to their Persian equivalents and Persian/Arabic-Indic digits to ASCII)
+and ``phone_digits`` (the E.164 number without ``+``). On PostgreSQL both carry ``pg_trgm`` GIN
+indexes, so substring and fuzzy word matches are answered from the index and
+ranked by ``word_similarity``. Other backends (SQLite in tests) fall back to
+plain substring matches ranked by where the term matched. Results are always
+scoped to the tenant queryset and capped at ``limit`` rows.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Lookup, Q, Value, When
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+from accounts.phone import InvalidPhoneNumber, normalize_phone_number
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+# pg_trgm cannot use the index for terms shorter than one trigram.
+MIN_TRIGRAM_LENGTH = 3
+
+_CHAR_MAP = str.maketrans(
+    {
+        "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+        "\u0649": "\u06cc",  # alef maksura
+        "\u0626": "\u06cc",  # yeh with hamza
+        "\u0643": "\u06a9",  # Arabic kaf -> Persian keheh
+        "\u0629": "\u0647",  # teh marbuta
+        "\u06c0": "\u0647",  # heh with yeh
+        "\u0623": "\u0627",  # alef with hamza above
+        "\u0625": "\u0627",  # alef with hamza below
+        "\u0622": "\u0627",  # alef with madda
+        "\u0671": "\u0627",  # alef wasla
+        "\u0640": None,  # tatweel
+        "\u200c": None,  # zero-width non-joiner
+        "\u200d": None,  # zero-width joiner
+        **{chr(0x06F0 + i): str(i) for i in range(10)},
+        **{chr(0x0660 + i): str(i) for i in range(10)},
+    }
+)
+_WHITESPACE = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_TERM = re.compile(r"^[\d\s+()\-.]+$")
+
+
+def normalize_text(value: str) -> str:
+    """Fold ``value`` so that differently typed forms of a name compare equal."""
+    value = unicodedata.normalize("NFKC", value or "").translate(_CHAR_MAP)
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(" ", value).strip().casefold()
+
+
+def phone_digits(value: str) -> str:
+    """Digits of ``value`` in E.164 form when it parses as a phone number."""
+    try:
+        value = normalize_phone_number(value)
+    except InvalidPhoneNumber:
+        pass
+    return _NON_DIGITS.sub("", normalize_text(value))
+
+
+def build_search_text(*parts: str) -> str:
+    return normalize_text(" ".join(part for part in parts if part))
+
+
+def _phone_query(term: str) -> str:
+    """Digits to look for when ``term`` looks like (part of) a phone number."""
+    folded = normalize_text(term)
+    if not _PHONE_TERM.match(folded):
+        return ""
+    digits = _NON_DIGITS.sub("", folded)
+    # Stored numbers are E.164; drop the trunk or international prefix typed
+    # in front so "0912..." and "0098912..." both match "98912...".
+    if digits.startswith("00"):
+        return digits[2:]
+    return digits[1:] if digits.startswith("0") else digits
+
+
+class TrigramWordMatch(Lookup):
+    """``lhs %> rhs``: some word of ``lhs`` is similar to ``rhs`` (indexable)."""
+
+    lookup_name = "trigram_word_match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %%> {rhs}", [*lhs_params, *rhs_params]
+
+
+class WordSimilarity(Func):
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+
+def search_patients(queryset, term: str, limit: int = DEFAULT_LIMIT):
+    """Return the best ``limit`` matches for ``term`` within ``queryset``."""
+    text = normalize_text(term)
+    digits = _phone_query(term)
+    if not text:
+        return queryset.none()
+
+    if digits:
+        condition = Q(phone_digits__contains=digits)
+        rank = Case(
+            When(phone_digits__endswith=digits, then=Value(2.0)),
+            default=Value(1.0),
+            output_field=FloatField(),
+        )
+    elif connection.vendor == "postgresql" and len(text) >= MIN_TRIGRAM_LENGTH:
+        condition = Q(search_text__contains=text) | TrigramWordMatch(F("search_text"), text)
+        rank = Greatest(
+            WordSimilarity(Value(text), F("search_text")),
+            Case(
+                When(search_text__startswith=text, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+    else:
+        condition = Q(search_text__contains=text)
+        rank = Case(
+            When(search_text__startswith=text, then=Value(3.0)),
+            When(search_text__contains=f" {text}", then=Value(2.0)),
+            default=Value(1.0),
+            output_field=FloatField(),
+        )
+
+    return (
+        queryset.filter(condition)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "last_name", "first_name", "pk")[:limit]
+    )
+
+
+class PatientSearchFilter(filters.BaseFilterBackend):
+    """``?search=<term>&limit=<n>`` on list requests."""
+
+    search_param = "search"
+    limit_param = "limit"
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, "").strip()
+        if not term or getattr(view, "action", None) != "list":
+            return queryset
+        try:
+            limit = int(request.query_params.get(self.limit_param, DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        return search_patients(queryset, term, max(1, min(limit, MAX_LIMIT)))
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from patients.models import Patient
+from accounts.phone import InvalidPhoneNumber, normalize_phone_number
+from appointments.models import Appointment, Procedure
+from billing.models import Payment
+from patients.models import Patient, PatientImport
 
 User = get_user_model()
 
@@ -20,9 +24,209 @@ class PatientSerializer(serializers.ModelSerializer):
             "date_of_birth",
             "gender",
             "notes",
+            "last_visit_at",
+            "completed_visits",
+            "lifetime_value",
         ]
-        read_only_fields = ["id", "clinic"]
+        read_only_fields = ["id", "clinic", "last_visit_at", "completed_visits", "lifetime_value"]
+
     def validate_user(self, value: User | None) -> User | None:
         if value and value.clinic_id != self.context.get("request").user.clinic_id:
             raise serializers.ValidationError("User must belong to the clinic.")
         return value
+
+
+class PatientImportRowSerializer(serializers.Serializer):
+    """One spreadsheet row; duplicates are checked per batch by the importer."""
+
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    phone_number = serializers.CharField(max_length=32)
+    email = serializers.EmailField(required=False, allow_blank=True, default="")
+    date_of_birth = serializers.DateField(required=False, allow_null=True, default=None)
+    gender = serializers.ChoiceField(
+        choices=Patient.Gender.choices, required=False, default=Patient.Gender.OTHER
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def to_internal_value(self, data):
+        data = {key: value for key, value in data.items() if value not in ("", None)}
+        if isinstance(data.get("gender"), str):
+            gender = data["gender"].strip().upper()
+            data["gender"] = {"F": "FEMALE", "M": "MALE", "O": "OTHER"}.get(gender, gender)
+        return super().to_internal_value(data)
+
+    def validate_phone_number(self, value: str) -> str:
+        try:
+            return normalize_phone_number(value)
+        except InvalidPhoneNumber as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+
+
+class PatientImportSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(source="source", write_only=True)
+    error_report_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PatientImport
+        fields = [
+            "id",
+            "file",
+            "file_format",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "error_count",
+            "detail",
+            "error_report_url",
+            "started_at",
+            "finished_at",
+            "created_at",
+        ]
+        read_only_fields = [
+            "id",
+            "file_format",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "error_count",
+            "detail",
+            "started_at",
+            "finished_at",
+            "created_at",
+        ]
+
+    def get_error_report_url(self, instance: PatientImport):
+        if not instance.error_report:
+            return None
+        request = self.context.get("request")
+        path = f"/api/patient-imports/{instance.pk}/errors/"
+        return request.build_absolute_uri(path) if request else path
+
+    def validate_file(self, value):
+        extension = value.name.rsplit(".", 1)[-1].lower() if "." in value.name else ""
+        if extension not in PatientImport.Format.values:
+            raise serializers.ValidationError("Upload a .csv or .xlsx file.")
+        if value.size > settings.PATIENT_IMPORT_MAX_BYTES:
+            raise serializers.ValidationError("The file is too large.")
+        return value
+
+    def create(self, validated_data):
+        source = validated_data["source"]
+        validated_data["file_format"] = source.name.rsplit(".", 1)[-1].lower()
+        return super().create(validated_data)
+
+
+class PatientExportQuerySerializer(serializers.Serializer):
+    """Query parameters of ``GET /api/patients/export/``."""
+
+    COLUMNS = (
+        "id",
+        "first_name",
+        "last_name",
+        "phone_number",
+        "email",
+        "date_of_birth",
+        "gender",
+        "notes",
+        "created_at",
+        "updated_at",
+    )
+
+    columns = serializers.CharField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
+    def validate_columns(self, value: str) -> list[str]:
+        columns = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+        unknown = [name for name in columns if name not in self.COLUMNS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown columns: {', '.join(unknown)}.")
+        return columns or list(self.COLUMNS)
+
+    def validate(self, attrs):
+        attrs.setdefault("columns", list(self.COLUMNS))
+        after, before = attrs.get("updated_after"), attrs.get("updated_before")
+        if after and before and after >= before:
+            raise serializers.ValidationError("updated_after must be before updated_before.")
+        return attrs
+
+
+def _display_name(user) -> str | None:
+    if user is None:
+        return None
+    return user.get_full_name() or user.username
+
+
+class TimelineProcedureSerializer(serializers.ModelSerializer):
+    service_name = serializers.CharField(source="service.name", default=None, read_only=True)
+    performed_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Procedure
+        fields = [
+            "id",
+            "service",
+            "service_name",
+            "description",
+            "price",
+            "performed_by",
+            "performed_by_name",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def get_performed_by_name(self, instance: Procedure) -> str | None:
+        return _display_name(instance.performed_by)
+
+
+class TimelinePaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = [
+            "id",
+            "amount",
+            "currency",
+            "status",
+            "method",
+            "transaction_id",
+            "paid_at",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class PatientTimelineSerializer(serializers.ModelSerializer):
+    """An appointment with everything the patient chart shows next to it.
+
+    Expects the related rows to be loaded by ``PatientViewSet.timeline``.
+    """
+
+    service_name = serializers.CharField(source="service.name", default=None, read_only=True)
+    provider_name = serializers.SerializerMethodField()
+    procedures = TimelineProcedureSerializer(many=True, read_only=True)
+    payments = TimelinePaymentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = [
+            "id",
+            "scheduled_time",
+            "duration_minutes",
+            "status",
+            "notes",
+            "service",
+            "service_name",
+            "provider",
+            "provider_name",
+            "procedures",
+            "payments",
+        ]
+        read_only_fields = fields
+
+    def get_provider_name(self, instance: Appointment) -> str | None:
+        return _display_name(instance.provider)
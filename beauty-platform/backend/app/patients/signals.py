@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from appointments.models import Appointment, Procedure
+
+from . import stats
+
+COMPLETED = Appointment.Status.COMPLETED
+
+
+@receiver(post_save, sender=Appointment)
+def _appointment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if instance.status == COMPLETED:
+            stats.add_visit(instance.patient_id, instance.scheduled_time)
+        return
+    before = getattr(instance, "_loaded_values", {})
+    if not {"status", "patient_id", "scheduled_time"} <= before.keys():
+        stats.refresh(instance.patient_id)  # previous state unknown
+        return
+    was_completed = before["status"] == COMPLETED
+    if before["patient_id"] != instance.patient_id:
+        stats.refresh(before["patient_id"])
+        stats.refresh(instance.patient_id)
+    elif instance.status == COMPLETED and not was_completed:
+        stats.add_visit(instance.patient_id, instance.scheduled_time)
+    elif was_completed and (
+        instance.status != COMPLETED or before["scheduled_time"] != instance.scheduled_time
+    ):
+        stats.refresh(instance.patient_id)
+
+
+@receiver(post_delete, sender=Appointment)
+def _appointment_deleted(sender, instance, **kwargs):
+    if instance.status == COMPLETED:
+        stats.refresh(instance.patient_id)
+
+
+@receiver(post_save, sender=Procedure)
+def _procedure_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = {} if created else getattr(instance, "_loaded_values", {})
+    if not created and not {"price", "appointment_id"} <= before.keys():
+        return  # previous state unknown (deferred load); left to rebuild_patient_stats
+    if before.get("appointment_id", instance.appointment_id) != instance.appointment_id:
+        stats.add_procedure_spend(before["appointment_id"], -before["price"])
+        stats.add_procedure_spend(instance.appointment_id, instance.price)
+    else:
+        stats.add_procedure_spend(instance.appointment_id, instance.price - before.get("price", 0))
+
+
+@receiver(post_delete, sender=Procedure)
+def _procedure_deleted(sender, instance, **kwargs):
+    stats.add_procedure_spend(instance.appointment_id, -instance.price)
@@ -0,0 +1,134 @@
+"""Denormalized engagement figures on ``Patient``.
+
+``completed_visits`` and ``last_visit_at`` count the patient's COMPLETED
+appointments and ``lifetime_value`` sums the price of every procedure recorded
+on their appointments. The signals in ``patients.signals`` adjust them with
+single ``UPDATE ... SET col = col + x`` statements as appointments and
+procedures change; a change that can lower ``last_visit_at`` recomputes the
+patient instead. Every such write also bumps ``updated_at`` so delta sync
+(``sync.changes``) picks it up. Writes that skip signals (``update()``, raw
+SQL) are repaired by ``manage.py rebuild_patient_stats``.
+
+``PatientEngagementFilter`` lets patient lists filter and sort on these
+columns through ``(clinic, column, id)`` indexes.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from rest_framework import filters, serializers
+
+from appointments.models import Appointment, Procedure
+
+from .models import Patient
+
+ZERO = Decimal("0.00")
+
+
+def stats_expressions() -> dict:
+    """Column values recomputed from the source rows, for ``queryset.update()``."""
+    completed = (
+        Appointment.objects.filter(patient=OuterRef("pk"), status=Appointment.Status.COMPLETED)
+        .order_by()
+        .values("patient")
+    )
+    spend = (
+        Procedure.objects.filter(appointment__patient=OuterRef("pk"))
+        .order_by()
+        .values("appointment__patient")
+        .annotate(total=Sum("price"))
+        .values("total")
+    )
+    return {
+        "completed_visits": Coalesce(
+            Subquery(completed.annotate(visits=Count("pk")).values("visits")),
+            0,
+            output_field=IntegerField(),
+        ),
+        "last_visit_at": Subquery(
+            completed.annotate(last=Max("scheduled_time")).values("last")
+        ),
+        "lifetime_value": Coalesce(
+            Subquery(spend), ZERO, output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    }
+
+
+def rebuild(queryset=None) -> int:
+    queryset = Patient.objects.all() if queryset is None else queryset
+    return queryset.update(**stats_expressions(), updated_at=timezone.now())
+
+
+def refresh(patient_id) -> None:
+    rebuild(Patient.objects.filter(pk=patient_id))
+
+
+def add_visit(patient_id, at: datetime) -> None:
+    Patient.objects.filter(pk=patient_id).update(
+        completed_visits=F("completed_visits") + 1,
+        last_visit_at=Greatest(Coalesce(F("last_visit_at"), at), at),
+        updated_at=timezone.now(),
+    )
+
+
+def add_procedure_spend(appointment_id, amount) -> None:
+    """Add ``amount`` (negative to subtract) to the appointment's patient."""
+    amount = Decimal(str(amount or 0))
+    if amount:
+        patient = Appointment.objects.filter(pk=appointment_id).values("patient_id")
+        Patient.objects.filter(pk__in=Subquery(patient)).update(
+            lifetime_value=F("lifetime_value") + amount, updated_at=timezone.now()
+        )
+
+
+ORDERINGS = {
+    "name": ("last_name", "first_name", "id"),
+    "last_visit": ("last_visit_at", "id"),
+    "-last_visit": ("-last_visit_at", "-id"),
+    "visits": ("completed_visits", "id"),
+    "-visits": ("-completed_visits", "-id"),
+    "lifetime_value": ("lifetime_value", "id"),
+    "-lifetime_value": ("-lifetime_value", "-id"),
+}
+
+
+class EngagementQuerySerializer(serializers.Serializer):
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), default="name")
+    last_visit_after = serializers.DateTimeField(required=False)
+    last_visit_before = serializers.DateTimeField(required=False)
+    min_visits = serializers.IntegerField(required=False, min_value=0)
+    min_lifetime_value = serializers.DecimalField(
+        max_digits=12, decimal_places=2, required=False, min_value=ZERO
+    )
+
+
+class PatientEngagementFilter(filters.BaseFilterBackend):
+    """``?ordering=-last_visit|visits|-lifetime_value|...`` and range filters on list requests.
+
+    Ordering by last visit leaves out patients who never had one, since the
+    keyset cursor cannot place NULLs.
+    """
+
+    def get_params(self, request) -> dict:
+        params = EngagementQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, "action", None) != "list":
+            return queryset
+        params = self.get_params(request)
+        if params["ordering"] in ("last_visit", "-last_visit"):
+            queryset = queryset.filter(last_visit_at__isnull=False)
+        if "last_visit_after" in params:
+            queryset = queryset.filter(last_visit_at__gte=params["last_visit_after"])
+        if "last_visit_before" in params:
+            queryset = queryset.filter(last_visit_at__lt=params["last_visit_before"])
+        if "min_visits" in params:
+            queryset = queryset.filter(completed_visits__gte=params["min_visits"])
+        if "min_lifetime_value" in params:
+            queryset = queryset.filter(lifetime_value__gte=params["min_lifetime_value"])
+        return queryset.order_by(*ORDERINGS[params["ordering"]])
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from patients.views import PatientViewSet
+from patients.views import PatientImportViewSet, PatientViewSet
 
 router = DefaultRouter()
 router.register(r"patients", PatientViewSet, basename="patients")
+router.register(r"patient-imports", PatientImportViewSet, basename="patient-imports")
 
 urlpatterns = [path("", include(router.urls))]
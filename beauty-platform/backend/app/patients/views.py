@@ -1,35 +1,138 @@
-from django.db import transaction
-from rest_framework import filters, permissions, viewsets
+from django.db.models import Prefetch
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
+from rest_framework.parsers import FormParser, MultiPartParser
 
-from billing.limits import PlanAction, check_plan_limits
-from patients.models import Patient
-from patients.serializers import PatientSerializer
-from clinics.models import Clinic
+from accounts.authentication import get_user_instance
+from appointments.models import Appointment, Procedure
+from beauty_platform.renderers import CSVRenderer, NDJSONRenderer
+from billing.limits import PlanAction, reservation
+from billing.models import Payment
+from clinics.tenancy import TenantScopedMixin
+from patients.models import Patient, PatientImport
+from patients.search import PatientSearchFilter
+from patients.stats import ORDERINGS, PatientEngagementFilter
+from patients.serializers import (
+    PatientExportQuerySerializer,
+    PatientImportSerializer,
+    PatientSerializer,
+    PatientTimelineSerializer,
+)
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = Patient.objects.all()
     serializer_class = PatientSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = [
-        "first_name",
-        "last_name",
-        "phone_number",
-        "email",
-    ]
-
-    def get_queryset(self):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        return Patient.objects.filter(clinic=clinic)
+    filter_backends = [PatientEngagementFilter, PatientSearchFilter]
+    keyset_ordering = ORDERINGS["name"]
+    export_chunk_size = 2000
+
+    def get_keyset_ordering(self):
+        if self.action == "list":
+            return ORDERINGS.get(self.request.query_params.get("ordering"), self.keyset_ordering)
+        return self.keyset_ordering
+
+    def perform_create(self, serializer):
+        clinic_id = self.get_tenant_id()
+        with reservation(clinic_id, PlanAction.CREATE_PATIENT):
+            serializer.save(clinic_id=clinic_id)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=PatientTimelineSerializer,
+        keyset_ordering=("-scheduled_time", "id"),
+    )
+    def timeline(self, request, pk=None):
+        """The patient's appointments, newest first, with procedures and payments.
+
+        Four queries per page however many rows it holds: the patient, the
+        appointments (joined to service and provider), their procedures (joined
+        to service and performer) and their payments.
+        """
+        patient = self.get_object()
+        procedures = Procedure.objects.select_related("service", "performed_by").order_by(
+            "created_at", "id"
+        )
+        queryset = (
+            Appointment.objects.filter(clinic_id=patient.clinic_id, patient=patient)
+            .select_related("service", "provider")
+            .prefetch_related(
+                Prefetch("procedures", queryset=procedures),
+                Prefetch("payments", queryset=Payment.objects.order_by("created_at", "id")),
+            )
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Stream every patient of the clinic as CSV (default) or NDJSON.
+
+        Rows are read through a server-side cursor as plain tuples and written
+        out in chunks, so memory use does not grow with the clinic.
+        """
+        params = PatientExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        columns = params.validated_data["columns"]
+        queryset = self.get_queryset()
+        if "updated_after" in params.validated_data:
+            queryset = queryset.filter(updated_at__gte=params.validated_data["updated_after"])
+        if "updated_before" in params.validated_data:
+            queryset = queryset.filter(updated_at__lt=params.validated_data["updated_before"])
+        rows = (
+            queryset.order_by(*self.keyset_ordering)
+            .values_list(*columns)
+            .iterator(chunk_size=self.export_chunk_size)
+        )
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(columns, rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        filename = f"patients-{timezone.localdate():%Y%m%d}.{renderer.format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class PatientImportViewSet(
+    TenantScopedMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Upload a CSV/XLSX file of patients; a worker imports it in the background."""
+
+    queryset = PatientImport.objects.all()
+    serializer_class = PatientImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    keyset_ordering = ("-created_at", "-id")
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
 
     def perform_create(self, serializer):
-        clinic_id = self.request.user.clinic_id
-        if not clinic_id:
-            raise NotFound("setup_required")
-        with transaction.atomic():
-            clinic = Clinic.objects.select_for_update().get(pk=clinic_id)
-            check_plan_limits(clinic, PlanAction.CREATE_PATIENT)
-            serializer.save(clinic=clinic)
+        serializer.save(
+            clinic_id=self.get_tenant_id(), created_by=get_user_instance(self.request.user)
+        )
+
+    @action(detail=True, methods=["get"])
+    def errors(self, request, pk=None):
+        job = self.get_object()
+        if not job.error_report:
+            raise NotFound("No error report for this import.")
+        return FileResponse(
+            job.error_report.open("rb"),
+            as_attachment=True,
+            filename=f"patient-import-{job.pk}-errors.csv",
+            content_type="text/csv",
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+        ("services", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="service",
+            name="services_se_clinic__d01368_idx",
+        ),
+        migrations.AddIndex(
+            model_name="service",
+            index=models.Index(
+                fields=["clinic", "name", "id"], name="service_clinic_name_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+        ("services", "0002_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="service",
+            index=models.Index(
+                fields=["clinic", "updated_at", "id"], name="service_clinic_updated"
+            ),
+        ),
+    ]
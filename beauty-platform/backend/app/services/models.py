@@ -17,8 +17,9 @@ class Service(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["clinic", "name"]),
+            models.Index(fields=["clinic", "name", "id"], name="service_clinic_name_id"),
             models.Index(fields=["is_active", "clinic"]),
+            models.Index(fields=["clinic", "updated_at", "id"], name="service_clinic_updated"),
         ]
         unique_together = ("clinic", "name")
         ordering = ["name"]
@@ -1,28 +1,18 @@
 from rest_framework import permissions, viewsets
-from rest_framework.exceptions import NotFound
 
+from clinics.tenancy import TenantScopedMixin
 from services.models import Service
 from services.serializers import ServiceSerializer
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated]
-
-    def get_queryset(self):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        return Service.objects.filter(clinic=clinic)
+    keyset_ordering = ("name", "id")
 
     def perform_create(self, serializer):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        serializer.save(clinic=clinic)
+        serializer.save(clinic_id=self.get_tenant_id())
 
     def perform_update(self, serializer):
-        clinic = self.request.user.clinic
-        if not clinic:
-            raise NotFound("setup_required")
-        serializer.save(clinic=clinic)
+        serializer.save(clinic_id=self.get_tenant_id())
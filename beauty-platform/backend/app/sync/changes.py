@@ -0,0 +1,152 @@
+"""Delta sync for front-desk clients.
+
+Each feed (appointments, patients, services, procedures) is read in
+``(updated_at, id)`` order, starting after the client's last position. A
+``(clinic, updated_at, id)`` index backs the read, so "what changed since X"
+is an index range scan that returns only the rows written since then.
+Procedures have no clinic column, so they use an ``(updated_at, id)`` index
+joined to their appointment. Deletes are read the same way from the
+``SyncTombstone`` rows written by ``sync.signals``. A procedure removed together
+with its appointment gets no tombstone of its own; clients drop it with the
+appointment. The client receives one opaque token holding a position per feed
+and sends it back on the next call.
+
+A write becomes visible only when its transaction commits, which can be a
+moment after ``updated_at`` was stamped. Rows younger than
+``SYNC_SETTLE_SECONDS`` are therefore left for the next call, so a slow commit
+is not skipped. Tombstones are kept for ``SYNC_TOMBSTONE_RETENTION_DAYS``
+(``manage.py purge_sync_tombstones``). A token older than that gets
+``410 Gone``, and the client must download everything again.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from appointments.models import Appointment, Procedure
+from appointments.serializers import AppointmentSerializer, ProcedureSerializer
+from beauty_platform.pagination import seek
+from patients.models import Patient
+from patients.serializers import PatientSerializer
+from services.models import Service
+from services.serializers import ServiceSerializer
+
+from .models import SyncTombstone
+
+ORDERING = ("updated_at", "id")
+TOMBSTONES = "deleted"
+
+
+@dataclass(frozen=True)
+class Feed:
+    model: type
+    serializer_class: type
+    tenant_field: str = "clinic"
+
+
+FEEDS = {
+    "appointments": Feed(Appointment, AppointmentSerializer),
+    "patients": Feed(Patient, PatientSerializer),
+    "services": Feed(Service, ServiceSerializer),
+    "procedures": Feed(Procedure, ProcedureSerializer, "appointment__clinic"),
+}
+
+
+class ResyncRequired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "RESYNC_REQUIRED"
+    default_code = "resync_required"
+
+
+def encode_token(positions: dict) -> str:
+    payload = json.dumps(positions, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    """Positions ``{feed: [updated_at, id]}`` from ``token``; ``ValueError`` if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        positions = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        for key, (moment, pk) in positions.items():
+            if key not in FEEDS and key != TOMBSTONES:
+                raise ValueError(key)
+            if parse_datetime(moment) is None or not isinstance(pk, int):
+                raise ValueError(moment)
+    except (binascii.Error, AttributeError, TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid sync token.") from None
+    if TOMBSTONES not in positions:
+        raise ValueError("Invalid sync token.")
+    return positions
+
+
+def _position(moment: datetime, pk: int) -> list:
+    # Full-precision ISO string; a cursor that dropped microseconds would
+    # repeat or skip rows.
+    return [moment.isoformat(), pk]
+
+
+def _page(queryset, ordering, position, limit: int) -> tuple[list, bool]:
+    if position is not None:
+        queryset = queryset.filter(seek(ordering, position))
+    rows = list(queryset.order_by(*ordering)[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def changes_since(clinic_id, positions: dict | None, limit: int, context: dict) -> dict:
+    """Rows changed and deleted in the clinic since ``positions`` (everything if ``None``).
+
+    Each feed returns at most ``limit`` rows; ``has_more`` tells the client to
+    call again with the returned token straight away.
+    """
+    now = timezone.now()
+    settled = now - timedelta(seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 2))
+    if positions:
+        positions = dict(positions)
+        retention = timedelta(days=getattr(settings, "SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+        if parse_datetime(positions[TOMBSTONES][0]) < now - retention:
+            raise ResyncRequired()
+    else:
+        # A full download needs no earlier deletes, only those made while it runs.
+        positions = {TOMBSTONES: _position(settled, 0)}
+
+    response, has_more = {}, False
+    for name, feed in FEEDS.items():
+        queryset = feed.model.objects.filter(
+            **{f"{feed.tenant_field}_id": clinic_id, "updated_at__lte": settled}
+        )
+        rows, more = _page(queryset, ORDERING, positions.get(name), limit)
+        if rows:
+            positions[name] = _position(rows[-1].updated_at, rows[-1].pk)
+        response[name] = feed.serializer_class(rows, many=True, context=context).data
+        has_more = has_more or more
+
+    tombstones, more = _page(
+        SyncTombstone.objects.filter(clinic_id=clinic_id, deleted_at__lte=settled),
+        ("deleted_at", "id"),
+        positions[TOMBSTONES],
+        limit,
+    )
+    position = (tombstones[-1].deleted_at, tombstones[-1].pk) if tombstones else None
+    if not more:
+        # Every settled delete has been read; moving up to ``settled`` keeps an
+        # idle client's token inside the retention window.
+        position = max(position or (settled, 0), (settled, 0))
+    if position:
+        positions[TOMBSTONES] = _position(*position)
+    deleted = {name: [] for name in FEEDS}
+    for tombstone in tombstones:
+        deleted[tombstone.feed].append(tombstone.object_id)
+
+    response[TOMBSTONES] = deleted
+    response["token"] = encode_token(positions)
+    response["has_more"] = has_more or more
+    return response
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from sync.retention import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override SYNC_TOMBSTONE_RETENTION_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones(
+            days=options["days"],
+            batch_size=max(1, options["batch_size"]),
+            pause=options["pause"],
+        )
+        self.stdout.write(f"Deleted {deleted} tombstone(s).")
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("feed", models.CharField(max_length=32)),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_tombstones",
+                        to="clinics.clinic",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["deleted_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["clinic", "deleted_at", "id"],
+                        name="tombstone_clinic_deleted",
+                    ),
+                    models.Index(
+                        fields=["deleted_at"], name="sync_syncto_deleted_feea12_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
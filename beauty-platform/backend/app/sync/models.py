@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class SyncTombstone(models.Model):
+    """A deleted row that delta sync clients still have to drop; see sync.changes."""
+
+    clinic = models.ForeignKey(
+        "clinics.Clinic",
+        on_delete=models.CASCADE,
+        related_name="sync_tombstones",
+    )
+    feed = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["clinic", "deleted_at", "id"], name="tombstone_clinic_deleted"),
+            models.Index(fields=["deleted_at"]),
+        ]
+        ordering = ["deleted_at", "id"]
+
+    def __str__(self) -> str:
+        return f"Deleted {self.feed} #{self.object_id}"
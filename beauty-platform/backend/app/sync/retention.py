@@ -0,0 +1,25 @@
+"""Retention for ``SyncTombstone`` rows.
+
+A tombstone only matters to clients whose token predates it. Tokens older than
+``SYNC_TOMBSTONE_RETENTION_DAYS`` are refused by ``sync.changes`` (the client
+downloads everything again), so older tombstones can go.
+"""
+
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from beauty_platform.batching import delete_in_batches
+
+from .models import SyncTombstone
+
+
+def purge_tombstones(days: Optional[int] = None, batch_size: int = 1000, pause: float = 0.0) -> int:
+    if days is None:
+        days = getattr(settings, "SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+    cutoff = timezone.now() - timedelta(days=days)
+    return delete_in_batches(
+        SyncTombstone.objects.filter(deleted_at__lt=cutoff), batch_size=batch_size, pause=pause
+    )
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from .changes import decode_token
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """Query parameters of ``GET /api/sync/``."""
+
+    token = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=500)
+
+    def validate_token(self, value: str) -> dict:
+        try:
+            return decode_token(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc)) from None
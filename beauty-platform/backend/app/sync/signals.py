@@ -0,0 +1,45 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from appointments.models import Appointment, Procedure
+from clinics.models import Clinic
+from patients.models import Patient
+from services.models import Service
+
+from .models import SyncTombstone
+
+FEED_NAMES = {
+    Appointment: "appointments",
+    Patient: "patients",
+    Service: "services",
+    Procedure: "procedures",
+}
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Procedure)
+def _record_tombstone(sender, instance, origin=None, **kwargs):
+    origin_model = _origin_model(origin)
+    if origin_model is Clinic:
+        return  # the clinic and its whole feed are gone
+    if sender is Procedure:
+        if origin_model is not Procedure:
+            return  # removed with its appointment, whose tombstone covers it
+        clinic_id = (
+            Appointment.objects.filter(pk=instance.appointment_id)
+            .values_list("clinic_id", flat=True)
+            .first()
+        )
+    else:
+        clinic_id = instance.clinic_id
+    if clinic_id:
+        SyncTombstone.objects.create(
+            clinic_id=clinic_id, feed=FEED_NAMES[sender], object_id=instance.pk
+        )
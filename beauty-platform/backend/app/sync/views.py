@@ -0,0 +1,26 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from clinics.tenancy import TenantScopedMixin
+
+from .changes import changes_since
+from .serializers import SyncQuerySerializer
+
+
+class SyncView(TenantScopedMixin, APIView):
+    """Rows changed or deleted since ``?token=`` (see sync.changes)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(
+            changes_since(
+                self.get_tenant_id(),
+                params.validated_data.get("token"),
+                params.validated_data["limit"],
+                context={"request": request},
+            )
+        )
@@ -4,15 +4,19 @@ from datetime import timedelta
 from typing import Callable
 
 import django
+import fakeredis
 import pytest
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "beauty_platform.settings_test")
 django.setup()
 
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.test import APIClient
 
+from accounts import otp_store, revocation
 from accounts.models import User
+from beauty_platform import ratelimit
 from appointments.models import Appointment
 from billing.models import BillingPayment, Plan
 from clinics.models import Clinic
@@ -20,6 +24,29 @@ from patients.models import Patient
 from services.models import Service
 
 
+@pytest.fixture(autouse=True)
+def _reset_shared_state():
+    ratelimit.reset()
+    otp_store.reset()
+    revocation.reset()
+    cache.clear()
+    yield
+    ratelimit.reset()
+    otp_store.reset()
+    revocation.reset()
+    cache.clear()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> fakeredis.FakeRedis:
+    """Point the Redis-backed stores at an in-process server that runs their Lua scripts."""
+    client = fakeredis.FakeRedis()
+    for module in (ratelimit, otp_store, revocation):
+        monkeypatch.setattr(module, "get_redis", lambda: client)
+    yield client
+    client.flushall()
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     return APIClient()
@@ -19,7 +19,6 @@ pytestmark = pytest.mark.django_db
 def test_request_and_verify_otp_happy_path(api_client, user_factory, monkeypatch):
     user = user_factory(phone_number="09123456789")
 
-    monkeypatch.setattr("accounts.views._send_kavenegar_otp", lambda *args, **kwargs: None)
     monkeypatch.setattr(secrets, "randbelow", lambda _: 123456)
 
     request_payload = {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN}
@@ -49,7 +48,6 @@ def test_request_otp_rate_limit_by_ip(
     settings.CACHES["default"]["LOCATION"] = "unique-otp-cache"
     users = [user_factory(phone_number=f"0911111111{i}") for i in range(OTP_RATE_LIMIT)]
 
-    monkeypatch.setattr("accounts.views._send_kavenegar_otp", lambda *args, **kwargs: None)
     monkeypatch.setattr(secrets, "randbelow", lambda _: 654321)
 
     payloads = [
@@ -80,7 +78,6 @@ def test_request_otp_rate_limit_by_ip(
 def test_request_otp_rate_limit(api_client, user_factory, monkeypatch):
     user = user_factory(phone_number="09876543210")
 
-    monkeypatch.setattr("accounts.views._send_kavenegar_otp", lambda *args, **kwargs: None)
     monkeypatch.setattr(secrets, "randbelow", lambda _: 654321)
 
     payload = {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN}
@@ -117,6 +114,7 @@ def test_verify_otp_wrong_code(api_client, user_factory):
     otp.refresh_from_db()
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert response.data["detail"] == "Invalid OTP code."
+    assert response.data["attempts"] == 1
     assert otp.attempt_count == 1
 
 
@@ -185,7 +183,7 @@ def test_verify_otp_ip_rate_limit(api_client, user_factory, monkeypatch):
     monkeypatch.setattr("accounts.views.OTP_MAX_ATTEMPTS", OTP_MAX_ATTEMPTS * 5)
 
     for _ in range(OTP_IP_VERIFY_LIMIT):
-        api_client.post(
+        last = api_client.post(
             "/api/auth/verify-otp",
             {
                 "phone_number": user.phone_number,
@@ -210,6 +208,7 @@ def test_verify_otp_ip_rate_limit(api_client, user_factory, monkeypatch):
     otp.refresh_from_db()
     assert blocked.status_code == status.HTTP_429_TOO_MANY_REQUESTS
     assert blocked.data["detail"] == "Too many verification attempts from this IP."
+    assert last.data["attempts"] == OTP_IP_VERIFY_LIMIT
     assert otp.attempt_count == OTP_IP_VERIFY_LIMIT
 
 
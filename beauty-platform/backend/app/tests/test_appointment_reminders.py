@@ -0,0 +1,131 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.utils import timezone
+
+from accounts.sms import FakeSMSProvider, SMSDeliveryError
+from appointments.models import Appointment, AppointmentReminder
+from appointments.reminders import ReminderDispatcher, claim_batch, deliver
+
+pytestmark = pytest.mark.django_db
+
+Kind, Status = AppointmentReminder.Kind, AppointmentReminder.Status
+
+
+class _FailingProvider(FakeSMSProvider):
+    def send_reminder(self, phone_number, name, local_time):
+        raise SMSDeliveryError("gateway down")
+
+
+class _BrokenProvider(FakeSMSProvider):
+    def send_reminder(self, phone_number, name, local_time):
+        raise ConnectionResetError("connection reset")
+
+
+def _reminders(appointment):
+    return {r.kind: r for r in AppointmentReminder.objects.filter(appointment=appointment)}
+
+
+def _make_due(*appointments):
+    AppointmentReminder.objects.filter(appointment__in=appointments).update(
+        next_attempt_at=timezone.now()
+    )
+
+
+def test_reminders_follow_booking_moves_and_cancellation(appointment_factory):
+    start = timezone.now() + timedelta(days=3)
+    appointment = appointment_factory(scheduled_time=start)
+
+    booked = _reminders(appointment)
+    appointment.scheduled_time = timezone.now() + timedelta(hours=5)
+    appointment.save()
+    moved = _reminders(appointment)
+    appointment.status = Appointment.Status.CANCELLED
+    appointment.save()
+    cancelled = _reminders(appointment)
+
+    assert booked[Kind.DAY_BEFORE].due_at == start - timedelta(hours=24)
+    assert booked[Kind.TWO_HOURS].due_at == start - timedelta(hours=2)
+    assert moved[Kind.DAY_BEFORE].status == Status.SUPPRESSED
+    assert moved[Kind.TWO_HOURS].status == Status.PENDING
+    assert moved[Kind.TWO_HOURS].due_at == appointment.scheduled_time - timedelta(hours=2)
+    assert cancelled[Kind.TWO_HOURS].status == Status.SUPPRESSED
+
+
+def test_workers_claim_each_due_reminder_once(appointment_factory, clinic_factory):
+    clinic = clinic_factory(timezone="Asia/Tehran")
+    start = timezone.now() + timedelta(days=2)
+    appointment = appointment_factory(clinic=clinic, scheduled_time=start)
+    appointment_factory(scheduled_time=start)  # not due yet
+    _make_due(appointment)
+    provider = FakeSMSProvider()
+
+    batch = claim_batch(10)
+    assert claim_batch(10) == []
+    statuses = [deliver(reminder, provider) for reminder in batch]
+
+    assert sorted(r.kind for r in batch) == sorted(Kind.values)
+    assert statuses == [Status.SENT, Status.SENT]
+    assert all(r.status == Status.SENT and r.sent_at for r in _reminders(appointment).values())
+    message = provider.reminders[0]
+    assert message["receptor"] == appointment.patient.phone_number
+    assert message["local_time"] == appointment.scheduled_time.astimezone(ZoneInfo("Asia/Tehran"))
+    assert message["local_time"].utcoffset() == timedelta(hours=3, minutes=30)
+
+
+def test_closed_appointments_are_suppressed_and_failures_retry(appointment_factory):
+    cancelled = appointment_factory(scheduled_time=timezone.now() + timedelta(days=2))
+    failing = appointment_factory(scheduled_time=timezone.now() + timedelta(days=2))
+    # A set-based update skips the signals, so the claim has to catch it.
+    Appointment.objects.filter(pk=cancelled.pk).update(status=Appointment.Status.CANCELLED)
+    _make_due(cancelled, failing)
+
+    batch = claim_batch(10)
+    statuses = {deliver(reminder, _FailingProvider()) for reminder in batch}
+
+    assert {r.appointment_id for r in batch} == {failing.pk}
+    assert statuses == {Status.PENDING}
+    assert {r.status for r in _reminders(cancelled).values()} == {Status.SUPPRESSED}
+    retried = _reminders(failing)[Kind.TWO_HOURS]
+    assert retried.attempts == 1
+    assert retried.error == "gateway down"
+    assert retried.next_attempt_at > timezone.now()
+    assert claim_batch(10) == []
+
+
+def test_unexpected_provider_error_is_retried_with_backoff(appointment_factory):
+    appointment = appointment_factory(scheduled_time=timezone.now() + timedelta(days=2))
+    _make_due(appointment)
+    dispatcher = ReminderDispatcher(workers=1, provider=_BrokenProvider())
+    # Called on this thread: the pool's threads cannot see the test database.
+    batch = claim_batch(10)
+    try:
+        assert [dispatcher._deliver_in_worker(reminder) for reminder in batch] == [None, None]
+    finally:
+        dispatcher.shutdown()
+
+    for reminder in _reminders(appointment).values():
+        assert reminder.status == Status.PENDING
+        assert reminder.attempts == 1
+        assert reminder.error == "ConnectionResetError: connection reset"
+        assert reminder.next_attempt_at > timezone.now()
+
+
+def test_expired_lease_is_not_sent_by_both_workers(appointment_factory):
+    appointment = appointment_factory(scheduled_time=timezone.now() + timedelta(days=2))
+    _make_due(appointment)
+    slow, fast = FakeSMSProvider(), FakeSMSProvider()
+
+    stale = claim_batch(10)
+    # The first worker's lease runs out while its batch waits for provider slots.
+    AppointmentReminder.objects.filter(appointment=appointment).update(
+        next_attempt_at=timezone.now()
+    )
+    fresh = claim_batch(10)
+
+    assert [deliver(reminder, fast) for reminder in fresh] == [Status.SENT, Status.SENT]
+    assert [deliver(reminder, slow) for reminder in stale] == [None, None]
+    assert len(fast.reminders) == 2
+    assert slow.reminders == []
+    assert {r.status for r in _reminders(appointment).values()} == {Status.SENT}
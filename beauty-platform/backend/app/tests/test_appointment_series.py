@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Appointment, AppointmentSeries
+from appointments.series import expand
+from billing.limits import current_usage
+from billing.models import PlanAction
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def series(api_client, clinic_factory, user_factory, patient_factory):
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+    provider = user_factory(clinic=clinic, role=User.Role.PRACTITIONER)
+    patient = patient_factory(clinic=clinic)
+    start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def book(**overrides):
+        payload = {
+            "patient": patient.id,
+            "provider": provider.id,
+            "starts_at": start.isoformat(),
+            "duration_minutes": 60,
+            "frequency": AppointmentSeries.Frequency.WEEKLY,
+            "interval": 4,
+            "count": 6,
+            **overrides,
+        }
+        return api_client.post("/api/appointment-series/", payload, format="json")
+
+    book.clinic, book.provider, book.patient, book.start = clinic, provider, patient, start
+    return book
+
+
+def _used(clinic):
+    usage = {row["action"]: row["used"] for row in current_usage(clinic.id)}
+    return usage[PlanAction.CREATE_APPOINTMENT]
+
+
+def test_series_books_all_occurrences_at_once(series, django_assert_max_num_queries):
+    with django_assert_max_num_queries(16):
+        response = series()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    times = [row["scheduled_time"] for row in response.data["occurrences"]]
+    assert len(times) == 6
+    occurrences = Appointment.objects.filter(series_id=response.data["id"])
+    assert occurrences.count() == 6
+    assert sorted(o.scheduled_time for o in occurrences)[-1] == series.start + timedelta(weeks=20)
+    assert all(o.ends_at - o.scheduled_time == timedelta(hours=1) for o in occurrences)
+    assert _used(series.clinic) == 6
+
+
+def test_series_is_rejected_whole_on_conflict_or_plan_limit(
+    series, api_client, patient_factory, settings
+):
+    clash = api_client.post(
+        "/api/appointments/",
+        {
+            "patient": patient_factory(clinic=series.clinic).id,
+            "provider": series.provider.id,
+            "scheduled_time": (series.start + timedelta(weeks=8, minutes=30)).isoformat(),
+        },
+        format="json",
+    )
+    conflict = series()
+    settings.FREE_MAX_APPOINTMENTS_PER_MONTH = 4
+    over_limit = series(starts_at=(series.start + timedelta(hours=3)).isoformat())
+
+    assert clash.status_code == status.HTTP_201_CREATED
+    assert conflict.status_code == status.HTTP_409_CONFLICT
+    assert [row["appointment"] for row in conflict.data["conflicts"]] == [clash.data["id"]]
+    assert over_limit.status_code == status.HTTP_402_PAYMENT_REQUIRED
+    assert not AppointmentSeries.objects.exists()
+    assert Appointment.objects.filter(clinic=series.clinic).count() == 1
+
+
+def test_expand_keeps_local_time_across_dst_and_short_months():
+    berlin = ZoneInfo("Europe/Berlin")
+    weekly = expand(
+        datetime(2026, 3, 20, 10, tzinfo=berlin), AppointmentSeries.Frequency.WEEKLY, 1, 3, berlin
+    )
+    monthly = expand(
+        datetime(2026, 1, 31, 9, tzinfo=berlin), AppointmentSeries.Frequency.MONTHLY, 1, 3, berlin
+    )
+
+    assert [start.astimezone(berlin).hour for start in weekly] == [10, 10, 10]
+    assert weekly[2] - weekly[1] == timedelta(days=7, hours=-1)
+    assert [start.astimezone(berlin).date().isoformat() for start in monthly] == [
+        "2026-01-31",
+        "2026-02-28",
+        "2026-03-31",
+    ]
+
+
+def test_this_and_following_edits_are_set_based(series, api_client):
+    created = series().data
+    ids = [row["id"] for row in created["occurrences"]]
+    url = f"/api/appointment-series/{created['id']}/following/"
+
+    shifted = api_client.post(
+        url, {"from_appointment": ids[2], "shift_minutes": 90, "notes": "Moved"}, format="json"
+    )
+    cancelled = api_client.post(url, {"from_appointment": ids[4], "cancel": True}, format="json")
+    invalid = api_client.post(
+        url, {"from_appointment": ids[0], "cancel": True, "notes": "x"}, format="json"
+    )
+
+    assert shifted.data == {"updated": 4}
+    assert cancelled.data == {"updated": 2}
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    rows = {o.pk: o for o in Appointment.objects.filter(pk__in=ids)}
+    assert rows[ids[1]].scheduled_time == series.start + timedelta(weeks=4)
+    assert rows[ids[1]].notes == ""
+    assert rows[ids[3]].scheduled_time == series.start + timedelta(weeks=12, minutes=90)
+    assert rows[ids[3]].ends_at == rows[ids[3]].scheduled_time + timedelta(hours=1)
+    assert rows[ids[3]].notes == "Moved"
+    assert [rows[pk].status for pk in ids[4:]] == [Appointment.Status.CANCELLED] * 2
+    assert _used(series.clinic) == 4
@@ -0,0 +1,90 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from rest_framework import status
+
+from accounts.models import User
+from appointments.availability import merge, slot_starts
+from appointments.bench import AvailabilityBench
+from appointments.models import Appointment, ProviderTimeOff, ProviderWorkingHours
+
+pytestmark = pytest.mark.django_db
+
+TEHRAN = ZoneInfo("Asia/Tehran")
+MONDAY = date(2030, 1, 7)
+
+
+def _at(hour, minute=0, day=MONDAY):
+    return datetime.combine(day, time(hour, minute), tzinfo=TEHRAN)
+
+
+def test_slot_starts_skip_merged_busy_intervals():
+    busy = merge([(_at(10), _at(10, 30)), (_at(10, 15), _at(11)), (_at(13), _at(14))])
+
+    slots = slot_starts(
+        [(_at(9), _at(12))], busy, timedelta(minutes=45), timedelta(minutes=30)
+    )
+
+    assert busy == [(_at(10), _at(11)), (_at(13), _at(14))]
+    assert slots == [_at(9), _at(11)]
+
+
+def test_availability_endpoint_returns_local_slots_per_provider(
+    api_client, clinic_factory, user_factory, service_factory, appointment_factory
+):
+    clinic = clinic_factory(timezone="Asia/Tehran")
+    provider = user_factory(clinic=clinic, role=User.Role.PRACTITIONER)
+    idle = user_factory(clinic=clinic, role=User.Role.PRACTITIONER)
+    for user in (provider, idle):
+        ProviderWorkingHours.objects.create(
+            clinic=clinic,
+            provider=user,
+            weekday=0,
+            start_time=time(9),
+            end_time=time(12),
+        )
+    appointment_factory(clinic=clinic, provider=provider, scheduled_time=_at(10))
+    appointment_factory(
+        clinic=clinic,
+        provider=provider,
+        scheduled_time=_at(9),
+        status=Appointment.Status.CANCELLED,
+    )
+    ProviderTimeOff.objects.create(
+        clinic=clinic, provider=provider, starts_at=_at(11, 30), ends_at=_at(12)
+    )
+    service = service_factory(clinic=clinic, duration_minutes=60)
+    api_client.force_authenticate(
+        user=user_factory(clinic=clinic, role=User.Role.STAFF)
+    )
+
+    response = api_client.get(
+        "/api/appointments/availability/",
+        {"start": MONDAY.isoformat(), "service": service.id, "step_minutes": 30},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["timezone"] == "Asia/Tehran"
+    slots = {row["provider"]: row["slots"] for row in response.data["providers"]}
+    assert slots[provider.id] == [_at(9).isoformat(), _at(10, 30).isoformat()]
+    assert len(slots[idle.id]) == 5
+    too_long = api_client.get(
+        "/api/appointments/availability/",
+        {
+            "start": MONDAY.isoformat(),
+            "end": (MONDAY + timedelta(days=40)).isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert too_long.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_availability_bench_reads_three_row_sets():
+    report = AvailabilityBench(
+        providers=3, days=2, appointments_per_day=4, repeat=2
+    ).run()
+
+    assert report["searches"] == 2
+    assert report["max_queries"] == 3
+    assert report["slots"] > 0
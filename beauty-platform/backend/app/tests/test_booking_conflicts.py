@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.booking import BookingConflict, conflict_guard
+from appointments.models import Appointment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def booking(api_client, clinic_factory, user_factory, patient_factory):
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+    start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def book(provider=None, patient=None, offset=0, duration=60):
+        payload = {
+            "patient": (patient or patient_factory(clinic=clinic)).id,
+            "scheduled_time": (start + timedelta(minutes=offset)).isoformat(),
+            "duration_minutes": duration,
+        }
+        if provider:
+            payload["provider"] = provider.id
+        return api_client.post("/api/appointments/", payload, format="json")
+
+    book.clinic = clinic
+    return book
+
+
+def test_overlapping_provider_or_patient_bookings_get_409(
+    booking, api_client, user_factory, patient_factory
+):
+    provider = user_factory(clinic=booking.clinic, role=User.Role.PRACTITIONER)
+    patient = patient_factory(clinic=booking.clinic)
+    first = booking(provider=provider, patient=patient)
+
+    same_provider = booking(provider=provider, offset=30)
+    same_patient = booking(patient=patient, offset=59)
+    back_to_back = booking(provider=provider, offset=60)
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert same_provider.status_code == status.HTTP_409_CONFLICT
+    assert same_provider.data["detail"] == "BOOKING_CONFLICT"
+    assert same_provider.data["conflicts"][0]["appointment"] == first.data["id"]
+    assert same_provider.data["conflicts"][0]["field"] == "provider"
+    assert same_patient.data["conflicts"][0]["field"] == "patient"
+    assert back_to_back.status_code == status.HTTP_201_CREATED
+
+    api_client.patch(
+        f"/api/appointments/{first.data['id']}/",
+        {"status": Appointment.Status.CANCELLED},
+        format="json",
+    )
+    assert booking(provider=provider).status_code == status.HTTP_201_CREATED
+
+
+def test_durations_beyond_the_overlap_look_back_are_rejected(booking, patient_factory):
+    patient = patient_factory(clinic=booking.clinic)
+    too_long = booking(patient=patient, duration=24 * 60 + 1)
+    full_day = booking(patient=patient, duration=24 * 60)
+    late_overlap = booking(patient=patient, offset=23 * 60, duration=30)
+
+    assert too_long.status_code == status.HTTP_400_BAD_REQUEST
+    assert "duration_minutes" in too_long.data
+    assert full_day.status_code == status.HTTP_201_CREATED
+    assert late_overlap.status_code == status.HTTP_409_CONFLICT
+
+
+def test_rescheduling_checks_conflicts_but_other_edits_do_not(
+    booking, api_client, user_factory
+):
+    provider = user_factory(clinic=booking.clinic, role=User.Role.PRACTITIONER)
+    first = booking(provider=provider).data
+    second = booking(provider=provider, offset=120).data
+
+    moved = api_client.patch(
+        f"/api/appointments/{second['id']}/",
+        {"scheduled_time": first["scheduled_time"]},
+        format="json",
+    )
+    noted = api_client.patch(
+        f"/api/appointments/{first['id']}/", {"notes": "Bring results"}, format="json"
+    )
+    longer = api_client.patch(
+        f"/api/appointments/{first['id']}/", {"duration_minutes": 90}, format="json"
+    )
+
+    assert moved.status_code == status.HTTP_409_CONFLICT
+    assert noted.status_code == status.HTTP_200_OK
+    assert longer.status_code == status.HTTP_200_OK
+    assert Appointment.objects.get(pk=first["id"]).ends_at == Appointment.objects.get(
+        pk=first["id"]
+    ).scheduled_time + timedelta(minutes=90)
+
+
+def test_conflict_guard_maps_exclusion_violations():
+    with pytest.raises(BookingConflict) as caught:
+        with conflict_guard():
+            raise IntegrityError(
+                "conflicting key value violates exclusion constraint "
+                '"appointment_provider_no_overlap"'
+            )
+    assert caught.value.status_code == status.HTTP_409_CONFLICT
+    assert caught.value.detail["conflicts"] == [{"field": "provider"}]
+
+    with pytest.raises(IntegrityError):
+        with conflict_guard():
+            raise IntegrityError("duplicate key value violates unique constraint")
@@ -0,0 +1,82 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Appointment
+from billing.entitlements import get_entitlement
+
+pytestmark = pytest.mark.django_db
+
+TEHRAN = ZoneInfo("Asia/Tehran")
+MONDAY = date(2030, 1, 7)
+
+
+def _at(day_offset, hour, minute=0):
+    return datetime.combine(MONDAY + timedelta(days=day_offset), time(hour, minute), tzinfo=TEHRAN)
+
+
+def test_week_calendar_is_columnar_and_deduplicated(
+    api_client,
+    clinic_factory,
+    user_factory,
+    patient_factory,
+    service_factory,
+    appointment_factory,
+    django_assert_num_queries,
+):
+    clinic = clinic_factory(timezone="Asia/Tehran")
+    zahra = user_factory(clinic=clinic, role=User.Role.PRACTITIONER, first_name="Zahra")
+    amir = user_factory(clinic=clinic, role=User.Role.PRACTITIONER, first_name="Amir")
+    patient = patient_factory(clinic=clinic, first_name="Sara", last_name="Ahmadi")
+    service = service_factory(clinic=clinic, name="Laser")
+
+    def book(provider, when, **kwargs):
+        return appointment_factory(
+            clinic=clinic,
+            provider=provider,
+            patient=kwargs.pop("patient", patient),
+            service=service,
+            scheduled_time=when,
+            **kwargs,
+        )
+
+    first = book(zahra, _at(0, 9, 30))
+    book(zahra, _at(2, 11), duration_minutes=45, status=Appointment.Status.CONFIRMED)
+    book(amir, _at(1, 10))
+    book(None, _at(3, 8), patient=patient_factory(clinic=clinic))
+    book(amir, _at(4, 10), status=Appointment.Status.CANCELLED)
+    book(amir, _at(7, 10))  # next week
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+    get_entitlement(clinic.id)
+
+    with django_assert_num_queries(1):
+        response = api_client.get(
+            "/api/appointments/calendar/", {"start": MONDAY.isoformat(), "view": "week"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.data
+    assert data["timezone"] == "Asia/Tehran"
+    assert [row["name"] for row in data["providers"]] == ["Amir", "Zahra", ""]
+    assert data["providers"][-1]["id"] is None
+    assert data["services"] == [{"id": service.id, "name": "Laser"}]
+    assert len(data["patients"]) == 2
+    zahra_lane = data["lanes"][1]
+    assert zahra_lane[0] == [9 * 60 + 30, 30, 0, 0, 0, first.id]
+    assert zahra_lane[1][:2] == [2 * 24 * 60 + 11 * 60, 45]
+    assert data["statuses"][zahra_lane[1][2]] == Appointment.Status.CONFIRMED
+    assert [len(lane) for lane in data["lanes"]] == [1, 2, 1]
+
+
+def test_calendar_validates_the_window(api_client, clinic_factory, user_factory):
+    api_client.force_authenticate(user=user_factory(clinic=clinic_factory(), role=User.Role.STAFF))
+
+    response = api_client.get(
+        "/api/appointments/calendar/",
+        {"start": MONDAY.isoformat(), "end": (MONDAY - timedelta(days=1)).isoformat()},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,27 @@
+import pytest
+
+from accounts.bench import STEPS, LoginFunnelBench, percentile
+from accounts.sms import FakeSMSProvider
+
+pytestmark = pytest.mark.django_db
+
+
+def test_percentile_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_login_funnel_records_every_step():
+    bench = LoginFunnelBench(users=2, provider=FakeSMSProvider(max_concurrency=1))
+    bench.seed_users()
+
+    assert all(bench.run_user(index) for index in range(2))
+
+    report = bench.report()
+    for step in STEPS:
+        assert report["steps"][step]["count"] == 2
+        assert report["steps"][step]["errors"] == 0
+        assert report["steps"][step]["max_queries"] > 0
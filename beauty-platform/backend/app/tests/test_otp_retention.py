@@ -0,0 +1,56 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from accounts import partitioning
+from accounts.models import OTPRequest
+
+pytestmark = pytest.mark.django_db
+
+
+def _otp(user, age: timedelta) -> OTPRequest:
+    created = timezone.now() - age
+    otp = OTPRequest.objects.create(
+        user=user,
+        phone_number=user.phone_number,
+        purpose=OTPRequest.Purpose.LOGIN,
+        code_hash="secret-hash",
+        expires_at=created + timedelta(minutes=2),
+    )
+    OTPRequest.objects.filter(pk=otp.pk).update(created_at=created)
+    return otp
+
+
+def test_purge_otps_archives_and_deletes_only_expired_rows(tmp_path, settings, user_factory):
+    settings.OTP_RETENTION_DAYS = 30
+    user = user_factory()
+    old = [_otp(user, timedelta(days=40 + i)) for i in range(3)]
+    recent = _otp(user, timedelta(days=1))
+    archive = tmp_path / "otps.ndjson"
+
+    call_command("purge_otps", batch_size=2, pause=0, archive=str(archive))
+
+    assert list(OTPRequest.objects.values_list("id", flat=True)) == [recent.id]
+    rows = [json.loads(line) for line in archive.read_text().splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(otp.id for otp in old)
+    assert all("code_hash" not in row and "sealed_code" not in row for row in rows)
+
+
+def test_partition_month_helpers():
+    assert partitioning.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert partitioning.months_between(date(2026, 11, 15), date(2027, 1, 1)) == [
+        date(2026, 11, 1),
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+    ]
+    name = partitioning.partition_name(date(2027, 1, 1))
+    assert name == "accounts_otprequest_y2027m01"
+    assert partitioning.partition_month(name) == date(2027, 1, 1)
+
+
+def test_partition_command_requires_postgres():
+    with pytest.raises(CommandError, match="PostgreSQL"):
+        call_command("partition_otps")
@@ -0,0 +1,125 @@
+import secrets
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts import otp_store
+from accounts.models import OTPRequest
+from accounts.views import OTP_MAX_ATTEMPTS, _hash_code
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True, params=["memory", "redis"])
+def store_backend(request):
+    # Every test runs against the in-process store and the Redis Lua scripts.
+    if request.param == "redis":
+        request.getfixturevalue("fake_redis")
+    return request.param
+
+
+def _verify(api_client, phone_number, code):
+    return api_client.post(
+        "/api/auth/verify-otp",
+        {"phone_number": phone_number, "purpose": OTPRequest.Purpose.LOGIN, "code": code},
+        format="json",
+    )
+
+
+def test_failed_attempt_only_writes_the_attempt_count(
+    api_client, user_factory, monkeypatch, django_assert_num_queries
+):
+    user = user_factory(phone_number="09126660000")
+    monkeypatch.setattr(secrets, "randbelow", lambda _: 111111)
+    api_client.post(
+        "/api/auth/request-otp",
+        {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN},
+        format="json",
+    )
+
+    with django_assert_num_queries(1):
+        response = _verify(api_client, user.phone_number, "222222")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["attempts"] == 1
+    assert OTPRequest.objects.get(phone_number=user.phone_number).attempt_count == 1
+
+
+def test_lost_store_entry_keeps_the_lockout_count(api_client, user_factory, monkeypatch):
+    user = user_factory(phone_number="09126660004")
+    monkeypatch.setattr(secrets, "randbelow", lambda _: 555555)
+    api_client.post(
+        "/api/auth/request-otp",
+        {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN},
+        format="json",
+    )
+    for _ in range(OTP_MAX_ATTEMPTS):
+        _verify(api_client, user.phone_number, "000000")
+    otp_store.reset()  # eviction or restart
+
+    response = _verify(api_client, user.phone_number, "555555")
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.data["attempts"] == OTP_MAX_ATTEMPTS + 1
+
+
+def test_verified_code_is_written_back_once_and_cannot_be_replayed(
+    api_client, user_factory, monkeypatch
+):
+    user = user_factory(phone_number="09126660001")
+    monkeypatch.setattr(secrets, "randbelow", lambda _: 333333)
+    api_client.post(
+        "/api/auth/request-otp",
+        {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN},
+        format="json",
+    )
+    _verify(api_client, user.phone_number, "000000")
+
+    first = _verify(api_client, user.phone_number, "333333")
+    replay = _verify(api_client, user.phone_number, "333333")
+
+    otp = OTPRequest.objects.get(phone_number=user.phone_number)
+    assert first.status_code == status.HTTP_200_OK
+    assert first.data["attempts"] == 2
+    assert otp.is_verified is True
+    assert otp.attempt_count == 2
+    assert replay.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_cold_store_is_primed_from_latest_row(api_client, user_factory):
+    user = user_factory(phone_number="09126660002")
+    OTPRequest.objects.create(
+        user=user,
+        phone_number=user.phone_number,
+        purpose=OTPRequest.Purpose.LOGIN,
+        code_hash=_hash_code("444444", user.phone_number),
+        expires_at=timezone.now() + timedelta(minutes=2),
+        attempt_count=2,
+    )
+
+    response = _verify(api_client, user.phone_number, "444444")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["attempts"] == 3
+
+
+def test_lock_is_recorded_only_on_first_transition(user_factory):
+    user = user_factory(phone_number="09126660003")
+    otp = OTPRequest.objects.create(
+        user=user,
+        phone_number=user.phone_number,
+        purpose=OTPRequest.Purpose.LOGIN,
+        code_hash="expected",
+        expires_at=timezone.now() + timedelta(minutes=2),
+        attempt_count=OTP_MAX_ATTEMPTS,
+    )
+    otp_store.put(otp)
+
+    first = otp_store.check(user.phone_number, otp.purpose, "expected", OTP_MAX_ATTEMPTS)
+    second = otp_store.check(user.phone_number, otp.purpose, "expected", OTP_MAX_ATTEMPTS)
+
+    assert (first.outcome, first.first_terminal) == (otp_store.LOCKED, True)
+    assert (second.outcome, second.first_terminal) == (otp_store.LOCKED, False)
+    assert second.attempts == OTP_MAX_ATTEMPTS + 2
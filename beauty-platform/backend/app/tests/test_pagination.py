@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Appointment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def clinic(api_client, clinic_factory, user_factory):
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER))
+    return clinic
+
+
+def test_appointment_pages_follow_keyset_with_ties_and_walk_back(
+    api_client, clinic, appointment_factory
+):
+    base = timezone.now().replace(microsecond=123456)
+    for offset in (0, 0, 0, 1, 2):  # three appointments share a start time
+        appointment_factory(clinic=clinic, scheduled_time=base - timedelta(hours=offset))
+    expected = list(
+        Appointment.objects.filter(clinic=clinic)
+        .order_by("-scheduled_time", "id")
+        .values_list("id", flat=True)
+    )
+
+    pages, url = [], "/api/appointments/?page_size=2"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.data)
+        url = response.data["next"]
+
+    assert [row["id"] for page in pages for row in page["results"]] == expected
+    assert pages[0]["previous"] is None
+    back = api_client.get(pages[-1]["previous"]).data
+    assert [row["id"] for row in back["results"]] == expected[2:4]
+
+
+def test_later_pages_skip_count_and_offset(
+    api_client, clinic, patient_factory, django_assert_num_queries
+):
+    for index in range(5):
+        patient_factory(clinic=clinic, last_name=f"Name{index}")
+    first = api_client.get("/api/patients/", {"page_size": 2}).data
+
+    with django_assert_num_queries(1) as captured:
+        response = api_client.get(first["next"])
+
+    sql = captured.captured_queries[0]["sql"]
+    assert "COUNT(" not in sql and "OFFSET" not in sql
+    assert [row["last_name"] for row in response.data["results"]] == ["Name2", "Name3"]
+
+
+def test_invalid_cursor_is_rejected(api_client, clinic):
+    response = api_client.get("/api/patients/", {"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from patients.models import Patient
+
+pytestmark = pytest.mark.django_db
+
+
+def _body(response) -> str:
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+def _client(api_client, user_factory, clinic):
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+    return api_client
+
+
+def test_csv_export_streams_selected_columns_of_the_clinic(
+    api_client, user_factory, clinic_factory, patient_factory
+):
+    clinic = clinic_factory()
+    patient_factory(clinic=clinic, first_name="Zahra", last_name="B", phone_number="+989121111111")
+    patient_factory(clinic=clinic, first_name="=cmd", last_name="A", phone_number="+989122222222")
+    patient_factory(last_name="Elsewhere")
+    client = _client(api_client, user_factory, clinic)
+
+    response = client.get("/api/patients/export/", {"columns": "last_name,first_name,phone_number"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert list(csv.reader(io.StringIO(_body(response).lstrip("\ufeff")))) == [
+        ["last_name", "first_name", "phone_number"],
+        ["A", "'=cmd", "+989122222222"],
+        ["B", "Zahra", "+989121111111"],
+    ]
+
+
+def test_ndjson_export_filters_on_updated_at(
+    api_client, user_factory, clinic_factory, patient_factory
+):
+    clinic = clinic_factory()
+    stale = patient_factory(clinic=clinic, last_name="Stale")
+    fresh = patient_factory(clinic=clinic, last_name="Fresh")
+    Patient.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(days=30))
+    client = _client(api_client, user_factory, clinic)
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+
+    response = client.get(
+        "/api/patients/export/", {"format": "ndjson", "columns": "id", "updated_after": since}
+    )
+    bad = client.get("/api/patients/export/", {"columns": "id,search_text"})
+
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+    assert [json.loads(line) for line in _body(response).splitlines()] == [{"id": fresh.id}]
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
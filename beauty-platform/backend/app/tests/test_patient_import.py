@@ -0,0 +1,125 @@
+import csv
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+
+from accounts.models import User
+from accounts.tokens import ClinicRefreshToken
+from billing.models import ClinicUsage, PlanAction
+from patients.imports import claim_next, run_import
+from patients.models import Patient, PatientImport
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _upload(rows) -> SimpleUploadedFile:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return SimpleUploadedFile("patients.csv", buffer.getvalue().encode("utf-8-sig"))
+
+
+def _owner_client(api_client, user_factory, clinic):
+    # A real access token, so requests see the claims principal, not a User.
+    owner = user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
+    access = ClinicRefreshToken.for_user(owner).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+    return api_client
+
+
+def test_import_upload_with_access_token_records_the_uploader(
+    api_client, user_factory, clinic_factory
+):
+    clinic = clinic_factory()
+    client = _owner_client(api_client, user_factory, clinic)
+
+    response = client.post(
+        "/api/patient-imports/",
+        {"file": _upload([["First Name", "Last Name", "Mobile"], ["Sara", "Ahmadi", "0912"]])},
+        format="multipart",
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = PatientImport.objects.get(pk=response.data["id"])
+    assert job.created_by.role == User.Role.CLINIC_OWNER
+    assert job.clinic_id == clinic.id
+
+
+def test_import_creates_patients_and_reports_duplicates_and_errors(
+    api_client, user_factory, clinic_factory, patient_factory
+):
+    clinic = clinic_factory()
+    patient_factory(clinic=clinic, phone_number="09123000000")
+    client = _owner_client(api_client, user_factory, clinic)
+    upload = _upload(
+        [
+            ["First Name", "Last Name", "Mobile", "Gender"],
+            ["Sara", "Ahmadi", "0912 111 2233", "female"],
+            ["Reza", "Karimi", "+98 912 300 0000", ""],
+            ["Sara", "Ahmadi", "09121112233", ""],
+            ["Nobody", "", "12", ""],
+            ["Ali", "Rezaei", "09125556677", "M"],
+        ]
+    )
+
+    response = client.post("/api/patient-imports/", {"file": upload}, format="multipart")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data["status"] == PatientImport.Status.QUEUED
+
+    call_command("run_patient_imports", once=True, batch_size=2)
+    job = client.get(f"/api/patient-imports/{response.data['id']}/").data
+    report = client.get(f"/api/patient-imports/{response.data['id']}/errors/")
+    lines = list(csv.reader(io.StringIO(b"".join(report.streaming_content).decode("utf-8-sig"))))
+
+    assert job["status"] == PatientImport.Status.COMPLETED
+    assert (job["total_rows"], job["processed_rows"]) == (5, 5)
+    assert (job["created_count"], job["duplicate_count"], job["error_count"]) == (2, 2, 1)
+    assert set(Patient.objects.filter(clinic=clinic).values_list("phone_number", flat=True)) == {
+        "09123000000",
+        "+989121112233",
+        "+989125556677",
+    }
+    assert [(line[0], line[2]) for line in lines[1:]] == [
+        ("3", "duplicate"),
+        ("4", "duplicate"),
+        ("5", "error"),
+    ]
+    assert ClinicUsage.objects.get(clinic=clinic, action=PlanAction.CREATE_PATIENT).used == 3
+
+
+def test_import_stops_at_plan_limit_after_committed_batches(
+    user_factory, clinic_factory, settings
+):
+    settings.FREE_MAX_PATIENTS = 3
+    clinic = clinic_factory()
+    rows = [["first_name", "last_name", "phone_number"]]
+    rows += [["Patient", str(index), f"0912400{index:04d}"] for index in range(5)]
+    PatientImport.objects.create(
+        clinic=clinic, source=_upload(rows), file_format=PatientImport.Format.CSV
+    )
+
+    job = run_import(claim_next(), batch_size=2)
+
+    assert job.status == PatientImport.Status.FAILED
+    assert (job.processed_rows, job.created_count, job.error_count) == (2, 2, 2)
+    assert Patient.objects.filter(clinic=clinic).count() == 2
+    assert claim_next() is None
+
+
+def test_imports_are_scoped_to_the_clinic(api_client, user_factory, clinic_factory):
+    other = PatientImport.objects.create(
+        clinic=clinic_factory(),
+        source=_upload([["first_name", "last_name", "phone_number"]]),
+        file_format=PatientImport.Format.CSV,
+    )
+    client = _owner_client(api_client, user_factory, clinic_factory())
+
+    assert client.get(f"/api/patient-imports/{other.pk}/").status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/api/patient-imports/").data["results"] == []
@@ -0,0 +1,59 @@
+import pytest
+from rest_framework import status
+
+from patients.models import Patient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def clinic(api_client, clinic_factory, user_factory):
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic))
+    return clinic
+
+
+def _search(api_client, term, **params):
+    response = api_client.get("/api/patients/", {"search": term, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [row["id"] for row in response.data["results"]]
+
+
+def test_search_folds_arabic_letter_forms(api_client, clinic, patient_factory):
+    # Arabic yeh and kaf, as typed on an Arabic keyboard layout.
+    patient = patient_factory(clinic=clinic, first_name="علي", last_name="كريمي")
+    patient_factory(clinic=clinic, first_name="Sara", last_name="Ahmadi")
+
+    assert _search(api_client, "علی کریمی") == [patient.id]
+    assert Patient.objects.get(pk=patient.pk).search_text == "علی کریمی"
+
+
+def test_search_matches_phone_digits_regardless_of_formatting(
+    api_client, clinic, patient_factory
+):
+    patient = patient_factory(clinic=clinic, phone_number="0912 123 4567")
+    patient_factory(clinic=clinic, phone_number="09350000000")
+
+    assert _search(api_client, "0912-123") == [patient.id]
+    assert _search(api_client, "۰۹۱۲۱۲۳۴۵۶۷") == [patient.id]
+    assert _search(api_client, "+98 912 123") == [patient.id]
+
+
+def test_search_ranks_prefix_matches_first_and_stays_in_tenant(
+    api_client, clinic, clinic_factory, patient_factory
+):
+    inner = patient_factory(clinic=clinic, first_name="Maryam", last_name="Sarabi")
+    prefix = patient_factory(clinic=clinic, first_name="Sara", last_name="Zand")
+    patient_factory(clinic=clinic_factory(), first_name="Sara", last_name="Other")
+
+    assert _search(api_client, "sara") == [prefix.id, inner.id]
+    assert _search(api_client, "SARA", limit=1) == [prefix.id]
+
+
+def test_search_columns_follow_partial_updates(clinic, patient_factory):
+    patient = patient_factory(clinic=clinic, first_name="Neda")
+
+    patient.last_name = "Rahimi"
+    patient.save(update_fields=["last_name"])
+
+    assert Patient.objects.get(pk=patient.pk).search_text == "neda rahimi"
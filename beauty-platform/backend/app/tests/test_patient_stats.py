@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import Appointment, Procedure
+from patients.models import Patient
+
+pytestmark = pytest.mark.django_db
+
+COMPLETED = Appointment.Status.COMPLETED
+
+
+def _stats(patient):
+    patient.refresh_from_db()
+    return patient.completed_visits, patient.last_visit_at, patient.lifetime_value
+
+
+def test_stats_follow_appointment_and_procedure_changes(patient_factory, appointment_factory):
+    patient = patient_factory()
+    older = timezone.now() - timedelta(days=10)
+    newer = timezone.now() - timedelta(days=2)
+    first = appointment_factory(clinic=patient.clinic, patient=patient, scheduled_time=older)
+    second = appointment_factory(
+        clinic=patient.clinic, patient=patient, scheduled_time=newer, status=COMPLETED
+    )
+    assert _stats(patient) == (1, newer, Decimal("0.00"))
+
+    first.status = COMPLETED
+    first.save()
+    procedure = Procedure.objects.create(appointment=first, description="Peel", price=120)
+    Procedure.objects.create(appointment=second, description="Laser", price=80)
+    procedure = Procedure.objects.get(pk=procedure.pk)
+    procedure.price = Decimal("150.50")
+    procedure.save()
+    assert _stats(patient) == (2, newer, Decimal("230.50"))
+
+    second.status = Appointment.Status.CANCELLED
+    second.save()
+    procedure.delete()
+    assert _stats(patient) == (1, older, Decimal("80.00"))
+
+    second.delete()
+    assert _stats(patient) == (1, older, Decimal("0.00"))
+
+
+def test_rebuild_patient_stats_repairs_drift(patient_factory, appointment_factory):
+    patient = patient_factory()
+    visit = appointment_factory(clinic=patient.clinic, patient=patient, status=COMPLETED)
+    Procedure.objects.create(appointment=visit, description="Peel", price=50)
+    Patient.objects.filter(pk=patient.pk).update(completed_visits=9, lifetime_value=0)
+
+    call_command("rebuild_patient_stats", clinic=[patient.clinic_id])
+
+    assert _stats(patient) == (1, visit.scheduled_time, Decimal("50.00"))
+
+
+def test_stats_migration_backfills_from_source_rows(patient_factory, appointment_factory):
+    migration = import_module("patients.migrations.0007_patient_engagement_stats")
+    patient = patient_factory()
+    visit = appointment_factory(clinic=patient.clinic, patient=patient, status=COMPLETED)
+    Procedure.objects.create(appointment=visit, description="Peel", price=50)
+    Patient.objects.filter(pk=patient.pk).update(
+        completed_visits=0, last_visit_at=None, lifetime_value=0
+    )
+
+    migration.fill_engagement_stats(apps, None)
+
+    assert _stats(patient) == (1, visit.scheduled_time, Decimal("50.00"))
+
+
+def test_patient_list_sorts_and_filters_by_engagement(
+    api_client, clinic_factory, patient_factory, user_factory
+):
+    clinic = clinic_factory()
+    values = [Decimal("10.00"), Decimal("300.00"), Decimal("45.00"), Decimal("0.00")]
+    patients = [patient_factory(clinic=clinic) for _ in values]
+    for patient, value in zip(patients, values):
+        Patient.objects.filter(pk=patient.pk).update(
+            lifetime_value=value, completed_visits=1 if value else 0
+        )
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+
+    first = api_client.get(
+        "/api/patients/", {"ordering": "-lifetime_value", "min_visits": 1, "page_size": 2}
+    ).data
+    second = api_client.get(first["next"]).data
+    invalid = api_client.get("/api/patients/", {"ordering": "notes"})
+
+    assert [row["lifetime_value"] for row in first["results"] + second["results"]] == [
+        "300.00",
+        "45.00",
+        "10.00",
+    ]
+    assert invalid.status_code == 400
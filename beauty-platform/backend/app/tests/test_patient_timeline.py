@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Procedure
+from billing.models import Payment
+
+pytestmark = pytest.mark.django_db
+
+
+def _visit(appointment_factory, patient, days_ago, procedures=2):
+    appointment = appointment_factory(
+        clinic=patient.clinic,
+        patient=patient,
+        scheduled_time=timezone.now() - timedelta(days=days_ago),
+    )
+    for index in range(procedures):
+        Procedure.objects.create(
+            appointment=appointment,
+            service=appointment.service,
+            description=f"Step {index}",
+            performed_by=appointment.provider,
+        )
+    Payment.objects.create(appointment=appointment, amount=100, status=Payment.Status.PAID)
+    return appointment
+
+
+def test_timeline_nests_related_rows_in_a_fixed_number_of_queries(
+    api_client, user_factory, patient_factory, appointment_factory, django_assert_num_queries
+):
+    patient = patient_factory()
+    api_client.force_authenticate(user=user_factory(clinic=patient.clinic, role=User.Role.STAFF))
+    url = f"/api/patients/{patient.id}/timeline/"
+    latest = _visit(appointment_factory, patient, days_ago=1)
+    _visit(appointment_factory, patient, days_ago=5, procedures=1)
+    appointment_factory(clinic=patient.clinic)  # another patient's visit
+
+    with django_assert_num_queries(4):
+        response = api_client.get(url)
+    for days_ago in range(10, 16):
+        _visit(appointment_factory, patient, days_ago=days_ago)
+    with django_assert_num_queries(4):
+        api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    first = response.data["results"][0]
+    assert [row["id"] for row in response.data["results"]][0] == latest.id
+    assert len(response.data["results"]) == 2
+    assert first["service_name"] == latest.service.name
+    assert first["provider_name"] == latest.provider.username
+    assert [row["description"] for row in first["procedures"]] == ["Step 0", "Step 1"]
+    assert first["procedures"][0]["performed_by_name"] == latest.provider.username
+    assert first["payments"][0]["status"] == Payment.Status.PAID
+
+
+def test_timeline_pages_by_scheduled_time_within_the_clinic(
+    api_client, user_factory, patient_factory, appointment_factory
+):
+    patient = patient_factory()
+    visits = [_visit(appointment_factory, patient, days_ago=day, procedures=0) for day in range(5)]
+    api_client.force_authenticate(user=user_factory(clinic=patient.clinic, role=User.Role.STAFF))
+
+    first = api_client.get(f"/api/patients/{patient.id}/timeline/", {"page_size": 3}).data
+    second = api_client.get(first["next"]).data
+    outsider = patient_factory()
+
+    assert [row["id"] for row in first["results"] + second["results"]] == [v.id for v in visits]
+    assert second["next"] is None
+    assert (
+        api_client.get(f"/api/patients/{outsider.id}/timeline/").status_code
+        == status.HTTP_404_NOT_FOUND
+    )
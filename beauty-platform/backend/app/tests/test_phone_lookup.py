@@ -0,0 +1,109 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from rest_framework import status
+
+from accounts.directory import lookup_phone
+from accounts.models import OTPRequest, User
+from accounts.phone import InvalidPhoneNumber, normalize_phone_number
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "09123456789",
+        "0912 345 6789",
+        "+98 912-345-6789",
+        "00989123456789",
+        "۰۹۱۲۳۴۵۶۷۸۹",
+        "9123456789",
+        "989123456789",
+    ],
+)
+def test_normalize_phone_number_to_e164(raw):
+    assert normalize_phone_number(raw) == "+989123456789"
+
+
+def test_normalize_phone_number_keeps_foreign_country_codes():
+    assert normalize_phone_number("4915112345678") == "+4915112345678"
+    assert normalize_phone_number("0044 20 7123 4567") == "+442071234567"
+
+
+@pytest.mark.parametrize("raw", ["", "   ", "12", "+1234567890123456"])
+def test_normalize_phone_number_rejects_invalid(raw):
+    with pytest.raises(InvalidPhoneNumber):
+        normalize_phone_number(raw)
+
+
+def test_phone_migration_aborts_on_numbers_that_collide(user_factory):
+    migration = import_module("accounts.migrations.0005_user_phone_unique")
+    first = user_factory(phone_number="09121112230")
+    second = user_factory(phone_number="09121112231")
+    User.objects.filter(pk=second.pk).update(phone_number="0912 111 2230")
+
+    with pytest.raises(RuntimeError, match=f"User ids: {first.pk}, {second.pk}"):
+        migration.normalize_phone_numbers(apps, None)
+
+    assert User.objects.get(pk=second.pk).phone_number == "0912 111 2230"
+
+
+def test_user_phone_is_canonical_and_unique(user_factory):
+    user = user_factory(phone_number="0912 111 2233")
+
+    assert user.phone_number == "+989121112233"
+    with pytest.raises(IntegrityError), transaction.atomic():
+        user_factory(phone_number="+989121112233")
+
+
+def test_request_otp_accepts_any_spelling_and_uses_cached_lookup(
+    api_client, user_factory, django_assert_num_queries
+):
+    user = user_factory(phone_number="09121112234")
+    api_client.post(
+        "/api/auth/request-otp",
+        {"phone_number": "0912 111 2234", "purpose": OTPRequest.Purpose.LOGIN},
+        format="json",
+    )
+
+    with django_assert_num_queries(1):  # only the OTPRequest insert
+        response = api_client.post(
+            "/api/auth/request-otp",
+            {"phone_number": "+98-912-111-2234", "purpose": OTPRequest.Purpose.LOGIN},
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert set(OTPRequest.objects.values_list("user_id", flat=True)) == {user.id}
+
+
+def test_lookup_cache_follows_phone_changes(user_factory):
+    user = user_factory(phone_number="09121112235")
+    assert lookup_phone("+989121112235").user_id == user.id
+    assert lookup_phone("+989121119999") is None
+
+    user.phone_number = "09121119999"
+    user.save()
+
+    assert lookup_phone("+989121112235") is None
+    assert lookup_phone("+989121119999").user_id == user.id
+
+
+def test_staff_serializer_rejects_duplicate_phone(api_client, clinic_factory, user_factory):
+    clinic = clinic_factory()
+    owner = user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
+    existing = user_factory(phone_number="09121112236")
+    api_client.force_authenticate(user=owner)
+
+    response = api_client.post(
+        "/api/staff/",
+        {"username": "dup", "email": "dup@example.com", "phone_number": "0912-111-2236"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "phone_number" in response.data
+    assert existing.phone_number == "+989121112236"
@@ -48,7 +48,7 @@ def test_plan_limits_block_on_free_tier_until_payment(
 ):
     settings.FREE_MAX_STAFF = 1
     settings.FREE_MAX_PATIENTS = 1
-    settings.FREE_MAX_APPOINTMENTS = 1
+    settings.FREE_MAX_APPOINTMENTS_PER_MONTH = 1
 
     clinic = clinic_factory()
     owner = user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
@@ -0,0 +1,165 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Appointment
+from billing.entitlements import get_entitlement
+from billing.limits import PlanLimitExceeded, period_for, reconcile, reservation
+from billing.models import ClinicUsage, Plan, PlanAction, Subscription
+from patients.models import Patient
+
+pytestmark = pytest.mark.django_db
+
+
+def _used(clinic, action):
+    return ClinicUsage.objects.get(clinic=clinic, action=action).used
+
+
+def test_reservation_bootstraps_counter_and_stops_at_limit(
+    clinic_factory, patient_factory, settings
+):
+    settings.FREE_MAX_PATIENTS = 2
+    clinic = clinic_factory()
+    patient_factory(clinic=clinic)
+
+    with reservation(clinic.id, PlanAction.CREATE_PATIENT):
+        patient_factory(clinic=clinic)
+
+    assert _used(clinic, PlanAction.CREATE_PATIENT) == 2
+    with pytest.raises(PlanLimitExceeded):
+        with reservation(clinic.id, PlanAction.CREATE_PATIENT):
+            patient_factory(clinic=clinic)
+    assert Patient.objects.filter(clinic=clinic).count() == 2
+    assert _used(clinic, PlanAction.CREATE_PATIENT) == 2
+
+
+def test_counters_follow_creates_and_deletes_outside_the_api(
+    clinic_factory, patient_factory, user_factory
+):
+    clinic = clinic_factory()
+    reconcile(clinic.id)
+
+    patient = patient_factory(clinic=clinic)
+    patient_factory(clinic=clinic)
+    patient.delete()
+    staff = user_factory(clinic=clinic, role=User.Role.STAFF)
+    user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
+
+    assert _used(clinic, PlanAction.CREATE_PATIENT) == 1
+    assert _used(clinic, PlanAction.CREATE_STAFF) == 1
+
+    staff.role = User.Role.CLINIC_OWNER
+    staff.save(update_fields=["role"])
+    assert _used(clinic, PlanAction.CREATE_STAFF) == 0
+
+
+def test_reconcile_usage_repairs_drift(clinic_factory, patient_factory, capsys):
+    clinic = clinic_factory()
+    reconcile(clinic.id)
+    patient_factory(clinic=clinic)
+    ClinicUsage.objects.filter(clinic=clinic, action=PlanAction.CREATE_PATIENT).update(used=7)
+
+    call_command("reconcile_usage", clinic=[clinic.id])
+
+    assert _used(clinic, PlanAction.CREATE_PATIENT) == 1
+    assert "CREATE_PATIENT" in capsys.readouterr().out
+
+
+def test_plan_change_invalidates_cached_entitlement(
+    clinic_factory, plan_factory, django_assert_num_queries
+):
+    clinic = clinic_factory()
+    plan = plan_factory(tier=Plan.Tier.STANDARD, monthly_price=250)
+    Subscription.objects.create(
+        clinic=clinic, plan=plan, status=Subscription.Status.ACTIVE, start_date=date(2026, 1, 1)
+    )
+    assert get_entitlement(clinic.id).limit(PlanAction.CREATE_PATIENT) is None
+
+    with django_assert_num_queries(0):
+        get_entitlement(clinic.id)
+
+    plan.monthly_price = 0
+    plan.save(update_fields=["monthly_price"])
+
+    assert get_entitlement(clinic.id).paid is False
+
+
+def test_appointment_period_follows_clinic_timezone(clinic_factory):
+    clinic = clinic_factory(timezone="Asia/Tehran")
+    late_january_utc = datetime(2026, 1, 31, 21, 0, tzinfo=dt_timezone.utc)
+
+    assert period_for(clinic.id, PlanAction.CREATE_APPOINTMENT, late_january_utc) == date(
+        2026, 2, 1
+    )
+    assert period_for(clinic.id, PlanAction.CREATE_PATIENT, late_january_utc) is None
+
+
+def test_monthly_appointment_quota_ignores_past_months_and_frees_cancelled_slots(
+    api_client, clinic_factory, patient_factory, appointment_factory, user_factory, settings
+):
+    settings.FREE_MAX_APPOINTMENTS_PER_MONTH = 1
+    clinic = clinic_factory()
+    old = appointment_factory(clinic=clinic)
+    Appointment.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=45))
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER))
+    payload = {
+        "patient": patient_factory(clinic=clinic).id,
+        "scheduled_time": timezone.now().isoformat(),
+    }
+
+    first = api_client.post("/api/appointments/", payload, format="json")
+    later = {**payload, "scheduled_time": (timezone.now() + timedelta(hours=2)).isoformat()}
+    blocked = api_client.post("/api/appointments/", later, format="json")
+    api_client.patch(
+        f"/api/appointments/{first.data['id']}/",
+        {"status": Appointment.Status.CANCELLED},
+        format="json",
+    )
+    after_cancel = api_client.post("/api/appointments/", payload, format="json")
+    usage = {row["action"]: row for row in api_client.get("/api/billing/usage").data}
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert blocked.status_code == status.HTTP_402_PAYMENT_REQUIRED
+    assert after_cancel.status_code == status.HTTP_201_CREATED
+    assert usage[PlanAction.CREATE_APPOINTMENT]["used"] == 1
+    assert usage[PlanAction.CREATE_APPOINTMENT]["limit"] == 1
+    assert usage[PlanAction.CREATE_APPOINTMENT]["period"] == str(
+        period_for(clinic.id, PlanAction.CREATE_APPOINTMENT)
+    )
+
+
+def test_restoring_a_cancelled_appointment_needs_quota(
+    api_client, clinic_factory, patient_factory, user_factory, settings
+):
+    settings.FREE_MAX_APPOINTMENTS_PER_MONTH = 1
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER))
+    patient = patient_factory(clinic=clinic).id
+    start = timezone.now() + timedelta(days=1)
+
+    first = api_client.post(
+        "/api/appointments/", {"patient": patient, "scheduled_time": start.isoformat()}
+    )
+    url = f"/api/appointments/{first.data['id']}/"
+    api_client.patch(url, {"status": Appointment.Status.CANCELLED}, format="json")
+    rebooked = api_client.post(
+        "/api/appointments/",
+        {"patient": patient, "scheduled_time": (start + timedelta(hours=3)).isoformat()},
+    )
+    restored = api_client.patch(url, {"status": Appointment.Status.SCHEDULED}, format="json")
+    usage = {row["action"]: row for row in api_client.get("/api/billing/usage").data}
+
+    assert rebooked.status_code == status.HTTP_201_CREATED
+    assert restored.status_code == status.HTTP_402_PAYMENT_REQUIRED
+    assert Appointment.objects.get(pk=first.data["id"]).status == Appointment.Status.CANCELLED
+    assert usage[PlanAction.CREATE_APPOINTMENT]["used"] == 1
+
+    Appointment.objects.filter(pk=rebooked.data["id"]).delete()
+    restored = api_client.patch(url, {"status": Appointment.Status.SCHEDULED}, format="json")
+
+    assert restored.status_code == status.HTTP_200_OK
+    assert _used(clinic, PlanAction.CREATE_APPOINTMENT) == 1
@@ -0,0 +1,68 @@
+import pytest
+from rest_framework import status
+
+from accounts.models import OTPRequest
+from accounts.views import OTP_RATE_LIMIT
+from beauty_platform.ratelimit import (
+    MemoryRateLimitBackend,
+    Rate,
+    RedisRateLimitBackend,
+    rate_key,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryRateLimitBackend()
+    return RedisRateLimitBackend(request.getfixturevalue("fake_redis"))
+
+
+def test_backend_records_hit_only_when_all_rates_allow(backend):
+    phone = Rate(rate_key("otp-request", "phone", "+989120000000"), 2, 60)
+    ip = Rate(rate_key("otp-request", "ip", "10.0.0.1"), 1, 60)
+
+    first = backend.hit([phone, ip], now_ms=1_000)
+    blocked = backend.hit([phone, ip], now_ms=2_000)
+    phone_only = backend.hit([phone], now_ms=3_000)
+
+    assert first.allowed is True
+    assert first.counts == (1, 1)
+    assert blocked.allowed is False
+    assert blocked.blocked_key == ip.key
+    assert blocked.retry_after == 59
+    assert phone_only.counts == (2,)
+
+
+def test_backend_window_slides(backend):
+    rate = Rate(rate_key("otp-verify", "ip", "10.0.0.2", "LOGIN"), 1, 10)
+
+    assert backend.hit([rate], now_ms=0).allowed is True
+    assert backend.hit([rate], now_ms=9_999).allowed is False
+    assert backend.hit([rate], now_ms=10_000).allowed is True
+
+
+def test_throttled_otp_request_makes_no_queries(
+    api_client, user_factory, django_assert_num_queries
+):
+    user = user_factory(phone_number="09125550000")
+    payload = {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN}
+    for _ in range(OTP_RATE_LIMIT):
+        assert api_client.post("/api/auth/request-otp", payload, format="json").status_code == 200
+
+    with django_assert_num_queries(0):
+        blocked = api_client.post("/api/auth/request-otp", payload, format="json")
+
+    assert blocked.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(blocked["Retry-After"]) > 0
+
+
+def test_redis_backend_counts_are_shared_by_every_client(fake_redis):
+    rate = Rate(rate_key("otp-request", "phone", "+989120000001"), 2, 60)
+    first, second = RedisRateLimitBackend(fake_redis), RedisRateLimitBackend(fake_redis)
+
+    assert first.hit([rate], now_ms=1_000).counts == (1,)
+    assert second.hit([rate], now_ms=1_001).counts == (2,)
+    assert first.hit([rate], now_ms=1_002).allowed is False
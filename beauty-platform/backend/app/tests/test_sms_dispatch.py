@@ -0,0 +1,161 @@
+import secrets
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.dispatch import Dispatcher, claim_batch, deliver
+from accounts.models import OTPRequest
+from accounts.sms import FakeSMSProvider, SMSDeliveryError, seal_code, unseal_code
+
+pytestmark = pytest.mark.django_db
+
+
+class _FailingProvider(FakeSMSProvider):
+    def __init__(self, retryable=True):
+        super().__init__(max_concurrency=1)
+        self.retryable = retryable
+
+    def send_otp(self, phone_number, code, purpose):
+        raise SMSDeliveryError("gateway down", retryable=self.retryable)
+
+
+class _BrokenProvider(FakeSMSProvider):
+    def send_otp(self, phone_number, code, purpose):
+        raise TimeoutError("read timed out")
+
+
+def _queued_otp(user, code="123456", **kwargs):
+    now = timezone.now()
+    defaults = {
+        "user": user,
+        "phone_number": user.phone_number,
+        "purpose": OTPRequest.Purpose.LOGIN,
+        "code_hash": "unused",
+        "expires_at": now + timedelta(minutes=2),
+        "sealed_code": seal_code(code),
+        "next_attempt_at": now,
+    }
+    defaults.update(kwargs)
+    return OTPRequest.objects.create(**defaults)
+
+
+def _claim(otp):
+    OTPRequest.objects.filter(pk=otp.pk).update(next_attempt_at=timezone.now())
+    return next(claimed for claimed in claim_batch(10) if claimed.pk == otp.pk)
+
+
+def test_seal_round_trip():
+    sealed = seal_code("004321")
+    assert "004321" not in sealed
+    assert unseal_code(sealed) == "004321"
+
+
+def test_request_otp_queues_without_calling_provider(api_client, user_factory, monkeypatch):
+    user = user_factory(phone_number="09124440000")
+    monkeypatch.setattr(secrets, "randbelow", lambda _: 246810)
+
+    response = api_client.post(
+        "/api/auth/request-otp",
+        {"phone_number": user.phone_number, "purpose": OTPRequest.Purpose.LOGIN},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["delivery_status"] == OTPRequest.DeliveryStatus.QUEUED
+    otp = OTPRequest.objects.get(phone_number=user.phone_number)
+    assert otp.delivery_status == OTPRequest.DeliveryStatus.QUEUED
+    assert unseal_code(otp.sealed_code) == "246810"
+
+
+def test_worker_claims_and_delivers(user_factory):
+    user = user_factory(phone_number="09124440001")
+    otp = _queued_otp(user, code="111222")
+    provider = FakeSMSProvider()
+
+    batch = claim_batch(10)
+    assert [claimed.pk for claimed in batch] == [otp.pk]
+    assert claim_batch(10) == []
+
+    assert deliver(batch[0], provider) == OTPRequest.DeliveryStatus.SENT
+    otp.refresh_from_db()
+    assert otp.delivered_at is not None
+    assert otp.sealed_code == ""
+    assert provider.last_code_for(user.phone_number) == "111222"
+
+
+def test_retryable_failure_backs_off_then_fails(user_factory, settings):
+    settings.SMS_MAX_ATTEMPTS = 2
+    user = user_factory(phone_number="09124440002")
+    otp = _queued_otp(user)
+    provider = _FailingProvider()
+
+    assert deliver(_claim(otp), provider) == OTPRequest.DeliveryStatus.QUEUED
+    otp.refresh_from_db()
+    assert otp.next_attempt_at > timezone.now()
+    assert otp.delivery_error == "gateway down"
+
+    assert deliver(_claim(otp), provider) == OTPRequest.DeliveryStatus.FAILED
+    otp.refresh_from_db()
+    assert otp.delivery_attempts == 2
+    assert otp.sealed_code == ""
+
+
+def test_permanent_failure_and_expired_otp_are_not_retried(user_factory):
+    user = user_factory(phone_number="09124440003")
+    permanent = _queued_otp(user)
+    expired = _queued_otp(user, expires_at=timezone.now() - timedelta(seconds=1))
+
+    failing = _FailingProvider(retryable=False)
+    assert deliver(_claim(permanent), failing) == OTPRequest.DeliveryStatus.FAILED
+    assert deliver(_claim(expired), FakeSMSProvider()) == OTPRequest.DeliveryStatus.FAILED
+    expired.refresh_from_db()
+    assert expired.delivery_error == "expired"
+
+
+def test_retry_that_would_land_after_expiry_fails_instead(user_factory, settings):
+    settings.SMS_RETRY_BACKOFF_SECONDS = 60
+    user = user_factory(phone_number="09124440005")
+    otp = _queued_otp(user, expires_at=timezone.now() + timedelta(seconds=30))
+
+    assert deliver(_claim(otp), _FailingProvider()) == OTPRequest.DeliveryStatus.FAILED
+    otp.refresh_from_db()
+    assert otp.delivery_status == OTPRequest.DeliveryStatus.FAILED
+    assert otp.sealed_code == ""
+
+
+def test_lost_lease_skips_the_send_and_the_outcome(user_factory):
+    user = user_factory(phone_number="09124440006")
+    otp = _queued_otp(user, code="333444")
+    provider = FakeSMSProvider()
+    [stale] = claim_batch(10)
+    # The lease runs out while the first worker waits; a second worker re-claims.
+    fresh = _claim(otp)
+
+    assert deliver(stale, provider) is None
+    assert provider.last_code_for(user.phone_number) is None
+    assert deliver(fresh, provider) == OTPRequest.DeliveryStatus.SENT
+    assert provider.last_code_for(user.phone_number) == "333444"
+
+    otp.refresh_from_db()
+    assert otp.delivery_status == OTPRequest.DeliveryStatus.SENT
+    assert otp.delivery_attempts == 1
+
+
+def test_unexpected_provider_error_is_recorded_and_worker_keeps_running(user_factory):
+    user = user_factory(phone_number="09124440004")
+    otp = _queued_otp(user)
+    dispatcher = Dispatcher(workers=1, provider=_BrokenProvider())
+    # Called on this thread: the pool's threads cannot see the test database.
+    [claimed] = claim_batch(10)
+    try:
+        assert dispatcher._deliver_in_worker(claimed) is None
+    finally:
+        dispatcher.shutdown()
+
+    otp.refresh_from_db()
+    assert otp.delivery_status == OTPRequest.DeliveryStatus.QUEUED
+    assert otp.delivery_attempts == 1
+    assert otp.delivery_error == "TimeoutError: read timed out"
+    assert otp.next_attempt_at > timezone.now()
@@ -0,0 +1,83 @@
+import pytest
+from rest_framework import status
+
+from accounts.directory import lookup_phone
+from accounts.models import User
+from billing.entitlements import get_entitlement
+from billing.limits import PlanLimitExceeded
+
+pytestmark = pytest.mark.django_db
+
+
+def _rows(count, start=0):
+    return [
+        {
+            "username": f"bulk{start + i}",
+            "email": f"bulk{start + i}@example.com",
+            "phone_number": f"0935000{start + i:04d}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def owner(api_client, clinic_factory, user_factory):
+    owner = user_factory(clinic=clinic_factory(), role=User.Role.CLINIC_OWNER)
+    api_client.force_authenticate(user=owner)
+    return owner
+
+
+def test_bulk_create_staff_from_json_with_constant_queries(
+    api_client, owner, settings, django_assert_max_num_queries
+):
+    settings.FREE_MAX_STAFF = 50
+    lookup_phone("+989350000003")  # cached miss must not hide the new account
+    get_entitlement(owner.clinic_id)
+
+    with django_assert_max_num_queries(13):
+        response = api_client.post("/api/staff/bulk/", _rows(40), format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["count"] == 40
+    staff = User.objects.filter(clinic_id=owner.clinic_id, role=User.Role.STAFF)
+    assert staff.count() == 40
+    assert staff.get(username="bulk3").phone_number == "+989350000003"
+    assert lookup_phone("+989350000003") is not None
+
+
+def test_bulk_create_staff_from_csv(api_client, owner):
+    body = "username,email,phone_number\r\ncsv1,csv1@example.com,09351110000\r\n"
+
+    response = api_client.post("/api/staff/bulk/", body, content_type="text/csv")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert User.objects.get(username="csv1").clinic_id == owner.clinic_id
+
+
+def test_bulk_create_reports_row_errors_and_creates_nothing(api_client, owner, user_factory):
+    user_factory(username="taken", email="taken@example.com")
+    rows = _rows(2) + [
+        {"username": "taken", "email": "fresh@example.com"},
+        {"username": "dupe", "email": "bulk0@example.com"},
+        {"username": "badphone", "email": "badphone@example.com", "phone_number": "abc"},
+    ]
+
+    response = api_client.post("/api/staff/bulk/", rows, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    errors = {item["row"]: item["errors"] for item in response.data["errors"]}
+    assert set(errors) == {2, 3, 4}
+    assert "username" in errors[2]
+    assert errors[3]["email"] == ["Duplicate email in this upload."]
+    assert "phone_number" in errors[4]
+    assert not User.objects.filter(username__startswith="bulk").exists()
+
+
+def test_bulk_create_reserves_whole_batch_against_plan(api_client, owner, settings):
+    settings.FREE_MAX_STAFF = 3
+
+    response = api_client.post("/api/staff/bulk/", _rows(4), format="json")
+
+    assert response.status_code == status.HTTP_402_PAYMENT_REQUIRED
+    assert response.data["detail"] == PlanLimitExceeded.default_detail
+    assert not User.objects.filter(username__startswith="bulk").exists()
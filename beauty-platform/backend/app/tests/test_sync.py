@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import User
+from appointments.models import Procedure
+from sync.changes import TOMBSTONES, encode_token
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def clinic(api_client, clinic_factory, user_factory, settings):
+    settings.SYNC_SETTLE_SECONDS = 0
+    clinic = clinic_factory()
+    api_client.force_authenticate(user=user_factory(clinic=clinic, role=User.Role.STAFF))
+    return clinic
+
+
+def _ids(response, feed):
+    return sorted(row["id"] for row in response.data[feed])
+
+
+def test_sync_returns_only_rows_changed_since_the_token(
+    api_client, clinic, appointment_factory, patient_factory, django_assert_num_queries
+):
+    appointment = appointment_factory(clinic=clinic)
+    procedure = Procedure.objects.create(appointment=appointment, description="Peel", price=90)
+    appointment_factory()  # another clinic
+
+    full = api_client.get("/api/sync")
+    api_client.patch(f"/api/appointments/{appointment.id}/", {"notes": "Late"}, format="json")
+    added = patient_factory(clinic=clinic)
+    with django_assert_num_queries(5):
+        delta = api_client.get("/api/sync", {"token": full.data["token"]})
+    idle = api_client.get("/api/sync", {"token": delta.data["token"]})
+
+    assert full.status_code == status.HTTP_200_OK
+    assert _ids(full, "appointments") == [appointment.id]
+    assert _ids(full, "patients") == [appointment.patient_id]
+    assert _ids(full, "services") == [appointment.service_id]
+    assert _ids(full, "procedures") == [procedure.id]
+    assert _ids(delta, "appointments") == [appointment.id]
+    assert delta.data["appointments"][0]["notes"] == "Late"
+    assert _ids(delta, "patients") == [added.id]
+    assert delta.data["services"] == delta.data["procedures"] == []
+    assert all(idle.data[feed] == [] for feed in ("appointments", "patients", "procedures"))
+    assert idle.data["has_more"] is False
+
+
+def test_deletes_are_reported_as_tombstones(api_client, clinic, appointment_factory):
+    kept = appointment_factory(clinic=clinic)
+    removed = appointment_factory(clinic=clinic)
+    cascaded = Procedure.objects.create(appointment=removed, description="Peel")
+    direct = Procedure.objects.create(appointment=kept, description="Laser")
+    token = api_client.get("/api/sync").data["token"]
+
+    api_client.delete(f"/api/appointments/{removed.id}/")
+    direct_id = direct.id
+    direct.delete()
+    delta = api_client.get("/api/sync", {"token": token})
+
+    assert delta.data[TOMBSTONES]["appointments"] == [removed.id]
+    # The cascaded procedure is dropped by clients along with its appointment.
+    assert cascaded.id not in delta.data[TOMBSTONES]["procedures"]
+    assert delta.data[TOMBSTONES]["procedures"] == [direct_id]
+    again = api_client.get("/api/sync", {"token": delta.data["token"]})
+    assert again.data[TOMBSTONES]["appointments"] == []
+
+
+def test_sync_pages_with_has_more_and_rejects_stale_tokens(api_client, clinic, patient_factory):
+    first, second = patient_factory(clinic=clinic), patient_factory(clinic=clinic)
+
+    page = api_client.get("/api/sync", {"limit": 1})
+    rest = api_client.get("/api/sync", {"limit": 1, "token": page.data["token"]})
+    stale = encode_token({TOMBSTONES: [(timezone.now() - timedelta(days=31)).isoformat(), 0]})
+
+    assert _ids(page, "patients") == [first.id]
+    assert page.data["has_more"] is True
+    assert _ids(rest, "patients") == [second.id]
+    assert rest.data["has_more"] is False
+    assert api_client.get("/api/sync", {"token": stale}).status_code == status.HTTP_410_GONE
+    assert api_client.get("/api/sync", {"token": "garbage"}).status_code == 400
@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+from rest_framework import status
+
+from accounts.models import User
+from billing.entitlements import get_entitlement
+from billing.limits import reconcile
+from billing.models import Subscription
+
+pytestmark = pytest.mark.django_db
+
+
+def test_billing_status_is_served_from_cached_entitlement(
+    api_client, clinic_factory, plan_factory, user_factory, django_assert_num_queries
+):
+    clinic = clinic_factory()
+    subscription = Subscription.objects.create(
+        clinic=clinic,
+        plan=plan_factory(),
+        status=Subscription.Status.ACTIVE,
+        start_date=date(2026, 1, 1),
+    )
+    owner = user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
+    api_client.force_authenticate(user=owner)
+    api_client.get("/api/billing/status")
+
+    with django_assert_num_queries(0):
+        response = api_client.get("/api/billing/status")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["status"] == Subscription.Status.ACTIVE
+
+    subscription.status = Subscription.Status.CANCELLED
+    subscription.save(update_fields=["status"])
+
+    assert api_client.get("/api/billing/status").data["status"] == Subscription.Status.CANCELLED
+
+
+def test_create_reserves_quota_without_locking_clinic(
+    api_client, clinic_factory, user_factory, django_assert_num_queries
+):
+    clinic = clinic_factory()
+    reconcile(clinic.id)
+    api_client.force_authenticate(user=user_factory(clinic=clinic))
+    payload = {"first_name": "Sara", "last_name": "Ahmadi", "phone_number": "09121231234"}
+
+    get_entitlement(clinic.id)
+
+    # Savepoint pair around the reservation, the counter update and the
+    # insert; neither the tenant nor its subscription is loaded.
+    with django_assert_num_queries(4) as captured:
+        response = api_client.post("/api/patients/", payload, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["clinic"] == clinic.id
+    assert not any("FOR UPDATE" in query["sql"] for query in captured.captured_queries)
+
+
+def test_tenant_scoped_views_require_clinic(api_client, user_factory):
+    api_client.force_authenticate(user=user_factory())
+
+    for url in ("/api/patients/", "/api/services/", "/api/appointments/", "/api/procedures/"):
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data["detail"] == "setup_required"
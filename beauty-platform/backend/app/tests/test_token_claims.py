@@ -0,0 +1,78 @@
+import pytest
+from rest_framework import status
+
+from accounts.models import User
+from accounts.tokens import CLINIC_CLAIM, ROLE_CLAIM, VERSION_CLAIM, ClinicRefreshToken
+
+pytestmark = pytest.mark.django_db
+
+
+def _bearer(api_client, token):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+def test_tokens_carry_role_and_clinic_claims(clinic_factory, user_factory):
+    clinic = clinic_factory()
+    user = user_factory(clinic=clinic, role=User.Role.STAFF)
+
+    access = ClinicRefreshToken.for_user(user).access_token
+
+    assert access[ROLE_CLAIM] == User.Role.STAFF
+    assert access[CLINIC_CLAIM] == clinic.id
+    assert access[VERSION_CLAIM] == user.token_version
+
+
+def test_authenticated_list_skips_user_and_clinic_queries(
+    api_client, clinic_factory, patient_factory, user_factory, django_assert_num_queries
+):
+    clinic = clinic_factory()
+    user = user_factory(clinic=clinic)
+    patient_factory(clinic=clinic)
+    _bearer(api_client, ClinicRefreshToken.for_user(user).access_token)
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/patients/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 1
+
+
+def test_role_or_clinic_change_invalidates_issued_tokens(
+    api_client, clinic_factory, user_factory
+):
+    clinic = clinic_factory()
+    user = user_factory(clinic=clinic, role=User.Role.CLINIC_OWNER)
+    _bearer(api_client, ClinicRefreshToken.for_user(user).access_token)
+    assert api_client.get("/api/staff/").status_code == status.HTTP_200_OK
+
+    user.role = User.Role.STAFF
+    user.save(update_fields=["role"])
+    user.refresh_from_db()
+
+    assert user.token_version == 1
+    assert api_client.get("/api/staff/").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_deactivated_user_tokens_are_rejected(api_client, clinic_factory, user_factory):
+    user = user_factory(clinic=clinic_factory())
+    _bearer(api_client, ClinicRefreshToken.for_user(user).access_token)
+
+    user.is_active = False
+    user.save()
+
+    assert api_client.get("/api/patients/").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_refresh_reissues_current_claims(api_client, clinic_factory, user_factory):
+    user = user_factory()
+    refresh = ClinicRefreshToken.for_user(user)
+    clinic = clinic_factory()
+    user.clinic = clinic
+    user.role = User.Role.CLINIC_OWNER
+    user.save()
+
+    response = api_client.post("/api/auth/refresh", {"refresh": str(refresh)}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    _bearer(api_client, response.cookies["access_token"].value)
+    assert api_client.get("/api/staff/").status_code == status.HTTP_200_OK
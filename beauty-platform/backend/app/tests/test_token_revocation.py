@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from accounts import revocation
+from accounts.tokens import ClinicRefreshToken
+
+pytestmark = pytest.mark.django_db
+
+
+def test_issuing_tokens_does_not_record_outstanding_rows(user_factory):
+    ClinicRefreshToken.for_user(user_factory())
+
+    assert OutstandingToken.objects.count() == 0
+
+
+def test_logged_out_refresh_token_is_rejected(api_client, user_factory):
+    user = user_factory()
+    refresh = ClinicRefreshToken.for_user(user)
+    api_client.force_authenticate(user=user)
+
+    logout = api_client.post("/api/auth/logout", {"refresh": str(refresh)}, format="json")
+    response = api_client.post("/api/auth/refresh", {"refresh": str(refresh)}, format="json")
+
+    assert logout.status_code == status.HTTP_204_NO_CONTENT
+    assert BlacklistedToken.objects.filter(token__jti=refresh["jti"]).exists()
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_prune_tokens_deletes_only_expired_rows(user_factory):
+    user = user_factory()
+    now = timezone.now()
+    for index in range(3):
+        expired = OutstandingToken.objects.create(
+            user=user, jti=f"old-{index}", token="x", expires_at=now - timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=expired)
+    live = OutstandingToken.objects.create(
+        user=user, jti="live", token="x", expires_at=now + timedelta(days=1)
+    )
+    BlacklistedToken.objects.create(token=live)
+
+    call_command("prune_tokens", batch_size=2, pause=0)
+
+    assert list(OutstandingToken.objects.values_list("jti", flat=True)) == ["live"]
+    assert BlacklistedToken.objects.get().token_id == live.id
+
+
+def test_redis_store_reloads_from_database_and_tracks_revocations(fake_redis, user_factory):
+    user = user_factory()
+    old = ClinicRefreshToken.for_user(user)
+    outstanding = OutstandingToken.objects.create(
+        user=user, jti=old["jti"], token=str(old), expires_at=timezone.now() + timedelta(days=1)
+    )
+    BlacklistedToken.objects.create(token=outstanding)
+    fresh = ClinicRefreshToken.for_user(user)
+    fresh_expires_at = datetime_from_epoch(fresh["exp"])
+
+    assert revocation.is_revoked(old["jti"], outstanding.expires_at) is True
+    assert revocation.is_revoked(fresh["jti"], fresh_expires_at) is False
+
+    fresh.blacklist()
+    assert revocation.is_revoked(fresh["jti"], fresh_expires_at) is True
+    assert fake_redis.exists(revocation.LOADED_KEY)
+
+
+def test_refresh_with_redis_rejects_revoked_token(api_client, fake_redis, user_factory):
+    user = user_factory()
+    refresh = ClinicRefreshToken.for_user(user)
+    api_client.force_authenticate(user=user)
+
+    before = api_client.post("/api/auth/refresh", {"refresh": str(refresh)}, format="json")
+    api_client.post("/api/auth/logout", {"refresh": str(refresh)}, format="json")
+    after = api_client.post("/api/auth/refresh", {"refresh": str(refresh)}, format="json")
+
+    assert before.status_code == status.HTTP_200_OK
+    assert after.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_only_one_request_reloads_an_empty_store(
+    fake_redis, user_factory, django_assert_num_queries
+):
+    token = ClinicRefreshToken.for_user(user_factory())
+    expires_at = datetime_from_epoch(token["exp"])
+    fake_redis.set(revocation.RELOAD_LOCK_KEY, "1")  # another request is reloading
+
+    with django_assert_num_queries(1):  # the exact BlacklistedToken lookup
+        assert revocation.is_revoked(token["jti"], expires_at) is False
+    assert not fake_redis.exists(revocation.LOADED_KEY)
+
+    fake_redis.delete(revocation.RELOAD_LOCK_KEY)
+    assert revocation.is_revoked(token["jti"], expires_at) is False
+    assert fake_redis.exists(revocation.LOADED_KEY)
+    assert not fake_redis.exists(revocation.RELOAD_LOCK_KEY)